@@ -0,0 +1,143 @@
+"""
+Public fields of each API resource.
+
+Every field is read with a single ORM lookup, so a response is one
+.values() query projecting exactly the requested columns (joins included)
+and no model instances are built. Clients pick fields with ``?fields=a,b``;
+without it they get ``default_fields``.
+"""
+from django.core.files.storage import default_storage
+from users.avatars import variant_name
+
+AVATAR_SIZE = 128
+
+
+class UnknownFields(ValueError):
+    """Raised for a ``fields`` parameter naming fields the resource does not have"""
+
+    def __init__(self, names, available):
+        super().__init__(f'Unknown field(s): {", ".join(names)}')
+        self.available = available
+
+
+class Resource:
+    """
+    ``fields`` maps public names to ORM lookups. ``computed`` maps public
+    names to (lookups, function) pairs; the function gets the row and
+    returns the value.
+    """
+
+    def __init__(self, fields, default_fields, computed=None):
+        self.fields = fields
+        self.default_fields = default_fields
+        self.computed = computed or {}
+
+    @property
+    def available(self):
+        return [*self.fields, *self.computed]
+
+    def parse_fields(self, param):
+        """Field names requested by a ``fields`` parameter; raises UnknownFields"""
+        if not param:
+            return list(self.default_fields)
+        names = list(dict.fromkeys(name.strip() for name in param.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields and name not in self.computed]
+        if unknown:
+            raise UnknownFields(unknown, self.available)
+        return names or list(self.default_fields)
+
+    def lookups(self, names, extra=()):
+        """The lookups to pass to .values() for ``names``, plus ``extra`` (such as sort keys)"""
+        lookups = []
+        for name in names:
+            lookups.extend(self.computed[name][0] if name in self.computed else [self.fields[name]])
+        return list(dict.fromkeys([*lookups, *extra]))
+
+    def serialize(self, row, names):
+        return {
+            name: self.computed[name][1](row) if name in self.computed else row[self.fields[name]]
+            for name in names
+        }
+
+
+def _avatar(row):
+    """URLs of the avatar at AVATAR_SIZE, falling back to the original upload"""
+    digest = row['profile_image_hash']
+    if digest:
+        return {ext: default_storage.url(variant_name(digest, AVATAR_SIZE, ext)) for ext in ('webp', 'jpg')}
+    if row['profile_image']:
+        return {'original': default_storage.url(row['profile_image'])}
+    return None
+
+
+SKILLS = Resource(
+    fields={
+        'id': 'id',
+        'title': 'title',
+        'description': 'description',
+        'category': 'category__name',
+        'category_id': 'category_id',
+        'user': 'user__username',
+        'level': 'level',
+        'duration': 'duration',
+        'location_preference': 'location_preference',
+        'views_count': 'views_count',
+        'rating_average': 'rating_average',
+        'rating_count': 'rating_count',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    },
+    default_fields=(
+        'id', 'title', 'category', 'user', 'level', 'location_preference',
+        'rating_average', 'rating_count', 'created_at',
+    ),
+)
+
+CATEGORIES = Resource(
+    fields={
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'icon': 'icon',
+        'skill_count': 'active_skill_count',
+    },
+    default_fields=('id', 'name', 'icon', 'skill_count'),
+)
+
+# Contact details (email, phone, date of birth) are never exposed
+USERS = Resource(
+    fields={
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'bio': 'bio',
+        'location': 'location',
+        'profile_completion': 'profile_completion',
+        'rating_average': 'rating_average',
+        'rating_count': 'rating_count',
+        'date_joined': 'date_joined',
+        'updated_at': 'updated_at',
+    },
+    computed={
+        'avatar': (('profile_image', 'profile_image_hash'), _avatar),
+    },
+    default_fields=('username', 'first_name', 'last_name', 'bio', 'location', 'avatar', 'rating_average', 'rating_count'),
+)
+
+REVIEWS = Resource(
+    fields={
+        'id': 'id',
+        'reviewer': 'reviewer__username',
+        'reviewed_user': 'reviewed_user__username',
+        'skill_id': 'skill_id',
+        'skill': 'skill__title',
+        'rating': 'rating',
+        'communication_rating': 'communication_rating',
+        'knowledge_rating': 'knowledge_rating',
+        'patience_rating': 'patience_rating',
+        'comment': 'comment',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    },
+    default_fields=('id', 'reviewer', 'skill', 'rating', 'comment', 'created_at'),
+)
@@ -0,0 +1,36 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from reviews.models import Review
+from skills.models import Category, Skill
+from users.models import User
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.reviewer = User.objects.create_user('learner', 'learner@example.com', 'password')
+        self.skill = Skill.objects.create(
+            user=self.owner, category=Category.objects.create(name='Music'),
+            title='Guitar', description='Chords and scales',
+        )
+        self.url = reverse('api:skill_detail', args=[self.skill.pk]) + '?fields=id,rating_average,rating_count'
+
+    def test_unchanged_body_revalidates(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('Last-Modified', response)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_rating_change_is_not_hidden_by_a_stale_date(self):
+        first = self.client.get(self.url)
+        Review.objects.create(
+            reviewer=self.reviewer, reviewed_user=self.owner, skill=self.skill, rating=5,
+            comment='Great', communication_rating=5, knowledge_rating=5, patience_rating=5,
+        )
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=first['ETag'], HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rating_count'], 1)
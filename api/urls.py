@@ -0,0 +1,14 @@
+from django.urls import path
+from . import views
+
+app_name = 'api'
+
+# Version 1; a breaking change gets a new prefix next to this one
+urlpatterns = [
+    path('v1/skills/', views.skill_list, name='skill_list'),
+    path('v1/skills/<int:pk>/', views.skill_detail, name='skill_detail'),
+    path('v1/skills/<int:pk>/reviews/', views.skill_reviews, name='skill_reviews'),
+    path('v1/categories/', views.category_list, name='category_list'),
+    path('v1/users/<str:username>/', views.user_detail, name='user_detail'),
+    path('v1/users/<str:username>/reviews/', views.user_reviews, name='user_reviews'),
+]
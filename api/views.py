@@ -0,0 +1,203 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_safe
+
+from monitoring.metrics import query_budget
+from reviews.models import Review
+from skills.counters import get_view_counter
+from skills.models import Category, Skill
+from skills.pagination import CursorPaginator
+from skills.search import search_skills
+from skills.views import SKILL_SORTS
+from skillswap.routers import replica_reads
+from users.models import User
+from .resources import CATEGORIES, REVIEWS, SKILLS, USERS, UnknownFields
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+REVIEW_ORDERING = ('-created_at', 'id')
+
+
+def _dumps(payload):
+    # Compact and in a stable order, so equal payloads give equal ETags
+    return json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def json_response(request, payload, private=False):
+    """
+    JSON response with an ETag of the body; a matching conditional GET gets
+    a 304 instead. There is no Last-Modified: payloads include ratings, view
+    counts and related names that change without touching updated_at.
+    """
+    body = _dumps(payload)
+    response = HttpResponse(body, content_type='application/json')
+    etag = f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+    response['ETag'] = etag
+    # Clients may keep a copy but must revalidate it on every use
+    patch_cache_control(response, max_age=0, must_revalidate=True, **{'private' if private else 'public': True})
+    if private:
+        patch_vary_headers(response, ['Cookie'])
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def error_response(status, message, **extra):
+    response = HttpResponse(_dumps({'error': message, **extra}), content_type='application/json', status=status)
+    patch_cache_control(response, no_store=True)
+    return response
+
+
+def api_login_required(view):
+    """Like login_required, but answers 401 instead of redirecting to the login page"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error_response(401, 'Authentication required.')
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def api_view(view):
+    """Common handling of every API view: GET/HEAD only, gzip, JSON 404s and field errors"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except UnknownFields as error:
+            return error_response(400, str(error), available=error.available)
+        except Http404:
+            return error_response(404, 'Not found.')
+    return gzip_page(require_safe(wrapper))
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        return PAGE_SIZE
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def _paginated(request, resource, names, queryset, ordering, key, keyset=True, private=False):
+    """One page of ``queryset`` projected to ``names``, with links to its neighbours"""
+    sort_keys = [name.lstrip('-') for name in ordering]
+    rows = queryset.values(*resource.lookups(names, extra=sort_keys))
+    paginator = CursorPaginator(rows, ordering, per_page=_page_size(request), key=key, keyset=keyset)
+    page = paginator.page(request.GET.get('cursor'), params=request.GET)
+    payload = {
+        'results': [resource.serialize(row, names) for row in page],
+        'next': f'{request.path}?{page.next_querystring()}' if page.has_next() else None,
+        'previous': f'{request.path}?{page.previous_querystring()}' if page.has_previous() else None,
+    }
+    return json_response(request, payload, private=private)
+
+
+def _detail(resource, names, queryset, **lookup):
+    """The row matching ``lookup`` projected to ``names``; raises Http404"""
+    row = queryset.filter(**lookup).values(*resource.lookups(names)).first()
+    if row is None:
+        raise Http404
+    return resource.serialize(row, names)
+
+
+# Query budgets leave room for the session and user lookups of a logged-in client
+
+@api_view
+@query_budget(3)
+@replica_reads
+def skill_list(request):
+    """Active skills, filtered by category, level, location, user and search terms"""
+    names = SKILLS.parse_fields(request.GET.get('fields'))
+    skills = Skill.objects.filter(is_active=True)
+
+    category = request.GET.get('category')
+    if category:
+        if not category.isdigit():
+            return error_response(400, 'category must be a category id.')
+        skills = skills.filter(category_id=category)
+    if request.GET.get('level'):
+        skills = skills.filter(level=request.GET['level'])
+    if request.GET.get('location'):
+        skills = skills.filter(location_preference=request.GET['location'])
+    if request.GET.get('user'):
+        skills = skills.filter(user__username=request.GET['user'])
+    query = request.GET.get('q', '').strip()
+    if query:
+        skills = search_skills(skills, query)
+
+    sort_by = request.GET.get('sort') or ('relevance' if query else '-created_at')
+    if sort_by not in SKILL_SORTS or (sort_by == 'relevance' and not query):
+        return error_response(400, f'Unknown sort "{sort_by}".', available=[*SKILL_SORTS])
+    # 'popular' sorts on the stored views_count; views still buffered in
+    # skills.counters are left out
+    return _paginated(
+        request, SKILLS, names, skills, SKILL_SORTS[sort_by],
+        key=f'api:{sort_by}', keyset=sort_by != 'relevance',
+    )
+
+
+@api_view
+@query_budget(3)
+def skill_detail(request, pk):
+    """One skill; inactive skills are shown, as on the skill page"""
+    names = SKILLS.parse_fields(request.GET.get('fields'))
+    skill = _detail(SKILLS, names, Skill.objects.all(), pk=pk)
+    get_view_counter().record(pk)
+    return json_response(request, skill)
+
+
+@api_view
+@query_budget(4)
+@api_login_required
+@replica_reads
+def skill_reviews(request, pk):
+    """Reviews of one skill, newest first"""
+    names = REVIEWS.parse_fields(request.GET.get('fields'))
+    if not Skill.objects.filter(pk=pk).exists():
+        raise Http404
+    return _paginated(
+        request, REVIEWS, names, Review.objects.filter(skill_id=pk), REVIEW_ORDERING,
+        key='api:skill_reviews', private=True,
+    )
+
+
+@api_view
+@query_budget(3)
+@replica_reads
+def category_list(request):
+    """Every category with its active skill count"""
+    names = CATEGORIES.parse_fields(request.GET.get('fields'))
+    rows = Category.objects.order_by('name').values(*CATEGORIES.lookups(names))
+    return json_response(request, {'results': [CATEGORIES.serialize(row, names) for row in rows]})
+
+
+@api_view
+@query_budget(3)
+@api_login_required
+def user_detail(request, username):
+    """A user's public profile; contact details are not exposed"""
+    names = USERS.parse_fields(request.GET.get('fields'))
+    user = _detail(USERS, names, User.objects.filter(is_active=True), username=username)
+    return json_response(request, user, private=True)
+
+
+@api_view
+@query_budget(4)
+@api_login_required
+@replica_reads
+def user_reviews(request, username):
+    """Reviews a user has received, newest first"""
+    names = REVIEWS.parse_fields(request.GET.get('fields'))
+    user_id = User.objects.filter(username=username, is_active=True).values_list('pk', flat=True).first()
+    if user_id is None:
+        raise Http404
+    return _paginated(
+        request, REVIEWS, names, Review.objects.filter(reviewed_user_id=user_id), REVIEW_ORDERING,
+        key='api:user_reviews', private=True,
+    )
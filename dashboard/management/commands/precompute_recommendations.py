@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from users.models import User
+from dashboard.recommendations import compute_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Score and cache skill recommendations for active users ahead of their next dashboard visit'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Include users who have not listed any wanted skills'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if not options['all']:
+            users = users.filter(user_skills__skill_type='want').distinct()
+        total = 0
+        for user_id in users.values_list('pk', flat=True).iterator(chunk_size=2000):
+            compute_recommendations(user_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f'Cached recommendations for {total} users.'))
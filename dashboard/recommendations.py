@@ -0,0 +1,374 @@
+"""
+Skill recommendations for the dashboard.
+
+Active skill titles are reduced to vocabulary terms (skills.vocabulary) and
+held in a per-process inverted index from term to row, next to NumPy arrays
+of the ranking features: Bayesian-smoothed rating, log-scaled views and age.
+A user's wants are scored against the whole catalogue with a handful of
+vectorised operations and the top skill ids are cached per user.
+
+Cached results are keyed on a per-user version (bumped when the user's
+wants change) and a catalogue version (bumped when a skill or its ratings
+change). Every bump also records the changed skill ids under the new
+version for INDEX_MAX_AGE seconds. The process making the change applies it
+to its index in place; other processes find their index behind, re-read
+only the skills logged since their version and rebuild from the skills
+table only when an entry of the log is missing. Users' results are then
+rescored against the updated index, which takes one query for their wants.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from skills.vocabulary import skill_terms
+
+CATALOGUE_VERSION_KEY = 'recommendations:catalogue-version'
+# Beyond this many changes a rebuild is cheaper than fetching the log
+MAX_CATALOGUE_CHANGES = 200
+SECONDS_PER_DAY = 86400
+
+INDEX_FIELDS = ('pk', 'user_id', 'title', 'is_active', 'rating_sum', 'rating_count', 'views_count', 'created_at')
+
+
+def get_recommendation_settings():
+    options = {
+        'LIMIT': 6,
+        'CACHE_TIMEOUT': 3600,
+        'INDEX_MAX_AGE': 900,
+        'RECENCY_HALF_LIFE_DAYS': 60,
+        'RATING_PRIOR_COUNT': 3,
+        **getattr(settings, 'RECOMMENDATIONS', {}),
+    }
+    options['WEIGHTS'] = {
+        'match': 1.0,
+        'rating': 0.4,
+        'popularity': 0.2,
+        'recency': 0.2,
+        **options.get('WEIGHTS', {}),
+    }
+    return options
+
+
+def _user_version_key(user_id):
+    return f'recommendations:user-version:{user_id}'
+
+
+def _results_key(user_id, user_version, catalogue_version):
+    return f'recommendations:{user_id}:{user_version}:{catalogue_version}'
+
+
+def _change_key(catalogue_version):
+    return f'recommendations:catalogue-change:{catalogue_version}'
+
+
+def _get_version(key):
+    return cache.get_or_set(key, time.time_ns(), None)
+
+
+def _bump_version(key):
+    """
+    Bump a version counter and return the value it replaced and the new one.
+    incr is atomic, so of two concurrent bumps only one sees its predecessor.
+    """
+    try:
+        current = cache.incr(key)
+        return current - 1, current
+    except ValueError:
+        current = time.time_ns()
+        cache.set(key, current, None)
+        return None, current
+
+
+class SkillIndex:
+    """Inverted index over active skill titles plus columnar ranking features"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+        self.built_at = 0.0
+        self._allocate(0)
+
+    def _allocate(self, capacity):
+        self.size = 0
+        self.rows = {}
+        self.row_terms = []
+        self.postings = defaultdict(set)
+        self.skill_id = np.zeros(capacity, dtype=np.int64)
+        self.owner_id = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.rating_sum = np.zeros(capacity, dtype=np.float64)
+        self.rating_count = np.zeros(capacity, dtype=np.float64)
+        self.views = np.zeros(capacity, dtype=np.float64)
+        self.created = np.zeros(capacity, dtype=np.float64)
+
+    def _grow(self):
+        capacity = max(64, len(self.skill_id) * 2)
+        for name in ('skill_id', 'owner_id', 'alive', 'rating_sum', 'rating_count', 'views', 'created'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def build(self, rows, version=None):
+        """Replace the index contents with ``rows`` (tuples of INDEX_FIELDS)"""
+        with self.lock:
+            self._allocate(0)
+            for row in rows:
+                self.upsert(row)
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def upsert(self, row):
+        """Add, update or (for inactive skills) remove one skill"""
+        pk, user_id, title, is_active, rating_sum, rating_count, views_count, created_at = row
+        if not is_active:
+            self.remove(pk)
+            return
+        with self.lock:
+            index = self.rows.get(pk)
+            if index is None:
+                if self.size == len(self.skill_id):
+                    self._grow()
+                index = self.size
+                self.size += 1
+                self.rows[pk] = index
+                self.row_terms.append(())
+            for term in self.row_terms[index]:
+                self.postings[term].discard(index)
+            terms = tuple(skill_terms(title))
+            for term in terms:
+                self.postings[term].add(index)
+            self.row_terms[index] = terms
+            self.skill_id[index] = pk
+            self.owner_id[index] = user_id
+            self.alive[index] = True
+            self.rating_sum[index] = rating_sum
+            self.rating_count[index] = rating_count
+            self.views[index] = views_count
+            self.created[index] = created_at.timestamp()
+
+    def remove(self, skill_id):
+        """Drop a skill; its row is left dead until the next rebuild"""
+        with self.lock:
+            index = self.rows.pop(skill_id, None)
+            if index is None:
+                return
+            for term in self.row_terms[index]:
+                self.postings[term].discard(index)
+            self.row_terms[index] = ()
+            self.alive[index] = False
+
+    def _quality(self, options, now):
+        """Rating, popularity and recency features, each scaled to 0..1"""
+        n = self.size
+        count = self.rating_count[:n]
+        rated = count > 0
+        prior_mean = self.rating_sum[:n][rated].sum() / count[rated].sum() if rated.any() else 3.0
+        prior_count = options['RATING_PRIOR_COUNT']
+        rating = (self.rating_sum[:n] + prior_mean * prior_count) / (count + prior_count) / 5.0
+
+        views = np.log1p(self.views[:n])
+        popularity = views / views.max() if n and views.max() > 0 else np.zeros(n)
+
+        age_days = np.maximum(now - self.created[:n], 0) / SECONDS_PER_DAY
+        recency = np.exp2(-age_days / options['RECENCY_HALF_LIFE_DAYS'])
+
+        weights = options['WEIGHTS']
+        return (
+            weights['rating'] * rating +
+            weights['popularity'] * popularity +
+            weights['recency'] * recency
+        )
+
+    def _match(self, wants):
+        """
+        How well each skill covers the user's wants. Each want contributes the
+        IDF-weighted fraction of its terms found in the title, so a skill that
+        fully matches one want scores 1 and one matching two wants scores 2.
+        """
+        n = self.size
+        match = np.zeros(n)
+        live = max(len(self.rows), 1)
+        for terms in wants:
+            if not terms:
+                continue
+            idf = {
+                term: math.log1p(live / len(self.postings[term])) if self.postings.get(term)
+                else math.log1p(live)
+                for term in terms
+            }
+            total = sum(idf.values())
+            for term, weight in idf.items():
+                rows = self.postings.get(term)
+                if rows:
+                    match[np.fromiter(rows, dtype=np.intp, count=len(rows))] += weight / total
+        return match
+
+    def score(self, wants, exclude_user_id=None, limit=6, options=None, now=None):
+        """
+        Top ``limit`` skill ids for a list of wants (each a list of terms).
+        Without wants, or when nothing matches, skills are ranked on quality
+        alone so the dashboard is never empty.
+        """
+        options = options or get_recommendation_settings()
+        now = time.time() if now is None else now
+        with self.lock:
+            n = self.size
+            if not n:
+                return []
+            eligible = self.alive[:n].copy()
+            if exclude_user_id is not None:
+                eligible &= self.owner_id[:n] != exclude_user_id
+            match = self._match(wants)
+            if (match[eligible] > 0).any():
+                eligible &= match > 0
+            scores = options['WEIGHTS']['match'] * match + self._quality(options, now)
+            candidates = np.flatnonzero(eligible)
+            if not len(candidates):
+                return []
+            candidate_scores = scores[candidates]
+            if len(candidates) > limit:
+                top = np.argpartition(-candidate_scores, limit - 1)[:limit]
+            else:
+                top = np.arange(len(candidates))
+            # Ties go to the newer skill, as in the skill list
+            order = np.lexsort((-self.created[candidates[top]], -candidate_scores[top]))
+            return self.skill_id[candidates[top][order]].tolist()
+
+
+_index = SkillIndex()
+
+
+def _index_rows(queryset=None):
+    from skills.models import Skill
+
+    if queryset is None:
+        queryset = Skill.objects.filter(is_active=True)
+    return queryset.order_by().values_list(*INDEX_FIELDS).iterator(chunk_size=2000)
+
+
+def _logged_changes(since, until):
+    """Skill ids changed after catalogue version ``since`` up to ``until``, or None if the log has gaps"""
+    if since is None or not 0 < until - since <= MAX_CATALOGUE_CHANGES:
+        return None
+    keys = [_change_key(version) for version in range(since + 1, until + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) < len(keys):
+        return None
+    return {skill_id for skill_ids in changes.values() for skill_id in skill_ids}
+
+
+def _refresh_index(index, skill_ids):
+    """Re-read skills into the index; ids no longer in the table are removed"""
+    from skills.models import Skill
+
+    found = set()
+    for row in _index_rows(Skill.objects.filter(pk__in=skill_ids)):
+        index.upsert(row)
+        found.add(row[0])
+    for skill_id in set(skill_ids) - found:
+        index.remove(skill_id)
+
+
+def get_skill_index():
+    """
+    The process-wide index, caught up with the changes other processes
+    logged, or rebuilt when the log does not reach back far enough or it is
+    too old.
+    """
+    options = get_recommendation_settings()
+    version = _get_version(CATALOGUE_VERSION_KEY)
+    with _index.lock:
+        if time.monotonic() - _index.built_at > options['INDEX_MAX_AGE']:
+            _index.build(_index_rows(), version=version)
+        elif _index.version != version:
+            changed = _logged_changes(_index.version, version)
+            if changed is None:
+                _index.build(_index_rows(), version=version)
+            else:
+                _refresh_index(_index, changed)
+                _index.version = version
+    return _index
+
+
+def get_user_wants(user_id):
+    """The user's wanted skills as lists of vocabulary terms"""
+    from users.models import UserSkill
+
+    names = UserSkill.objects.filter(user_id=user_id, skill_type='want').values_list('skill_name', flat=True)
+    return [skill_terms(name) for name in names]
+
+
+def compute_recommendations(user_id, limit=None):
+    """Score the catalogue for a user and cache the resulting skill ids"""
+    options = get_recommendation_settings()
+    limit = limit or options['LIMIT']
+    user_version = _get_version(_user_version_key(user_id))
+    index = get_skill_index()
+    skill_ids = index.score(get_user_wants(user_id), exclude_user_id=user_id, limit=limit, options=options)
+    cache.set(_results_key(user_id, user_version, index.version), skill_ids, options['CACHE_TIMEOUT'])
+    return skill_ids
+
+
+def get_recommended_skill_ids(user_id):
+    """Cached recommendations for a user, computed on a miss"""
+    user_version = _get_version(_user_version_key(user_id))
+    catalogue_version = _get_version(CATALOGUE_VERSION_KEY)
+    skill_ids = cache.get(_results_key(user_id, user_version, catalogue_version))
+    if skill_ids is None:
+        skill_ids = compute_recommendations(user_id)
+    return skill_ids
+
+
+def get_recommended_skills(user):
+    """Recommended Skill objects (with their owners) in ranking order"""
+    from skills.models import Skill
+
+    skill_ids = get_recommended_skill_ids(user.pk)
+    if not skill_ids:
+        return []
+    skills = Skill.objects.filter(is_active=True).select_related('user').in_bulk(skill_ids)
+    return [skills[skill_id] for skill_id in skill_ids if skill_id in skills]
+
+
+def _catalogue_changed(skill_ids, apply):
+    """
+    Bump the catalogue version and log the changed skills under it, applying
+    the change in place if this process's index was current
+    """
+    previous, current = _bump_version(CATALOGUE_VERSION_KEY)
+    cache.set(_change_key(current), list(skill_ids), get_recommendation_settings()['INDEX_MAX_AGE'])
+    with _index.lock:
+        if _index.version is not None and _index.version == previous:
+            apply(_index)
+            _index.version = current
+
+
+def refresh_skills(*skill_ids):
+    """Re-read skills from the database into the index (after a save or a rating change)"""
+    _catalogue_changed(skill_ids, lambda index: _refresh_index(index, skill_ids))
+
+
+def remove_skills(*skill_ids):
+    """Drop deleted skills from the index"""
+    def apply(index):
+        for skill_id in skill_ids:
+            index.remove(skill_id)
+
+    _catalogue_changed(skill_ids, apply)
+
+
+def invalidate_user_recommendations(*user_ids):
+    """A user's wants changed; their cached results are no longer valid"""
+    for user_id in user_ids:
+        _bump_version(_user_version_key(user_id))
+
+
+def schedule(func, *args):
+    """Run an index update once the current transaction commits"""
+    transaction.on_commit(lambda: func(*args))
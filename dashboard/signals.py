@@ -0,0 +1,50 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from requests.models import SkillRequest
+from reviews.models import Review
+from skills.models import Skill
+from users.models import UserSkill
+from . import recommendations
+from .stats import invalidate_user_stats
+
+
+@receiver([post_save, post_delete], sender=SkillRequest)
+def invalidate_request_stats(sender, instance, **kwargs):
+    """Request counts changed for both parties"""
+    invalidate_user_stats(instance.sender_id, instance.receiver_id)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_review_stats(sender, instance, **kwargs):
+    """Rating histogram changed for the reviewed user"""
+    invalidate_user_stats(instance.reviewed_user_id)
+
+
+@receiver([post_save, post_delete], sender=Skill)
+def invalidate_skill_stats(sender, instance, **kwargs):
+    """Offered skill count may have changed for the owner"""
+    invalidate_user_stats(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=UserSkill)
+def invalidate_wanted_skill_recommendations(sender, instance, **kwargs):
+    """Wants changed, so the user's recommendations must be rescored"""
+    if instance.skill_type == 'want':
+        recommendations.invalidate_user_recommendations(instance.user_id)
+
+
+@receiver(post_save, sender=Skill)
+def refresh_recommended_skill(sender, instance, **kwargs):
+    """Title, activity or features changed; update the recommendation index"""
+    recommendations.schedule(recommendations.refresh_skills, instance.pk)
+
+
+@receiver(post_delete, sender=Skill)
+def remove_recommended_skill(sender, instance, **kwargs):
+    recommendations.schedule(recommendations.remove_skills, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def refresh_reviewed_skill(sender, instance, **kwargs):
+    """The skill's rating aggregates moved, which changes its rating feature"""
+    recommendations.schedule(recommendations.refresh_skills, instance.skill_id)
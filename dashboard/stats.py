@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+from requests.models import SkillRequest
+from reviews.models import Review
+
+STAR_RATINGS = (5, 4, 3, 2, 1)
+
+
+def _cache_key(user_id):
+    return f'dashboard-stats:{user_id}'
+
+
+def compute_user_stats(user):
+    """
+    Build a user's dashboard statistics with a fixed number of queries: one
+    COUNT for offered skills and one conditional aggregate each for the
+    request and review histograms.
+    """
+    statuses = [status for status, _ in SkillRequest.STATUS_CHOICES]
+
+    request_counts = SkillRequest.objects.filter(
+        Q(sender=user) | Q(receiver=user)
+    ).aggregate(
+        sent=Count('pk', filter=Q(sender=user)),
+        received=Count('pk', filter=Q(receiver=user)),
+        **{status: Count('pk', filter=Q(sender=user, status=status)) for status in statuses}
+    )
+
+    review_counts = Review.objects.filter(reviewed_user=user).aggregate(
+        total=Count('pk'),
+        average=Avg('rating'),
+        **{f'{stars}_star': Count('pk', filter=Q(rating=stars)) for stars in STAR_RATINGS}
+    )
+
+    return {
+        'total_skills': user.skills_offered.count(),
+        'total_requests_sent': request_counts['sent'],
+        'total_requests_received': request_counts['received'],
+        'requests_by_status': {status: request_counts[status] for status in statuses},
+        'total_reviews': review_counts['total'],
+        'average_rating': round(review_counts['average'] or 0, 1),
+        'rating_breakdown': {f'{stars}_star': review_counts[f'{stars}_star'] for stars in STAR_RATINGS},
+    }
+
+
+def get_user_stats(user):
+    """Cached dashboard statistics for a user, invalidated by dashboard.signals"""
+    key = _cache_key(user.pk)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_user_stats(user)
+        cache.set(key, stats, getattr(settings, 'DASHBOARD_STATS_CACHE_TIMEOUT', 300))
+    return stats
+
+
+def invalidate_user_stats(*user_ids):
+    """Drop cached statistics for the given users"""
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids if user_id])
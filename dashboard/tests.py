@@ -0,0 +1,162 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from asgiref.sync import sync_to_async
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from requests.models import SkillRequest
+from reviews.models import Review
+from skills.models import Category, Skill
+from users.models import User, UserSkill
+from . import recommendations
+from .recommendations import get_recommended_skills
+from .stats import compute_user_stats, get_user_stats
+
+
+class DashboardQueryCountTests(TestCase):
+    """The dashboard's query count does not grow with the user's activity"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Programming')
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.skill = self.create_skill(self.user, 'Python')
+        self.others = 0
+
+    def create_skill(self, user, title):
+        return Skill.objects.create(
+            user=user, category=self.category, title=title, description=f'{title} lessons'
+        )
+
+    def add_activity(self, count):
+        """Give the user ``count`` more sent and received requests and reviews"""
+        statuses = [status for status, _ in SkillRequest.STATUS_CHOICES]
+        for _ in range(count):
+            self.others += 1
+            other = User.objects.create_user(f'other{self.others}', f'other{self.others}@example.com', 'password')
+            other_skill = self.create_skill(other, f'Skill {self.others}')
+            received = SkillRequest.objects.create(
+                sender=other, receiver=self.user, skill=self.skill, message='Teach me',
+                status=statuses[self.others % len(statuses)],
+            )
+            SkillRequest.objects.create(
+                sender=self.user, receiver=other, skill=other_skill, message='Teach me',
+                status=statuses[(self.others + 1) % len(statuses)],
+            )
+            Review.objects.create(
+                reviewer=other, reviewed_user=self.user, skill=self.skill, request=received,
+                rating=self.others % 5 + 1, comment='Great', communication_rating=5,
+                knowledge_rating=5, patience_rating=5,
+            )
+
+    def count_dashboard_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard:home'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_stats_query_count_is_constant(self):
+        self.add_activity(2)
+        with self.assertNumQueries(3):
+            small = compute_user_stats(self.user)
+        self.add_activity(20)
+        with self.assertNumQueries(3):
+            large = compute_user_stats(self.user)
+        self.assertEqual(small['total_requests_sent'], 2)
+        self.assertEqual(large['total_requests_sent'], 22)
+        self.assertEqual(sum(large['rating_breakdown'].values()), 22)
+
+    def test_cached_stats_are_invalidated_by_saves(self):
+        self.add_activity(1)
+        get_user_stats(self.user)
+        with self.assertNumQueries(0):
+            get_user_stats(self.user)
+        self.add_activity(1)
+        with self.assertNumQueries(3):
+            self.assertEqual(get_user_stats(self.user)['total_reviews'], 2)
+
+    def test_dashboard_query_count_is_constant(self):
+        self.client.force_login(self.user)
+        self.add_activity(2)
+        small = self.count_dashboard_queries()
+        self.add_activity(20)
+        self.assertEqual(self.count_dashboard_queries(), small)
+
+
+class SkillIndexChangeLogTests(TestCase):
+    """Processes whose index is behind apply the logged changes instead of rebuilding"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Programming')
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.index = recommendations.get_skill_index()
+
+    def create_skill(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Skill.objects.create(
+                user=self.owner, category=self.category, title=title, description=f'{title} lessons'
+            )
+
+    def behind_by_one_change(self, title):
+        """Create a skill, then put the index back where another process would be"""
+        before = self.index.version
+        skill = self.create_skill(title)
+        self.assertIn(skill.pk, self.index.rows)
+        self.index.remove(skill.pk)
+        self.index.version = before
+        return skill
+
+    def test_other_process_applies_logged_changes(self):
+        skill = self.behind_by_one_change('Python')
+        with mock.patch.object(self.index, 'build') as build, self.assertNumQueries(1):
+            recommendations.get_skill_index()
+        build.assert_not_called()
+        self.assertIn(skill.pk, self.index.rows)
+        self.assertEqual(self.index.version, recommendations._get_version(recommendations.CATALOGUE_VERSION_KEY))
+
+    def test_gap_in_the_log_rebuilds(self):
+        skill = self.behind_by_one_change('Guitar')
+        cache.delete(recommendations._change_key(recommendations._get_version(recommendations.CATALOGUE_VERSION_KEY)))
+        built_at = self.index.built_at
+        recommendations.get_skill_index()
+        self.assertGreater(self.index.built_at, built_at)
+        self.assertIn(skill.pk, self.index.rows)
+
+
+@override_settings(ASYNC_VIEWS=True)
+class AsyncDashboardTests(TransactionTestCase):
+    """dashboard_home_async shows what dashboard_home does"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Music')
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        skill = Skill.objects.create(user=self.user, category=category, title='Piano', description='Scales')
+        other_skill = Skill.objects.create(user=other, category=category, title='Guitar', description='Chords')
+        self.received = SkillRequest.objects.create(sender=other, receiver=self.user, skill=skill, message='Teach me')
+        self.sent = SkillRequest.objects.create(sender=self.user, receiver=other, skill=other_skill, message='Teach me')
+        for user, offer, want in [(self.user, 'Piano', 'Guitar'), (other, 'Guitar', 'Piano')]:
+            UserSkill.objects.create(user=user, skill_name=offer, skill_type='offer')
+            UserSkill.objects.create(user=user, skill_name=want, skill_type='want')
+        self.async_client.force_login(self.user)
+
+    async def test_async_view_renders_the_dashboard(self):
+        self.assertEqual(resolve(reverse('dashboard:home')).func.__name__, 'dashboard_home_async')
+        response = await self.async_client.get(reverse('dashboard:home'))
+        self.assertEqual(response.status_code, 200)
+        context = response.context
+        self.assertEqual([request.pk for request in context['pending_sent']], [self.sent.pk])
+        self.assertEqual([request.pk for request in context['pending_received']], [self.received.pk])
+        self.assertEqual([match.teaches.username for match in context['swap_matches']], ['other'])
+        self.assertEqual((context['sent_requests_count'], context['received_requests_count']), (1, 1))
+        self.assertEqual(context['recommended_skills'], await sync_to_async(get_recommended_skills)(self.user))
+
+    async def test_anonymous_users_are_sent_to_log_in(self):
+        await sync_to_async(self.async_client.logout)()
+        response = await self.async_client.get(reverse('dashboard:home'))
+        self.assertEqual(response.status_code, 302)
@@ -1,9 +1,10 @@
 from django.urls import path
+from skillswap.asyncviews import native
 from . import views
 
 app_name = 'dashboard'
 
 urlpatterns = [
-    path('', views.dashboard_home, name='home'),
+    path('', native(views.dashboard_home, views.dashboard_home_async), name='home'),
     path('stats/', views.dashboard_stats, name='stats'),
 ]
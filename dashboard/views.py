@@ -1,55 +1,42 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q, Avg
-from skills.models import Skill, Category
+from django.db.models import Q
+from skills.counters import get_view_counter
+from skills.models import Category
 from requests.models import SkillRequest
-from reviews.models import Review
-from users.models import UserSkill
+from users.matching import get_swap_matches
+from .recommendations import get_recommended_skills
+from .stats import get_user_stats
+from monitoring.metrics import query_budget
+from skillswap.asyncviews import async_login_required, read_off_thread
 
 
-@login_required
-def dashboard_home(request):
-    """Main dashboard view"""
-    user = request.user
-    
-    # Get user statistics
-    skills_offered_count = user.skills_offered.count()
-    sent_requests_count = user.sent_requests.count()
-    received_requests_count = user.received_requests.count()
-    reviews_received_count = user.received_reviews.count()
-    
-    # Get pending requests
-    pending_sent = user.sent_requests.filter(status='pending')[:5]
-    pending_received = user.received_requests.filter(status='pending')[:5]
-    
-    # Get active requests
-    active_requests = SkillRequest.objects.filter(
-        Q(sender=user) | Q(receiver=user),
-        status='accepted'
-    )[:5]
-    
-    # Get recommended skills based on user interests
-    user_skills_wanted = user.user_skills.filter(skill_type='want').values_list('skill_name', flat=True)
-    recommended_skills = Skill.objects.filter(
-        is_active=True
-    ).exclude(user=user)
-    
-    if user_skills_wanted:
-        recommended_skills = recommended_skills.filter(
-            Q(title__icontains=user_skills_wanted[0]) if user_skills_wanted else Q()
-        )
-    
-    recommended_skills = recommended_skills.annotate(
-        avg_rating=Avg('reviews__rating')
-    ).order_by('-avg_rating', '-created_at')[:6]
-    
-    # Get all categories with skill counts
-    categories = Category.objects.annotate(
-        skill_count=Count('skills', filter=Q(skills__is_active=True))
-    ).order_by('-skill_count')[:8]
-    
-    # Get recent reviews
-    recent_reviews = user.received_reviews.all()[:5]
+def _dashboard_lists(user):
+    """The dashboard's listing querysets, unevaluated"""
+    return {
+        # Pending requests
+        'pending_sent': user.sent_requests.filter(status='pending').select_related('receiver', 'skill')[:5],
+        'pending_received': user.received_requests.filter(status='pending').select_related('sender', 'skill')[:5],
+        # Active requests
+        'active_requests': SkillRequest.objects.filter(
+            Q(sender=user) | Q(receiver=user),
+            status='accepted'
+        ).select_related('sender', 'receiver', 'skill')[:5],
+        # Categories with the most active skills, from the stored counts
+        'categories': Category.objects.order_by('-active_skill_count')[:8],
+        # Recent reviews
+        'recent_reviews': user.received_reviews.all()[:5],
+    }
+
+
+def _dashboard_context(user, stats, recommended_skills, swap_matches, lists):
+    skills_offered_count = stats['total_skills']
+    sent_requests_count = stats['total_requests_sent']
+    received_requests_count = stats['total_requests_received']
+    reviews_received_count = stats['total_reviews']
     
     # Activity data for chart
     activity_data = {
@@ -59,68 +46,82 @@ def dashboard_home(request):
         'reviews': reviews_received_count,
     }
     
-    context = {
+    return {
         'skills_offered_count': skills_offered_count,
         'sent_requests_count': sent_requests_count,
         'received_requests_count': received_requests_count,
         'reviews_received_count': reviews_received_count,
-        'pending_sent': pending_sent,
-        'pending_received': pending_received,
-        'active_requests': active_requests,
+        **lists,
         'recommended_skills': recommended_skills,
-        'categories': categories,
-        'recent_reviews': recent_reviews,
+        'swap_matches': swap_matches,
         'activity_data': activity_data,
-        'average_rating': user.get_average_rating(),
-        'profile_completion': user.get_profile_completion(),
+        'average_rating': stats['average_rating'],
+        'profile_completion': user.profile_completion,
     }
+
+
+@login_required
+@query_budget(35)
+def dashboard_home(request):
+    """Main dashboard view"""
+    user = request.user
     
+    # Get user statistics
+    stats = get_user_stats(user)
+    
+    # Get recommended skills based on all of the user's wants
+    recommended_skills = get_recommended_skills(user)
+    
+    # People to swap skills with, two-way or in a three-way cycle
+    swap_matches = get_swap_matches(user)
+    
+    context = _dashboard_context(user, stats, recommended_skills, swap_matches, _dashboard_lists(user))
     return render(request, 'dashboard/home.html', context)
 
 
+async def _fetch(queryset):
+    return [obj async for obj in queryset]
+
+
+@async_login_required
+@query_budget(35)
+async def dashboard_home_async(request):
+    """
+    dashboard_home for ASGI, with its independent reads gathered. The stats,
+    recommendations and swap matches run on pool threads, so they overlap
+    each other and the pending lists, which the async ORM runs on the
+    request's thread.
+    """
+    user = request.user
+    lists = _dashboard_lists(user)
+    # The page always shows the pending lists; the rest stay lazy as in the
+    # sync view, since categories render inside a cached fragment
+    stats, recommended_skills, swap_matches, pending_sent, pending_received = await asyncio.gather(
+        read_off_thread(get_user_stats)(user),
+        read_off_thread(get_recommended_skills)(user),
+        read_off_thread(get_swap_matches)(user),
+        _fetch(lists['pending_sent']),
+        _fetch(lists['pending_received']),
+    )
+    lists.update(pending_sent=pending_sent, pending_received=pending_received)
+    context = _dashboard_context(user, stats, recommended_skills, swap_matches, lists)
+    return await sync_to_async(render)(request, 'dashboard/home.html', context)
+
+
 @login_required
 def dashboard_stats(request):
     """User statistics view"""
     user = request.user
     
-    # Get detailed statistics
-    total_skills = user.skills_offered.count()
-    total_requests_sent = user.sent_requests.count()
-    total_requests_received = user.received_requests.count()
-    
-    # Request status breakdown
-    requests_by_status = {
-        'pending': user.sent_requests.filter(status='pending').count(),
-        'accepted': user.sent_requests.filter(status='accepted').count(),
-        'completed': user.sent_requests.filter(status='completed').count(),
-        'rejected': user.sent_requests.filter(status='rejected').count(),
-        'cancelled': user.sent_requests.filter(status='cancelled').count(),
-    }
-    
-    # Reviews statistics
-    reviews = user.received_reviews.all()
-    total_reviews = reviews.count()
-    average_rating = user.get_average_rating()
-    
-    rating_breakdown = {
-        '5_star': reviews.filter(rating=5).count(),
-        '4_star': reviews.filter(rating=4).count(),
-        '3_star': reviews.filter(rating=3).count(),
-        '2_star': reviews.filter(rating=2).count(),
-        '1_star': reviews.filter(rating=1).count(),
-    }
+    stats = get_user_stats(user)
     
     # Most viewed skills
-    popular_skills = user.skills_offered.order_by('-views_count')[:5]
+    popular_skills = get_view_counter().annotate_live_views(
+        user.skills_offered.all()
+    ).order_by('-live_views_count')[:5]
     
     context = {
-        'total_skills': total_skills,
-        'total_requests_sent': total_requests_sent,
-        'total_requests_received': total_requests_received,
-        'requests_by_status': requests_by_status,
-        'total_reviews': total_reviews,
-        'average_rating': average_rating,
-        'rating_breakdown': rating_breakdown,
+        **stats,
         'popular_skills': popular_skills,
     }
     
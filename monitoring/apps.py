@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+    
+    def ready(self):
+        from .middleware import get_monitoring_settings
+        if get_monitoring_settings()['ENABLED']:
+            from .metrics import instrument_templates
+            instrument_templates()
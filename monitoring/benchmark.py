@@ -0,0 +1,194 @@
+"""
+Per-view query-count and latency benchmarks.
+
+Every named URL in the project is requested through the test client as the
+busiest synthetic user, and the query count, SQL time and wall time are
+recorded. Views whose query count grows with the size of the dataset are
+flagged; that is the signature of an N+1 query.
+"""
+import statistics
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+
+from requests.models import SkillRequest
+from skills.models import Category, Skill
+from .datagen import BENCHMARK_PASSWORD
+
+# Views that change state on GET or never finish (streams) are not benchmarked
+SKIPPED_VIEWS = {
+    'users:logout',
+    'users:delete_skill',
+    'users:password_reset_confirm',
+    'requests:request_bulk_action',
+    'requests:request_accept',
+    'requests:request_reject',
+    'requests:request_complete',
+    'requests:request_cancel',
+    'notifications:mark_as_read',
+    'notifications:mark_all_as_read',
+    'notifications:delete_notification',
+    'notifications:notification_stream',
+}
+
+# Query strings that exercise the interesting branch of a view
+VIEW_QUERY_STRINGS = {
+    'skills:skill_search_ajax': 'q=py',
+}
+
+
+def iter_view_names(patterns=None, namespace=None):
+    """Yield the namespaced name and URL arguments of every named route"""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            yield from iter_view_names(pattern.url_patterns, pattern.namespace or namespace)
+        elif pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, list(pattern.pattern.converters)
+
+
+def sample_arguments(user):
+    """URL arguments for views that need a primary key or username"""
+    own_skill = Skill.objects.filter(user=user).order_by('pk').first()
+    other_skill = Skill.objects.exclude(user=user).order_by('pk').first()
+    skill_request = SkillRequest.objects.filter(receiver=user).order_by('pk').first()
+    completed = SkillRequest.objects.filter(receiver=user, status='completed').order_by('pk').first()
+    category = Category.objects.order_by('pk').first()
+    candidates = {
+        'users:profile': {'username': user.username},
+        'skills:skill_detail': {'pk': own_skill and own_skill.pk},
+        'skills:skill_update': {'pk': own_skill and own_skill.pk},
+        'skills:skill_delete': {'pk': own_skill and own_skill.pk},
+        'skills:category_detail': {'pk': category and category.pk},
+        'requests:request_create': {'skill_id': other_skill and other_skill.pk},
+        'requests:request_detail': {'pk': skill_request and skill_request.pk},
+        'requests:request_messages': {'pk': skill_request and skill_request.pk},
+        'reviews:create_review': {'request_id': completed and completed.pk},
+        'reviews:user_reviews': {'username': user.username},
+        'reviews:skill_reviews': {'skill_id': own_skill and own_skill.pk},
+        'api:skill_detail': {'pk': own_skill and own_skill.pk},
+        'api:skill_reviews': {'pk': own_skill and own_skill.pk},
+        'api:user_detail': {'username': user.username},
+        'api:user_reviews': {'username': user.username},
+    }
+    return {
+        name: kwargs for name, kwargs in candidates.items()
+        if all(value is not None for value in kwargs.values())
+    }
+
+
+def measure(client, path, repeat=3):
+    """Request ``path`` ``repeat`` times with cold caches and summarise the runs"""
+    runs = []
+    for _ in range(repeat):
+        for cache in caches.all():
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            try:
+                response = client.get(path)
+                status = response.status_code
+                error = None
+            except Exception as exc:
+                status = 500
+                error = f'{exc.__class__.__name__}: {exc}'
+            wall = time.perf_counter() - started
+        sql = [query['sql'] for query in captured.captured_queries]
+        runs.append({
+            'status': status,
+            'error': error,
+            'queries': len(sql),
+            'duplicate_queries': sum(count - 1 for count in Counter(sql).values() if count > 1),
+            'sql_ms': sum(float(query['time']) for query in captured.captured_queries) * 1000,
+            'wall_ms': wall * 1000,
+        })
+    return {
+        'path': path,
+        'status': runs[0]['status'],
+        'error': runs[0]['error'],
+        'queries': min(run['queries'] for run in runs),
+        'duplicate_queries': min(run['duplicate_queries'] for run in runs),
+        'sql_ms': round(statistics.median(run['sql_ms'] for run in runs), 3),
+        'wall_ms': round(statistics.median(run['wall_ms'] for run in runs), 3),
+    }
+
+
+def run_benchmark(user, repeat=3):
+    """Benchmark every named view as ``user``; returns a dict keyed by view name"""
+    client = Client()
+    client.login(username=user.username, password=BENCHMARK_PASSWORD)
+    arguments = sample_arguments(user)
+    results = {}
+    for name, params in iter_view_names():
+        if name in SKIPPED_VIEWS:
+            continue
+        if params and name not in arguments:
+            results[name] = {'skipped': 'no sample arguments'}
+            continue
+        path = reverse(name, kwargs=arguments.get(name))
+        if name in VIEW_QUERY_STRINGS:
+            path = f'{path}?{VIEW_QUERY_STRINGS[name]}'
+        results[name] = measure(client, path, repeat=repeat)
+    return results
+
+
+def _comparable(result, before):
+    """Skipped views have no query counts; failing ones still do"""
+    return 'queries' in result and 'queries' in before
+
+
+def find_regressions(report, baseline=None):
+    """
+    List problems in a report: views that answer with a server error, views
+    whose query count grows between the smallest and largest scale, and views
+    that need more queries than the same view at the same scale in ``baseline``.
+    """
+    problems = []
+    runs = report['runs']
+    for run in runs:
+        for name, result in run['views'].items():
+            if result.get('status', 0) >= 500:
+                detail = f"status {result['status']} at scale {run['scale']}"
+                if result['error']:
+                    detail = f"{detail}: {result['error']}"
+                problems.append({'view': name, 'kind': 'error', 'detail': detail})
+    if len(runs) > 1:
+        smallest, largest = runs[0], runs[-1]
+        for name, result in largest['views'].items():
+            before = smallest['views'].get(name, {})
+            if _comparable(result, before) and result['queries'] > before['queries']:
+                problems.append({
+                    'view': name,
+                    'kind': 'scales_with_data',
+                    'detail': (
+                        f"{before['queries']} queries at scale {smallest['scale']}, "
+                        f"{result['queries']} at scale {largest['scale']}"
+                    ),
+                })
+    if baseline:
+        baseline_runs = {run['scale']: run for run in baseline.get('runs', [])}
+        for run in runs:
+            previous = baseline_runs.get(run['scale'])
+            if not previous:
+                continue
+            for name, result in run['views'].items():
+                before = previous['views'].get(name, {})
+                if _comparable(result, before) and result['queries'] > before['queries']:
+                    problems.append({
+                        'view': name,
+                        'kind': 'baseline_regression',
+                        'detail': (
+                            f"{result['queries']} queries at scale {run['scale']}, "
+                            f"baseline {before['queries']}"
+                        ),
+                    })
+    return problems
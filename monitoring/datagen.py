@@ -0,0 +1,161 @@
+"""
+Synthetic data for benchmarks.
+
+Ownership and activity follow a Zipf-like distribution, so a handful of
+"popular teacher" users own most skills and receive most requests, reviews
+and notifications, the way real catalogues skew.
+"""
+import io
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+from notifications.models import Notification
+from requests.models import RequestMessage, SkillRequest
+from reviews.models import Review
+from skills.caching import bump_catalogue_version
+from skills.models import Category, Skill
+from skills.vocabulary import normalize_skill_name
+from users.models import User, UserSkill
+
+WORDS = (
+    'python', 'guitar', 'cooking', 'spanish', 'painting', 'photography', 'yoga',
+    'chess', 'piano', 'django', 'excel', 'marketing', 'drawing', 'baking',
+    'french', 'design', 'writing', 'running', 'knitting', 'javascript',
+)
+CATEGORIES = ('Programming', 'Music', 'Languages', 'Art', 'Cooking', 'Sports', 'Business', 'Crafts')
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def zipf_weights(count, exponent=1.1):
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def generate_dataset(users=50, skills=200, requests=400, messages=1000, reviews=200,
+                     notifications=1000, seed=0, batch_size=1000):
+    """
+    Create a skewed dataset and return a summary, including the ``user``
+    whose pages are the most expensive to render (rank 0 in the skew).
+    """
+    rng = random.Random(seed)
+    password = make_password(BENCHMARK_PASSWORD)
+
+    categories = [
+        Category.objects.get_or_create(name=name, defaults={'icon': 'fa-folder'})[0]
+        for name in CATEGORIES
+    ]
+    bench_users = [
+        User(
+            username=f'bench{index}', email=f'bench{index}@example.com', password=password,
+            bio='Benchmark user', location=rng.choice(('Berlin', 'Lagos', 'Lima', 'Pune')),
+        )
+        for index in range(users)
+    ]
+    # bulk_create skips save(), which maintains the stored completion
+    for user in bench_users:
+        user.update_profile_completion()
+    User.objects.bulk_create(bench_users, batch_size=batch_size)
+    user_list = list(User.objects.filter(username__startswith='bench').order_by('pk'))
+    weights = zipf_weights(len(user_list))
+
+    def pick_user(exclude=None):
+        while True:
+            user = rng.choices(user_list, weights=weights)[0]
+            if user != exclude:
+                return user
+
+    UserSkill.objects.bulk_create([
+        UserSkill(
+            user=user, skill_name=word.title(), normalized_name=normalize_skill_name(word),
+            skill_type=skill_type,
+            proficiency_level=rng.choice(('beginner', 'intermediate', 'advanced', 'expert')),
+        )
+        for user in user_list
+        for skill_type in ('offer', 'want')
+        for word in rng.sample(WORDS, 3)
+    ], batch_size=batch_size, ignore_conflicts=True)
+
+    Skill.objects.bulk_create([
+        Skill(
+            title=f'{rng.choice(WORDS).title()} {rng.choice(("basics", "masterclass", "for beginners", "deep dive"))}',
+            description=' '.join(rng.choices(WORDS, k=30)),
+            category=rng.choice(categories),
+            user=pick_user(),
+            level=rng.choice(Skill.SKILL_LEVEL_CHOICES)[0],
+            views_count=int(rng.paretovariate(1.2) * 10),
+        )
+        for _ in range(skills)
+    ], batch_size=batch_size)
+    skill_list = list(Skill.objects.select_related('user').order_by('pk'))
+    skill_weights = zipf_weights(len(skill_list))
+
+    statuses = [status for status, _ in SkillRequest.STATUS_CHOICES]
+    request_objects = []
+    seen = set()
+    for _ in range(requests):
+        skill = rng.choices(skill_list, weights=skill_weights)[0]
+        sender = pick_user(exclude=skill.user)
+        status = rng.choice(statuses)
+        # A sender holds at most one open request per skill
+        key = (sender.pk, skill.pk, status if status not in SkillRequest.OPEN_STATUSES else 'open')
+        if key in seen:
+            continue
+        seen.add(key)
+        request_objects.append(SkillRequest(
+            sender=sender, receiver=skill.user, skill=skill,
+            message='Benchmark request', status=status,
+        ))
+    SkillRequest.objects.bulk_create(request_objects, batch_size=batch_size)
+    request_list = list(SkillRequest.objects.order_by('pk'))
+    request_weights = zipf_weights(len(request_list))
+
+    RequestMessage.objects.bulk_create([
+        RequestMessage(
+            request=skill_request,
+            sender_id=rng.choice((skill_request.sender_id, skill_request.receiver_id)),
+            message='Benchmark message', is_read=rng.random() < 0.7,
+        )
+        for skill_request in rng.choices(request_list, weights=request_weights, k=messages)
+    ], batch_size=batch_size)
+
+    completed = [skill_request for skill_request in request_list if skill_request.status == 'completed']
+    Review.objects.bulk_create([
+        Review(
+            reviewer_id=skill_request.sender_id, reviewed_user_id=skill_request.receiver_id,
+            skill_id=skill_request.skill_id, request=skill_request,
+            rating=rng.choice((3, 4, 4, 5, 5, 5)), comment='Benchmark review',
+            communication_rating=rng.randint(1, 5), knowledge_rating=rng.randint(1, 5),
+            patience_rating=rng.randint(1, 5),
+        )
+        for skill_request in completed[:reviews]
+    ], batch_size=batch_size)
+
+    Notification.objects.bulk_create([
+        Notification(
+            user=pick_user(), notification_type='system', title='Benchmark notification',
+            message='Benchmark', is_read=rng.random() < 0.6,
+        )
+        for _ in range(notifications)
+    ], batch_size=batch_size)
+
+    # bulk_create skips signals, so rebuild what they would have maintained
+    call_command('rebuild_rating_aggregates', stdout=io.StringIO())
+    call_command('rebuild_category_counts', stdout=io.StringIO())
+    call_command('rebuild_search_index', stdout=io.StringIO())
+    call_command('rebuild_swap_matches', stdout=io.StringIO())
+    # bulk_create sends no signals to invalidate cached catalogue pages
+    bump_catalogue_version()
+
+    return {
+        'user': user_list[0],
+        'counts': {
+            'users': len(user_list),
+            'skills': len(skill_list),
+            'requests': len(request_list),
+            'messages': messages,
+            'reviews': Review.objects.count(),
+            'notifications': notifications,
+        },
+    }
+
@@ -0,0 +1,147 @@
+"""
+WSGI versus ASGI load test of the hot read paths.
+
+Each interface is driven in-process by ``N`` clients sending requests back
+to back: WSGIHandler from a pool of N threads, as a threaded WSGI server
+(gunicorn's gthread worker) would call it, and ASGIHandler from N
+coroutines on one event loop, as uvicorn would. Every concurrency level
+reports throughput and the latency distribution at that load. Nothing sits
+in between, so the numbers compare Django's two request paths, middleware
+and views included, not the servers or the network.
+
+The URLconf picks sync or async views when it is imported (ASYNC_VIEWS),
+so the load_test command runs each interface in a worker process of its
+own against a shared test database.
+"""
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+
+HOST = 'localhost'
+
+# Interface name: (driver, whether the async views are routed)
+INTERFACES = {
+    'wsgi': ('wsgi', False),
+    'asgi': ('asgi', True),
+    # Sync views behind the ASGI handler, each run in a thread by sync_to_async
+    'asgi-sync': ('asgi', False),
+}
+
+
+def wsgi_environ(path, cookie):
+    return RequestFactory().get(path, HTTP_HOST=HOST, HTTP_COOKIE=cookie).environ
+
+
+def asgi_scope(path, cookie):
+    path, _, query = path.partition('?')
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000),
+        'server': (HOST, 80),
+    }
+
+
+def run_wsgi(paths, cookie, concurrency, total):
+    """Send ``total`` requests from ``concurrency`` threads; returns (latencies, statuses, wall time)"""
+    handler = WSGIHandler()
+    environs = [wsgi_environ(path, cookie) for path in paths]
+
+    def request(number):
+        statuses = []
+        started = time.perf_counter()
+        response = handler(dict(environs[number % len(environs)]), lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            b''.join(response)
+        finally:
+            # Fires request_finished, which closes the thread's connections
+            response.close()
+        return time.perf_counter() - started, int(statuses[0].split()[0])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(request, range(total)))
+    wall = time.perf_counter() - started
+    return [latency for latency, _ in results], [status for _, status in results], wall
+
+
+async def run_asgi(paths, cookie, concurrency, total):
+    """Send ``total`` requests from ``concurrency`` coroutines; returns (latencies, statuses, wall time)"""
+    application = ASGIHandler()
+    scopes = [asgi_scope(path, cookie) for path in paths]
+    numbers = iter(range(total))
+    latencies, statuses = [], []
+
+    async def request(scope):
+        body_sent = False
+        messages = []
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # The client stays connected until the response is complete
+            await asyncio.Future()
+
+        async def send(message):
+            messages.append(message)
+
+        started = time.perf_counter()
+        await application(dict(scope), receive, send)
+        latencies.append(time.perf_counter() - started)
+        statuses.append(next(message['status'] for message in messages if message['type'] == 'http.response.start'))
+
+    async def client():
+        for number in numbers:
+            await request(scopes[number % len(scopes)])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def summarise(latencies, statuses, wall):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': len(latencies),
+        'errors': sum(status != 200 for status in statuses),
+        'requests_per_second': round(len(latencies) / wall, 1),
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2),
+    }
+
+
+def run_load_test(interface, paths, cookie, levels, total):
+    """
+    Run ``interface`` at each concurrency in ``levels``, after one warm-up
+    pass over ``paths`` that fills the caches; returns one summary per level.
+    """
+    driver, _ = INTERFACES[interface]
+    if driver == 'wsgi':
+        def run(concurrency, count):
+            return run_wsgi(paths, cookie, concurrency, count)
+    else:
+        def run(concurrency, count):
+            return asyncio.run(run_asgi(paths, cookie, concurrency, count))
+
+    run(1, len(paths))
+    return [
+        {'interface': interface, 'concurrency': concurrency, **summarise(*run(concurrency, total))}
+        for concurrency in levels
+    ]
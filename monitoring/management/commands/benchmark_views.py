@@ -0,0 +1,78 @@
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from monitoring.benchmark import find_regressions, run_benchmark
+from monitoring.datagen import generate_dataset
+
+# Rows generated per unit of --scales
+BASE_SIZES = {
+    'users': 25,
+    'skills': 100,
+    'requests': 200,
+    'messages': 500,
+    'reviews': 100,
+    'notifications': 500,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark query count, SQL time and wall time of every view against '
+        'synthetic data at several scales, in a throwaway test database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1,4', help='Comma-separated dataset multipliers')
+        parser.add_argument('--repeat', type=int, default=3, help='Requests per view and scale')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+        parser.add_argument('--baseline', help='Compare query counts against a previous JSON report')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Exit with an error if a view scales with data or regresses against the baseline',
+        )
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options['scales'].split(',')]
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as handle:
+                baseline = json.load(handle)
+
+        setup_test_environment(debug=False)
+        databases = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            runs = []
+            for scale in scales:
+                call_command('flush', interactive=False, verbosity=0)
+                dataset = generate_dataset(
+                    seed=options['seed'],
+                    **{name: size * scale for name, size in BASE_SIZES.items()}
+                )
+                self.stderr.write(f'Benchmarking scale {scale}: {dataset["counts"]}')
+                runs.append({
+                    'scale': scale,
+                    'dataset': dataset['counts'],
+                    'views': run_benchmark(dataset['user'], repeat=options['repeat']),
+                })
+        finally:
+            teardown_databases(databases, verbosity=0)
+            teardown_test_environment()
+
+        report = {'runs': runs}
+        report['problems'] = find_regressions(report, baseline)
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        for problem in report['problems']:
+            self.stderr.write(f"{problem['view']}: {problem['kind']} ({problem['detail']})")
+        if options['check'] and report['problems']:
+            raise CommandError(f"{len(report['problems'])} view(s) failed the query-count check")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from monitoring.queryplans import check_query_plans
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the canonical hot queries and fail if any of them scans a whole table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--show-plans', action='store_true', help='Print every plan, not only failures')
+
+    def handle(self, *args, **options):
+        try:
+            results = check_query_plans(using=connections[options['database']])
+        except NotImplementedError as exc:
+            raise CommandError(str(exc))
+
+        failures = [result for result in results if result['full_scans']]
+        for result in results:
+            if result['full_scans']:
+                self.stdout.write(self.style.ERROR(
+                    f"{result['name']}: full scan of {', '.join(sorted(set(result['full_scans'])))}"
+                ))
+            else:
+                self.stdout.write(f"{result['name']}: ok")
+            if result['full_scans'] or options['show_plans']:
+                self.stdout.write('    ' + result['plan'].replace('\n', '\n    '))
+
+        if failures:
+            raise CommandError(f'{len(failures)} of {len(results)} queries fall back to a full table scan.')
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} queries use an index.'))
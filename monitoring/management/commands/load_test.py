@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+from monitoring.datagen import generate_dataset
+from monitoring.loadtest import INTERFACES, run_load_test
+from .benchmark_views import BASE_SIZES
+
+# The hot read paths, as the busiest synthetic user
+DEFAULT_PATHS = (
+    ('skills:skill_list', ''),
+    ('skills:skill_search_ajax', 'q=py'),
+    ('notifications:get_unread_count', ''),
+    ('notifications:get_recent_notifications', ''),
+    ('dashboard:home', ''),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare WSGI and ASGI throughput and tail latency of the hot read paths '
+        'at rising concurrency, against synthetic data in a throwaway test database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interfaces', default='wsgi,asgi', help=f'Comma-separated, from {", ".join(INTERFACES)}')
+        parser.add_argument('--concurrency', default='1,4,16,64', help='Comma-separated numbers of concurrent clients')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per interface and concurrency level')
+        parser.add_argument('--scale', type=int, default=2, help='Dataset multiplier, as in benchmark_views')
+        parser.add_argument('--path', action='append', dest='paths', help='Request this path instead of the defaults (repeatable)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the JSON report here')
+        # Internal: run one interface against an already prepared database
+        parser.add_argument('--worker', choices=list(INTERFACES), help=argparse.SUPPRESS)
+        parser.add_argument('--database', help=argparse.SUPPRESS)
+        parser.add_argument('--cookie', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        if options['worker']:
+            return self.run_worker(options, levels)
+
+        interfaces = options['interfaces'].split(',')
+        unknown = [name for name in interfaces if name not in INTERFACES]
+        if unknown:
+            raise CommandError(f'Unknown interface(s): {", ".join(unknown)}')
+
+        test_settings = settings.DATABASES['default'].setdefault('TEST', {})
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # Worker processes cannot see an in-memory database, so use a
+            # file (removed again on teardown)
+            scratch = os.path.join(tempfile.gettempdir(), f'skillswap_load_{os.getpid()}.sqlite3')
+            test_settings['NAME'] = connection.settings_dict['TEST']['NAME'] = scratch
+
+        setup_test_environment(debug=False)
+        databases = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            call_command('flush', interactive=False, verbosity=0)
+            dataset = generate_dataset(
+                seed=options['seed'], **{name: size * options['scale'] for name, size in BASE_SIZES.items()}
+            )
+            self.stderr.write(f'Dataset: {dataset["counts"]}')
+            client = Client()
+            client.force_login(dataset['user'])
+            cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+            paths = options['paths'] or [
+                f'{reverse(name)}?{query}' if query else reverse(name) for name, query in DEFAULT_PATHS
+            ]
+            results = []
+            for interface in interfaces:
+                self.stderr.write(f'Running {interface} at {options["concurrency"]} concurrent clients')
+                results += self.spawn_worker(interface, options, paths, cookie)
+        finally:
+            teardown_databases(databases, verbosity=0)
+            teardown_test_environment()
+
+        report = {'dataset': dataset['counts'], 'paths': paths, 'results': results}
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        self.write_table(results)
+
+        errors = sum(result['errors'] for result in results)
+        if errors:
+            raise CommandError(f'{errors} request(s) did not return 200')
+
+    def spawn_worker(self, interface, options, paths, cookie):
+        """Run one interface in a fresh process whose URLconf routes the matching views"""
+        _, async_views = INTERFACES[interface]
+        command = [
+            sys.executable, '-m', 'django', 'load_test', '--skip-checks',
+            '--worker', interface,
+            '--database', connection.settings_dict['NAME'],
+            '--cookie', cookie,
+            '--concurrency', options['concurrency'],
+            '--requests', str(options['requests']),
+        ]
+        for path in paths:
+            command += ['--path', path]
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            'ASYNC_VIEWS': str(async_views),
+            'DEBUG': 'False',
+            'ALLOWED_HOSTS': 'localhost',
+        }
+        finished = subprocess.run(command, env=env, cwd=settings.BASE_DIR, stdout=subprocess.PIPE, text=True)
+        if finished.returncode:
+            raise CommandError(f'The {interface} worker failed')
+        return json.loads(finished.stdout)
+
+    def run_worker(self, options, levels):
+        # Point this process at the database the parent prepared
+        settings.DATABASES['default']['NAME'] = options['database']
+        connection.close()
+        connection.settings_dict['NAME'] = options['database']
+        results = run_load_test(options['worker'], options['paths'], options['cookie'], levels, options['requests'])
+        self.stdout.write(json.dumps(results))
+
+    def write_table(self, results):
+        columns = (
+            ('interface', 'interface'), ('clients', 'concurrency'), ('req/s', 'requests_per_second'),
+            ('p50 ms', 'p50_ms'), ('p95 ms', 'p95_ms'), ('p99 ms', 'p99_ms'), ('max ms', 'max_ms'), ('errors', 'errors'),
+        )
+        self.stdout.write(''.join(f'{title:>10}' for title, _ in columns))
+        for result in results:
+            self.stdout.write(''.join(f'{result[key]:>10}' for _, key in columns))
@@ -0,0 +1,158 @@
+import contextvars
+import threading
+import time
+from collections import Counter, defaultdict
+
+# Recorder for the request being handled in the current thread or task
+current_recorder = contextvars.ContextVar('monitoring_recorder', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries than its declared budget"""
+
+
+class RequestRecorder:
+    """Collects SQL and template timings for a single request"""
+
+    def __init__(self):
+        self.queries = []
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self._template_depth = 0
+        # Async views can run queries for one request on several threads
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper (see connection.execute_wrapper)"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.db_time += time.perf_counter() - started
+                self.queries.append(sql)
+
+    def start_template(self):
+        self._template_depth += 1
+        return time.perf_counter()
+
+    def end_template(self, started):
+        self._template_depth -= 1
+        # Included templates render inside their parent, only count the outermost
+        if self._template_depth == 0:
+            self.template_time += time.perf_counter() - started
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    def duplicates(self):
+        """SQL statements run more than once, with how often; repeated SQL is the N+1 signature"""
+        return {sql: count for sql, count in Counter(self.queries).items() if count > 1}
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for count in self.duplicates().values())
+
+
+class MetricsRegistry:
+    """Process-wide counters per view, exported in the Prometheus text format"""
+
+    COUNTERS = (
+        ('requests_total', 'Sampled requests'),
+        ('db_queries_total', 'SQL queries run'),
+        ('db_duplicate_queries_total', 'SQL queries that repeated an earlier statement in the same request'),
+        ('db_seconds_total', 'Time spent in the database'),
+        ('template_seconds_total', 'Time spent rendering templates'),
+        ('view_seconds_total', 'Total request handling time'),
+        ('query_budget_exceeded_total', 'Requests that ran more queries than their budget'),
+        ('cache_hits_total', 'Page and fragment cache hits'),
+        ('cache_misses_total', 'Page and fragment cache misses'),
+    )
+
+    # Label of each counter's series when it is not the view
+    LABELS = {
+        'cache_hits_total': 'cache',
+        'cache_misses_total': 'cache',
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = defaultdict(lambda: defaultdict(float))
+
+    def observe(self, view, **values):
+        with self._lock:
+            for name, value in values.items():
+                self._values[name][view] += value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def export(self):
+        lines = []
+        with self._lock:
+            for name, help_text in self.COUNTERS:
+                metric = f'skillswap_{name}'
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} counter')
+                label_name = self.LABELS.get(name, 'view')
+                for view, value in sorted(self._values.get(name, {}).items()):
+                    label = view.replace('\\', '\\\\').replace('"', '\\"')
+                    lines.append(f'{metric}{{{label_name}="{label}"}} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def query_budget(max_queries):
+    """
+    Declare the most queries a view may run. Over-budget requests are logged
+    and counted, and raise QueryBudgetExceeded when MONITORING's
+    ENFORCE_QUERY_BUDGETS is on (as it should be in tests).
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper that reports to the recorder of the request running the query"""
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    """
+    connection_created receiver adding record_query to each connection.
+    Async views run their queries in sync_to_async threads, which inherit
+    the request's context but not a wrapper entered on the request thread.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def instrument_templates():
+    """Wrap Django template rendering so the active recorder sees its duration"""
+    from django.template.base import Template
+
+    if getattr(Template.render, 'monitoring_instrumented', False):
+        return
+    original_render = Template.render
+
+    def render(self, context):
+        recorder = current_recorder.get()
+        if recorder is None:
+            return original_render(self, context)
+        started = recorder.start_template()
+        try:
+            return original_render(self, context)
+        finally:
+            recorder.end_template(started)
+
+    render.monitoring_instrumented = True
+    Template.render = render
@@ -0,0 +1,142 @@
+import json
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from .metrics import QueryBudgetExceeded, RequestRecorder, current_recorder, install_query_recorder, registry
+
+logger = logging.getLogger('monitoring.requests')
+
+
+def get_monitoring_settings():
+    return {
+        'ENABLED': False,
+        'SAMPLE_RATE': 1.0,
+        'SERVER_TIMING': True,
+        'LOG_REQUESTS': True,
+        'ENFORCE_QUERY_BUDGETS': False,
+        'METRICS_TOKEN': '',
+        **getattr(settings, 'MONITORING', {}),
+    }
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, duplicate queries, database, template and total
+    time for a sample of requests. Results go out as a Server-Timing header,
+    a structured log line on the ``monitoring.requests`` logger and the
+    counters served by monitoring.views.metrics.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.options = get_monitoring_settings()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # A sync process_view would cost the async handler a thread hop per request
+            self.process_view = self.aprocess_view
+
+    def _sampled(self):
+        return self.options['ENFORCE_QUERY_BUDGETS'] or random.random() < self.options['SAMPLE_RATE']
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        recorder = RequestRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.record(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        recorder = RequestRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.record(request, response, recorder, time.perf_counter() - started)
+
+    def record(self, request, response, recorder, total):
+        """Export one sampled request's measurements; raises QueryBudgetExceeded when enforcing budgets"""
+        enforce = self.options['ENFORCE_QUERY_BUDGETS']
+        view = getattr(request, 'monitoring_view', None) or 'unresolved'
+        budget = getattr(request, 'monitoring_query_budget', None)
+        over_budget = budget is not None and recorder.query_count > budget
+
+        registry.observe(
+            view,
+            requests_total=1,
+            db_queries_total=recorder.query_count,
+            db_duplicate_queries_total=recorder.duplicate_count,
+            db_seconds_total=recorder.db_time,
+            template_seconds_total=recorder.template_time,
+            view_seconds_total=total,
+            query_budget_exceeded_total=int(over_budget),
+        )
+
+        if self.options['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={recorder.db_time * 1000:.1f};desc="{recorder.query_count} queries"',
+                f'dup;desc="{recorder.duplicate_count} duplicate queries"',
+                f'tpl;dur={recorder.template_time * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+
+        if self.options['LOG_REQUESTS']:
+            logger.info(json.dumps({
+                'view': view,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': recorder.query_count,
+                'duplicate_queries': recorder.duplicate_count,
+                'db_ms': round(recorder.db_time * 1000, 2),
+                'template_ms': round(recorder.template_time * 1000, 2),
+                'total_ms': round(total * 1000, 2),
+            }, separators=(',', ':')))
+
+        if over_budget:
+            message = (
+                f'{view} ran {recorder.query_count} queries, budget is {budget}. '
+                f'Repeated: {sorted(recorder.duplicates().values(), reverse=True)[:5]}'
+            )
+            if enforce:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self._label(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self._label(request, view_func)
+
+    def _label(self, request, view_func):
+        match = request.resolver_match
+        request.monitoring_view = match.view_name if match else view_func.__name__
+        request.monitoring_query_budget = getattr(view_func, 'query_budget', None)
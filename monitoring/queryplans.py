@@ -0,0 +1,108 @@
+"""
+Query plan checks for the hot queries.
+
+Each canonical query mirrors a filter made by a view, the notifications
+context processor or the dashboard. Its plan is read with EXPLAIN and any
+step that reads a whole table is reported. On PostgreSQL sequential scans
+are disabled for the check, so a Seq Scan means no index can serve the query
+rather than that the planner preferred one on a small table.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# Plan lines that read every row of a table; captures the table name
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT\b)(\w+)\b(?! USING (?:COVERING )?INDEX)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+def canonical_queries(user_id=1, skill_id=1, category_id=1, request_id=1):
+    """(name, queryset) pairs for the queries that run on every hot path"""
+    from notifications.cache import RECENT_LIMIT
+    from notifications.models import Notification
+    from requests.models import RequestMessage, SkillRequest
+    from reviews.models import Review
+    from skills.counters import get_view_counter
+    from skills.models import Category, Skill
+    from skills.views import SKILL_SORTS
+    from users.models import SwapMatch, User, UserSkill
+
+    now = timezone.now()
+    active_skills = Skill.objects.filter(is_active=True).select_related('user', 'category')
+    either_side = Q(sender_id=user_id) | Q(receiver_id=user_id)
+    return [
+        ('notifications.unread_count', Notification.objects.filter(user_id=user_id, is_read=False)),
+        ('notifications.recent', Notification.objects.filter(user_id=user_id)[:RECENT_LIMIT]),
+        ('notifications.list_page', Notification.objects.filter(user_id=user_id).order_by('-created_at', 'id')[:21]),
+        ('notifications.group_unread', Notification.objects.filter(user_id=user_id, group_key='message:1', is_read=False)),
+        ('notifications.expired_batch', Notification.objects.filter(
+            pk__gt=request_id, is_read=True, created_at__lt=now
+        ).order_by('pk')[:500]),
+        ('dashboard.pending_sent', SkillRequest.objects.filter(sender_id=user_id, status='pending')[:5]),
+        ('dashboard.pending_received', SkillRequest.objects.filter(receiver_id=user_id, status='pending')[:5]),
+        ('dashboard.active_requests', SkillRequest.objects.filter(either_side, status='accepted')[:5]),
+        ('dashboard.request_stats', SkillRequest.objects.filter(either_side)),
+        ('dashboard.recent_reviews', Review.objects.filter(reviewed_user_id=user_id)[:5]),
+        ('dashboard.wanted_skills', UserSkill.objects.filter(user_id=user_id, skill_type='want')),
+        ('dashboard.categories', Category.objects.order_by('-active_skill_count')[:8]),
+        ('dashboard.swap_matches', SwapMatch.objects.filter(user_id=user_id).select_related('teaches', 'learns_from')[:5]),
+        ('skills.list_newest', active_skills.order_by(*SKILL_SORTS['-created_at'])[:13]),
+        ('skills.list_category', active_skills.filter(category_id=category_id).order_by(*SKILL_SORTS['-created_at'])[:13]),
+        ('skills.list_popular', get_view_counter().annotate_live_views(active_skills).order_by(*SKILL_SORTS['popular'])[:13]),
+        ('skills.list_rating', active_skills.order_by(*SKILL_SORTS['rating'])[:13]),
+        ('skills.list_next_page', active_skills.filter(
+            Q(created_at__lte=now) & (Q(created_at__lt=now) | Q(created_at=now, id__gt=skill_id))
+        ).order_by(*SKILL_SORTS['-created_at'])[:13]),
+        ('skills.category_detail', Skill.objects.filter(
+            category_id=category_id, is_active=True
+        ).select_related('user').order_by(*SKILL_SORTS['-created_at'])[:13]),
+        ('skills.related', Skill.objects.filter(category_id=category_id, is_active=True).exclude(pk=skill_id)[:4]),
+        ('requests.open_duplicate', SkillRequest.objects.filter(
+            sender_id=user_id, skill_id=skill_id, status__in=SkillRequest.OPEN_STATUSES
+        )),
+        ('requests.sent_by_status', SkillRequest.objects.filter(sender_id=user_id, status='completed')),
+        ('requests.thread_window', RequestMessage.objects.filter(request_id=request_id).select_related('sender').order_by('-id')[:31]),
+        ('requests.thread_poll', RequestMessage.objects.filter(request_id=request_id, id__gt=skill_id).order_by('id')[:101]),
+        ('reviews.user_reviews', Review.objects.filter(reviewed_user_id=user_id).select_related('reviewer', 'skill')),
+        ('reviews.skill_reviews', Review.objects.filter(skill_id=skill_id).select_related('reviewer', 'reviewed_user')),
+        ('users.incomplete_profiles', User.objects.filter(profile_completion__lt=100).order_by('profile_completion')[:50]),
+        ('users.swap_neighbours', UserSkill.objects.filter(skill_type='want', normalized_name__in=['python'])),
+    ]
+
+
+def explain(queryset, using=connection):
+    """The query plan of ``queryset`` on the ``using`` connection, as text"""
+    queryset = queryset.using(using.alias)
+    if using.vendor == 'postgresql':
+        with transaction.atomic(using=using.alias):
+            with using.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+    return queryset.explain()
+
+
+def full_scans(plan, vendor):
+    """Tables the plan reads in full"""
+    return FULL_SCAN_PATTERNS[vendor].findall(plan)
+
+
+def check_query_plans(queries=None, using=connection):
+    """
+    EXPLAIN every canonical query. Returns a list of dicts with the query
+    name, its plan and the tables it scans in full (empty when it is indexed).
+    """
+    if using.vendor not in FULL_SCAN_PATTERNS:
+        raise NotImplementedError(f'Query plan checks are not supported on {using.vendor}')
+    results = []
+    for name, queryset in queries if queries is not None else canonical_queries():
+        plan = explain(queryset, using=using)
+        results.append({
+            'name': name,
+            'plan': plan,
+            'full_scans': full_scans(plan, using.vendor),
+        })
+    return results
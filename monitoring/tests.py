@@ -0,0 +1,70 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from skills.models import Skill
+from users.models import User
+from .benchmark import find_regressions
+from .queryplans import explain
+
+
+@override_settings(MONITORING={'METRICS_TOKEN': 'scrape-secret'})
+class MetricsAccessTests(TestCase):
+    def get(self, **headers):
+        # Behind a same-host proxy every request comes from 127.0.0.1
+        return self.client.get(reverse('monitoring:metrics'), REMOTE_ADDR='127.0.0.1', **headers)
+
+    def test_anonymous_local_requests_are_refused(self):
+        self.assertEqual(self.get().status_code, 403)
+
+    def test_wrong_token_is_refused(self):
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer guess').status_code, 403)
+
+    def test_token_grants_access(self):
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer scrape-secret').status_code, 200)
+
+    def test_staff_have_access(self):
+        self.client.force_login(User.objects.create_user('admin', 'admin@example.com', 'password', is_staff=True))
+        self.assertEqual(self.get().status_code, 200)
+
+    @override_settings(MONITORING={})
+    def test_no_token_configured_means_staff_only(self):
+        self.assertEqual(self.get(HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+
+class ExplainTests(TestCase):
+    def test_plan_comes_from_the_checked_connection(self):
+        # The queryset names another alias; the plan must still come from ``using``
+        with CaptureQueriesContext(connection) as queries:
+            plan = explain(Skill.objects.using('replica').filter(is_active=True), using=connection)
+        self.assertTrue(plan)
+        self.assertIn('EXPLAIN', queries[-1]['sql'])
+
+
+class FindRegressionsTests(TestCase):
+    def result(self, queries, status=200, error=None):
+        return {'status': status, 'error': error, 'queries': queries}
+
+    def report(self, small, large):
+        return {'runs': [{'scale': 1, 'views': small}, {'scale': 4, 'views': large}]}
+
+    def test_failing_views_are_reported_and_still_compared(self):
+        error = 'OperationalError: too many SQL variables'
+        report = self.report(
+            {'reviews:user_reviews': self.result(129, status=500, error=error)},
+            {'reviews:user_reviews': self.result(150, status=500, error=error)},
+        )
+        self.assertEqual(
+            [(problem['kind'], problem['detail']) for problem in find_regressions(report)],
+            [
+                ('error', f'status 500 at scale 1: {error}'),
+                ('error', f'status 500 at scale 4: {error}'),
+                ('scales_with_data', '129 queries at scale 1, 150 at scale 4'),
+            ],
+        )
+
+    def test_baseline_regressions(self):
+        baseline = self.report({'home': self.result(3)}, {'home': self.result(3)})
+        report = self.report({'home': self.result(3)}, {'home': self.result(4), 'skipped': {'skipped': 'no sample arguments'}})
+        problems = find_regressions(report, baseline)
+        self.assertEqual([problem['kind'] for problem in problems], ['scales_with_data', 'baseline_regression'])
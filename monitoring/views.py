@@ -0,0 +1,14 @@
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from .metrics import registry
+from .middleware import get_monitoring_settings
+
+
+def metrics(request):
+    """Prometheus-style counters; open to staff and to scrapers sending METRICS_TOKEN as a bearer token"""
+    token = get_monitoring_settings()['METRICS_TOKEN']
+    scheme, _, credentials = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    scraper = bool(token) and scheme.lower() == 'bearer' and constant_time_compare(credentials, token)
+    if not (scraper or request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.export(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,11 +1,14 @@
 from django.contrib import admin
-from .models import Notification
+from .cache import invalidate_notifications
+from .dispatch import mark_unread
+from .models import ArchivedNotification, Notification
+from .stream import publish_unread_changed
 
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     """Notification admin"""
-    list_display = ['user', 'title', 'notification_type', 'is_read', 'created_at']
+    list_display = ['user', 'title', 'notification_type', 'count', 'is_read', 'created_at']
     list_filter = ['notification_type', 'is_read', 'created_at']
     search_fields = ['user__username', 'title', 'message']
     date_hierarchy = 'created_at'
@@ -13,10 +16,32 @@ class NotificationAdmin(admin.ModelAdmin):
     
     actions = ['mark_as_read', 'mark_as_unread']
     
+    def _refresh_users(self, user_ids):
+        """Bulk updates skip signals, so refresh caches and streams by hand"""
+        invalidate_notifications(*user_ids)
+        publish_unread_changed(*user_ids)
+    
     def mark_as_read(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
         queryset.update(is_read=True)
+        self._refresh_users(user_ids)
     mark_as_read.short_description = "Mark selected as read"
     
     def mark_as_unread(self, request, queryset):
-        queryset.update(is_read=False)
+        # Grouped notifications are merged into their group's unread row
+        self._refresh_users(mark_unread(queryset))
     mark_as_unread.short_description = "Mark selected as unread"
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    """Archived notification admin; rows are written by purge_notifications only"""
+    list_display = ['user', 'title', 'notification_type', 'count', 'created_at', 'archived_at']
+    list_filter = ['notification_type']
+    search_fields = ['user__username', 'title']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
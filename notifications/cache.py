@@ -0,0 +1,111 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+RECENT_LIMIT = 5
+
+
+def _timeout():
+    return getattr(settings, 'NOTIFICATIONS_CACHE_TIMEOUT', 300)
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _recent_key(user_id):
+    return f'notifications:recent:{user_id}'
+
+
+def _version_key(user_id):
+    return f'notifications:version:{user_id}'
+
+
+def get_notifications_version(user_id):
+    """
+    Opaque value that changes whenever a user's notifications change. If the
+    key is evicted a fresh timestamp is used, so it never repeats an old value.
+    """
+    return cache.get_or_set(_version_key(user_id), time.time_ns(), None)
+
+
+async def aget_notifications_version(user_id):
+    return await cache.aget_or_set(_version_key(user_id), time.time_ns(), None)
+
+
+def _bump_version(user_id):
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def get_cached_unread_count(user_id):
+    """Cached number of unread notifications for a user"""
+    from .models import Notification
+
+    count = cache.get(_unread_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(_unread_key(user_id), count, _timeout())
+    return count
+
+
+def get_cached_recent_notifications(user_id):
+    """Cached list of a user's most recent notifications"""
+    from .models import Notification
+
+    recent = cache.get(_recent_key(user_id))
+    if recent is None:
+        recent = list(Notification.objects.filter(user_id=user_id)[:RECENT_LIMIT])
+        cache.set(_recent_key(user_id), recent, _timeout())
+    return recent
+
+
+async def aget_cached_unread_count(user_id):
+    from .models import Notification
+
+    count = await cache.aget(_unread_key(user_id))
+    if count is None:
+        count = await Notification.objects.filter(user_id=user_id, is_read=False).acount()
+        await cache.aset(_unread_key(user_id), count, _timeout())
+    return count
+
+
+async def aget_cached_recent_notifications(user_id):
+    from .models import Notification
+
+    recent = await cache.aget(_recent_key(user_id))
+    if recent is None:
+        recent = [notification async for notification in Notification.objects.filter(user_id=user_id)[:RECENT_LIMIT]]
+        await cache.aset(_recent_key(user_id), recent, _timeout())
+    return recent
+
+
+def notification_created(notification):
+    """Account for a new notification without recounting"""
+    if not notification.is_read:
+        try:
+            cache.incr(_unread_key(notification.user_id))
+        except ValueError:
+            # Not cached yet; the next read will count from the database
+            pass
+    cache.delete(_recent_key(notification.user_id))
+    _bump_version(notification.user_id)
+
+
+def notification_merged(user_id):
+    """An unread notification absorbed new ones: the unread count stands, the recent list does not"""
+    cache.delete(_recent_key(user_id))
+    _bump_version(user_id)
+
+
+def invalidate_notifications(*user_ids):
+    """Drop cached counts and recent lists after reads, edits or deletes"""
+    keys = []
+    for user_id in user_ids:
+        keys += [_unread_key(user_id), _recent_key(user_id)]
+    cache.delete_many(keys)
+    for user_id in user_ids:
+        _bump_version(user_id)
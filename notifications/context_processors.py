@@ -1,16 +1,21 @@
-from .models import Notification
+from django.utils.functional import SimpleLazyObject
+from .cache import get_cached_recent_notifications, get_cached_unread_count
 
 
 def notifications_processor(request):
-    """Add unread notification count to all templates"""
-    if request.user.is_authenticated:
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
-        recent_notifications = Notification.objects.filter(user=request.user)[:5]
-        return {
-            'unread_notifications_count': unread_count,
-            'recent_notifications': recent_notifications,
-        }
+    """
+    Add unread notification count and recent notifications to all templates.
+    Both values are lazy, so pages that never show the bell run no queries.
+    """
+    user = request.user
+
+    def unread_count():
+        return get_cached_unread_count(user.pk) if user.is_authenticated else 0
+
+    def recent_notifications():
+        return get_cached_recent_notifications(user.pk) if user.is_authenticated else []
+
     return {
-        'unread_notifications_count': 0,
-        'recent_notifications': [],
+        'unread_notifications_count': SimpleLazyObject(unread_count),
+        'recent_notifications': SimpleLazyObject(recent_notifications),
     }
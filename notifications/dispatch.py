@@ -0,0 +1,294 @@
+"""
+Notification fan-out pipeline.
+
+Signal handlers enqueue lightweight events (a kind plus primary keys) once
+the surrounding transaction commits. A dispatcher hands batches of events
+to ``deliver()``, which resolves the related rows in bulk, writes the
+notifications with a single ``bulk_create`` and then updates the caches and
+pushes to connected streams.
+
+New messages on a request are grouped: while the recipient has not read
+the notification for that request, later messages are merged into it
+(its count goes up) instead of adding a row each.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from skillswap.background import ImmediateWorker, ThreadWorker, get_worker, submit_on_commit
+
+logger = logging.getLogger(__name__)
+
+REQUEST_CREATED = 'request_created'
+REQUEST_STATUS = 'request_status'
+MESSAGE_CREATED = 'message_created'
+REVIEW_CREATED = 'review_created'
+
+# How often save_notifications() merges and inserts before giving up on grouping
+SAVE_ATTEMPTS = 3
+
+# What mark_unread() reads of the rows it merges
+MERGED_FIELDS = ('pk', 'user_id', 'group_key', 'count', 'created_at')
+
+
+def request_created(skill_request):
+    return {'kind': REQUEST_CREATED, 'id': skill_request.pk}
+
+
+def request_status_changed(skill_request):
+    return {'kind': REQUEST_STATUS, 'id': skill_request.pk, 'status': skill_request.status}
+
+
+def message_created(message):
+    return {'kind': MESSAGE_CREATED, 'id': message.pk}
+
+
+def review_created(review):
+    return {'kind': REVIEW_CREATED, 'id': review.pk}
+
+
+def message_group(request_id):
+    """Group key of the new-message notifications for a request"""
+    return f'message:{request_id}'
+
+
+def _ids(events, kind):
+    return {event['id'] for event in events if event['kind'] == kind}
+
+
+def build_notifications(events):
+    """Turn events into unsaved Notification rows with one query per event kind"""
+    from requests.models import RequestMessage, SkillRequest
+    from reviews.models import Review
+    from .models import Notification
+
+    request_ids = _ids(events, REQUEST_CREATED) | _ids(events, REQUEST_STATUS)
+    skill_requests = SkillRequest.objects.select_related(
+        'sender', 'receiver', 'skill'
+    ).in_bulk(request_ids) if request_ids else {}
+    message_ids = _ids(events, MESSAGE_CREATED)
+    messages = RequestMessage.objects.select_related(
+        'sender', 'request'
+    ).in_bulk(message_ids) if message_ids else {}
+    review_ids = _ids(events, REVIEW_CREATED)
+    reviews = Review.objects.select_related(
+        'reviewer', 'reviewed_user'
+    ).in_bulk(review_ids) if review_ids else {}
+
+    notifications = []
+    for event in events:
+        kind = event['kind']
+        if kind == REQUEST_CREATED and event['id'] in skill_requests:
+            skill_request = skill_requests[event['id']]
+            notifications.append(Notification(
+                user_id=skill_request.receiver_id,
+                notification_type='request_received',
+                title='New Skill Request',
+                message=f'{skill_request.sender.username} wants to learn {skill_request.skill.title}',
+                link=f'/requests/{skill_request.pk}/'
+            ))
+        elif kind == REQUEST_STATUS and event['id'] in skill_requests:
+            skill_request = skill_requests[event['id']]
+            verb = event['status']
+            notifications.append(Notification(
+                user_id=skill_request.sender_id,
+                notification_type=f'request_{verb}',
+                title=f'Request {verb.title()}',
+                message=f'{skill_request.receiver.username} {verb} your request for {skill_request.skill.title}',
+                link=f'/requests/{skill_request.pk}/'
+            ))
+        elif kind == MESSAGE_CREATED and event['id'] in messages:
+            message = messages[event['id']]
+            skill_request = message.request
+            recipient_id = (
+                skill_request.receiver_id if message.sender_id == skill_request.sender_id
+                else skill_request.sender_id
+            )
+            notifications.append(Notification(
+                user_id=recipient_id,
+                notification_type='new_message',
+                title='New Message',
+                message=f'{message.sender.username} sent you a message',
+                link=f'/requests/{skill_request.pk}/',
+                group_key=message_group(skill_request.pk),
+            ))
+        elif kind == REVIEW_CREATED and event['id'] in reviews:
+            review = reviews[event['id']]
+            notifications.append(Notification(
+                user_id=review.reviewed_user_id,
+                notification_type='new_review',
+                title='New Review Received',
+                message=f'{review.reviewer.username} left you a {review.rating}-star review',
+                link=f'/users/profile/{review.reviewed_user.username}/'
+            ))
+    return notifications
+
+
+def fold_grouped(notifications):
+    """
+    Fold grouped notifications into one per user and group; the latest of
+    a group speaks for the earlier ones and carries their count.
+    """
+    folded = []
+    groups = {}
+    for notification in notifications:
+        if not notification.group_key:
+            folded.append(notification)
+            continue
+        key = (notification.user_id, notification.group_key)
+        if key in groups:
+            notification.count += groups[key].count
+        groups[key] = notification
+    return folded + list(groups.values())
+
+
+def merge_grouped(notifications):
+    """
+    Merge folded grouped notifications into the user's unread row for the
+    group where there is one. Returns the notifications left to insert and
+    the ids of users whose rows grew.
+    """
+    from .models import Notification
+
+    remaining = []
+    merged_users = set()
+    for notification in notifications:
+        if not notification.group_key:
+            remaining.append(notification)
+            continue
+        merged = Notification.objects.filter(
+            user_id=notification.user_id, group_key=notification.group_key, is_read=False
+        ).update(
+            count=F('count') + notification.count,
+            title=notification.title,
+            message=notification.message,
+            created_at=timezone.now(),
+        )
+        if merged:
+            merged_users.add(notification.user_id)
+        else:
+            remaining.append(notification)
+    return remaining, merged_users
+
+
+def mark_unread(notifications):
+    """
+    Mark the read rows of ``notifications`` unread. A grouped row is merged
+    with its group's unread row, or with the other rows of its group being
+    marked, into the newest of them, so each group keeps one unread row.
+    Returns the ids of the users whose notifications changed.
+    """
+    from .models import Notification
+
+    with transaction.atomic():
+        rows = list(notifications.filter(is_read=True).values_list(*MERGED_FIELDS))
+        Notification.objects.filter(pk__in=[row[0] for row in rows if not row[2]]).update(is_read=False)
+        groups = defaultdict(list)
+        for row in rows:
+            if row[2]:
+                groups[row[1], row[2]].append(row)
+        for (user_id, group_key), group in groups.items():
+            group += Notification.objects.select_for_update().filter(
+                user_id=user_id, group_key=group_key, is_read=False
+            ).values_list(*MERGED_FIELDS)
+            newest = max(group, key=lambda row: (row[4], row[0]))
+            # The others go first, so the partial unique index never sees two unread rows
+            Notification.objects.filter(pk__in=[row[0] for row in group if row is not newest]).delete()
+            Notification.objects.filter(pk=newest[0]).update(
+                is_read=False, count=sum(row[3] for row in group)
+            )
+    return {row[1] for row in rows}
+
+
+def save_notifications(notifications):
+    """
+    Write notifications in one INSERT after merging grouped ones, merge and
+    insert in one transaction. A conflict with a group row another worker
+    just created is retried; if it keeps conflicting the notifications are
+    saved ungrouped, one row at a time, rather than lost.
+    bulk_create skips post_save, so the cache and stream updates the signal
+    would have made are done here.
+    """
+    from .cache import notification_created, notification_merged
+    from .models import Notification
+    from .stream import publish_notification, publish_unread_changed
+
+    notifications = fold_grouped(notifications)
+    for _ in range(SAVE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                remaining, merged_users = merge_grouped(notifications)
+                created = Notification.objects.bulk_create(remaining)
+            break
+        except IntegrityError:
+            # Another worker created an unread row for one of the groups
+            # since the merge; the next attempt merges into it
+            continue
+    else:
+        logger.warning('Notification groups kept conflicting; saving %d notifications ungrouped', len(notifications))
+        created, merged_users = [], set()
+        for notification in notifications:
+            notification.group_key = ''
+            try:
+                with transaction.atomic():
+                    created += Notification.objects.bulk_create([notification])
+            except IntegrityError:
+                logger.exception('Could not save notification for user %s', notification.user_id)
+    for notification in created:
+        notification_created(notification)
+    for user_id in merged_users:
+        notification_merged(user_id)
+    transaction.on_commit(lambda: [publish_notification(notification) for notification in created])
+    if merged_users:
+        transaction.on_commit(lambda: publish_unread_changed(*merged_users))
+    return created
+
+
+def deliver(events):
+    """Build and save the notifications for a batch of events"""
+    return save_notifications(build_notifications(events))
+
+
+def _deliver_groups(groups):
+    deliver([event for events in groups for event in events])
+
+
+class ImmediateDispatcher(ImmediateWorker):
+    """Delivers on commit in the calling thread"""
+
+    def handle(self, groups):
+        _deliver_groups(groups)
+
+
+class ThreadDispatcher(ThreadWorker):
+    """
+    Delivers from a background thread. Events submitted together (a bulk
+    action) count towards ``batch_size`` one by one, so a burst of saves
+    turns into a single bulk insert.
+    """
+
+    thread_name = 'notification-dispatch'
+
+    def __init__(self, batch_size=100, batch_wait=0.05):
+        super().__init__(batch_size=batch_size, batch_wait=batch_wait)
+
+    def item_size(self, events):
+        return len(events)
+
+    def handle(self, groups):
+        _deliver_groups(groups)
+
+
+DEFAULT_DISPATCHER = 'notifications.dispatch.ThreadDispatcher'
+
+
+def get_dispatcher():
+    """Return the dispatcher configured by NOTIFICATIONS_DISPATCHER"""
+    return get_worker('NOTIFICATIONS_DISPATCHER', DEFAULT_DISPATCHER)
+
+
+def enqueue(*events):
+    """Queue notification events for delivery once the current transaction commits"""
+    submit_on_commit('NOTIFICATIONS_DISPATCHER', DEFAULT_DISPATCHER, events)
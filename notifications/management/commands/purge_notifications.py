@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from notifications.retention import ARCHIVES, expired_notifications, get_archive, get_retention_settings, purge_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        'Move read notifications older than the retention age to the archive, '
+        'deleting them in small batches'
+    )
+
+    def add_arguments(self, parser):
+        options = get_retention_settings()
+        parser.add_argument('--days', type=int, default=options['DAYS'], help='Keep read notifications this many days')
+        parser.add_argument('--batch-size', type=int, default=options['BATCH_SIZE'], help='Rows moved per transaction')
+        parser.add_argument('--pause', type=float, default=options['PAUSE'], help='Seconds to sleep between batches')
+        parser.add_argument('--archive', choices=list(ARCHIVES), default=options['ARCHIVE'])
+        parser.add_argument('--path', default=options['ARCHIVE_PATH'], help='File for the jsonl archive')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the notifications that would be moved')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = expired_notifications(options['days']).count()
+            self.stdout.write(f'{count} read notifications are older than {options["days"]} days.')
+            return
+
+        def progress(moved):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{moved} moved')
+
+        moved = purge_notifications(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            archive=get_archive(options['archive'], options['path']),
+            pause=options['pause'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {moved} read notifications older than {options["days"]} days to the {options["archive"]} archive.'
+        ))
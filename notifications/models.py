@@ -23,12 +23,31 @@ class Notification(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
     link = models.CharField(max_length=500, blank=True)
+    # Unread notifications with the same group key (such as new messages on
+    # one request) are merged into one row; count says how many it stands for
+    # and created_at is the time of the latest
+    group_key = models.CharField(max_length=64, blank=True, editable=False)
+    count = models.PositiveIntegerField(default=1, editable=False)
     
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread badge count and mark-all-as-read
+            models.Index(fields=['user', 'is_read'], name='notif_user_is_read_idx'),
+            # Recent notifications dropdown and notification list
+            models.Index(fields=['user', '-created_at'], name='notif_user_created_idx'),
+        ]
+        constraints = [
+            # At most one unread row per group, found by notifications.dispatch when merging
+            models.UniqueConstraint(
+                fields=['user', 'group_key'],
+                condition=models.Q(is_read=False) & ~models.Q(group_key=''),
+                name='notif_unread_group_uniq',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -38,3 +57,30 @@ class Notification(models.Model):
         if not self.is_read:
             self.is_read = True
             self.save(update_fields=['is_read'])
+
+
+class ArchivedNotification(models.Model):
+    """
+    Read notifications moved out of Notification by purge_notifications,
+    keeping their original id. Only the primary key and user are indexed.
+    """
+    
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications'
+    )
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    link = models.CharField(max_length=500, blank=True)
+    count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.title}"
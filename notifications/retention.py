@@ -0,0 +1,153 @@
+"""
+Retention of read notifications.
+
+purge_notifications() walks the notifications table in primary-key order
+and moves read notifications older than the retention age to an archive,
+BATCH_SIZE rows per transaction, so writers wait on at most one short
+batch. Unread notifications are kept however old they are.
+
+Each batch is written to the archive before its rows are deleted. A batch
+interrupted in between is archived again on the next run: the table
+archive skips ids it already has, readers of the JSONL archive should
+dedupe on ``id``.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_notifications
+from .models import ArchivedNotification, Notification
+
+ARCHIVED_FIELDS = ('id', 'user_id', 'notification_type', 'title', 'message', 'link', 'count', 'created_at')
+
+
+def get_retention_settings():
+    return {
+        'DAYS': 90,
+        'BATCH_SIZE': 500,
+        'PAUSE': 0.0,
+        'ARCHIVE': 'table',
+        'ARCHIVE_PATH': 'notifications.jsonl.gz',
+        **getattr(settings, 'NOTIFICATIONS_RETENTION', {}),
+    }
+
+
+class TableArchive:
+    """ArchivedNotification rows, inserted in the batch's transaction"""
+
+    def write(self, rows):
+        ArchivedNotification.objects.bulk_create(
+            [ArchivedNotification(**dict(zip(ARCHIVED_FIELDS, row))) for row in rows],
+            ignore_conflicts=True,
+        )
+
+    def close(self):
+        pass
+
+
+class JSONLArchive:
+    """One JSON object per line, appended to ``path``; gzip-compressed when it ends in .gz"""
+
+    def __init__(self, path):
+        path = str(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        opener = gzip.open if path.endswith('.gz') else open
+        self.file = opener(path, 'at', encoding='utf-8')
+
+    def write(self, rows):
+        for row in rows:
+            record = dict(zip(ARCHIVED_FIELDS, row))
+            self.file.write(json.dumps(record, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n')
+        # On disk before the batch is deleted
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+class NoArchive:
+    """Delete without keeping a copy"""
+
+    def write(self, rows):
+        pass
+
+    def close(self):
+        pass
+
+
+ARCHIVES = {
+    'table': TableArchive,
+    'jsonl': JSONLArchive,
+    'none': NoArchive,
+}
+
+
+def get_archive(name=None, path=None):
+    """The archive named by ``name`` or NOTIFICATIONS_RETENTION['ARCHIVE']"""
+    options = get_retention_settings()
+    name = name or options['ARCHIVE']
+    if name == 'jsonl':
+        return JSONLArchive(path or options['ARCHIVE_PATH'])
+    return ARCHIVES[name]()
+
+
+def expired_notifications(days):
+    """Read notifications created more than ``days`` days ago"""
+    return Notification.objects.filter(is_read=True, created_at__lt=timezone.now() - timedelta(days=days))
+
+
+def _delete(ids):
+    # One DELETE for the batch; Model.delete() would load the rows again to
+    # send post_delete for each, caches are refreshed once per batch instead
+    table = connection.ops.quote_name(Notification._meta.db_table)
+    column = connection.ops.quote_name(Notification._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({", ".join(["%s"] * len(ids))})', ids)
+
+
+def purge_notifications(days=None, batch_size=None, archive=None, pause=None, progress=None):
+    """
+    Move read notifications older than ``days`` to ``archive`` in batches of
+    ``batch_size``, sleeping ``pause`` seconds between batches; missing
+    arguments come from NOTIFICATIONS_RETENTION. ``progress(moved)`` is
+    called after each batch. Returns the number of notifications moved.
+    """
+    options = get_retention_settings()
+    days = options['DAYS'] if days is None else days
+    batch_size = batch_size or options['BATCH_SIZE']
+    pause = options['PAUSE'] if pause is None else pause
+    archive = archive or get_archive()
+
+    expired = expired_notifications(days).order_by('pk')
+    moved = 0
+    last_id = 0
+    try:
+        while True:
+            with transaction.atomic():
+                # Walks the primary key from the previous batch, so the whole
+                # run reads the table once
+                rows = list(expired.filter(pk__gt=last_id).values_list(*ARCHIVED_FIELDS)[:batch_size])
+                if not rows:
+                    break
+                archive.write(rows)
+                _delete([row[0] for row in rows])
+            last_id = rows[-1][0]
+            moved += len(rows)
+            invalidate_notifications(*{row[1] for row in rows})
+            if progress is not None:
+                progress(moved)
+            if len(rows) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        archive.close()
+    return moved
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import invalidate_notifications, notification_created
+from .models import Notification
+from .stream import publish_notification, publish_unread_changed
+
+
+@receiver(post_save, sender=Notification)
+def update_notification_cache(sender, instance, created, **kwargs):
+    """Bump the cached unread count for new notifications, invalidate on edits"""
+    if created:
+        notification_created(instance)
+        transaction.on_commit(lambda: publish_notification(instance))
+    else:
+        invalidate_notifications(instance.user_id)
+        transaction.on_commit(lambda: publish_unread_changed(instance.user_id))
+
+
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_cache(sender, instance, **kwargs):
+    """Deleted notifications leave the cached count and list stale"""
+    invalidate_notifications(instance.user_id)
+    transaction.on_commit(lambda: publish_unread_changed(instance.user_id))
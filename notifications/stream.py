@@ -0,0 +1,136 @@
+import asyncio
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+def serialize_notification(notification):
+    """JSON-ready representation shared by the polling and streaming endpoints"""
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'link': notification.link,
+        'is_read': notification.is_read,
+        'count': notification.count,
+        'created_at': notification.created_at.strftime('%Y-%m-%d %H:%M'),
+        'type': notification.notification_type,
+    }
+
+
+class Subscription:
+    """A single connected client; events arrive on an asyncio queue"""
+
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=100)
+
+    def deliver(self, event):
+        """Called from any thread; hands the event to the subscriber's event loop"""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        if self.queue.full():
+            # The client fell behind and would miss events; replace the
+            # backlog with a resync so it re-reads the current count
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'type': 'unread_count'}
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    """Pub/sub interface between code that creates notifications and connected streams"""
+
+    def publish(self, user_id, event):
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        """Must be called from the event loop that will consume the subscription"""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class LocalBroker(BaseBroker):
+    """
+    In-process broker. Enough for a single ASGI process and for tests; a
+    multi-process deployment plugs in a broker backed by a shared bus
+    through NOTIFICATIONS_BROKER.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def subscriber_count(self, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscriptions.get(user_id, ()))
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+_broker = None
+
+
+def get_broker():
+    """Return the broker configured by NOTIFICATIONS_BROKER"""
+    global _broker
+    if _broker is None:
+        path = getattr(settings, 'NOTIFICATIONS_BROKER', 'notifications.stream.LocalBroker')
+        _broker = import_string(path)()
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == 'NOTIFICATIONS_BROKER':
+        _broker = None
+
+
+def publish_notification(notification):
+    """Push a new notification and an unread-count delta to the user's streams"""
+    get_broker().publish(notification.user_id, {
+        'type': 'notification',
+        'notification': serialize_notification(notification),
+        'unread_delta': 0 if notification.is_read else 1,
+    })
+
+
+def publish_unread_changed(*user_ids):
+    """Tell the users' streams to resend their unread count after reads or deletes"""
+    broker = get_broker()
+    for user_id in user_ids:
+        broker.publish(user_id, {'type': 'unread_count'})
@@ -0,0 +1,317 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+from users.models import User
+from .context_processors import notifications_processor
+from . import dispatch
+from .dispatch import ImmediateDispatcher, get_dispatcher, message_group, save_notifications
+from .models import Notification
+from .stream import LocalBroker, get_broker, publish_unread_changed
+
+
+class StandInBroker(LocalBroker):
+    """LocalBroker that also records what was published"""
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, user_id, event):
+        self.published.append((user_id, event))
+        super().publish(user_id, event)
+
+
+def parse_events(chunks):
+    """(event type, data) pairs of the SSE messages in ``chunks``"""
+    events = []
+    for message in b''.join(chunks).decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in message.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+@override_settings(
+    NOTIFICATIONS_BROKER='notifications.tests.StandInBroker',
+    NOTIFICATIONS_STREAM_KEEPALIVE=0.1,
+    NOTIFICATIONS_STREAM_LIFETIME=0.5,
+)
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_broker().published.clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def create_notification(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                user=self.user, notification_type='system', title='Hello', message='Welcome', **kwargs
+            )
+
+    def test_configured_broker_is_used(self):
+        self.assertIsInstance(get_broker(), StandInBroker)
+
+    def test_new_notification_is_published(self):
+        notification = self.create_notification()
+        [(user_id, event)] = get_broker().published
+        self.assertEqual(user_id, self.user.pk)
+        self.assertEqual(event['type'], 'notification')
+        self.assertEqual(event['unread_delta'], 1)
+        self.assertEqual(event['notification']['id'], notification.pk)
+
+    def test_read_publishes_unread_change(self):
+        notification = self.create_notification()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.mark_as_read()
+        self.assertEqual(get_broker().published[-1], (self.user.pk, {'type': 'unread_count'}))
+
+    async def test_events_published_from_other_threads_reach_the_subscriber(self):
+        broker = get_broker()
+        subscription = broker.subscribe(self.user.pk)
+        try:
+            publisher = threading.Thread(target=broker.publish, args=(self.user.pk, {'type': 'unread_count'}))
+            publisher.start()
+            event = await asyncio.wait_for(subscription.get(), timeout=1)
+            publisher.join()
+        finally:
+            subscription.close()
+        self.assertEqual(event, {'type': 'unread_count'})
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_overflowing_subscriber_is_resynced(self):
+        broker = get_broker()
+        subscription = broker.subscribe(self.user.pk)
+        try:
+            for number in range(subscription.queue.maxsize + 1):
+                subscription._put({'type': 'notification', 'unread_delta': 1, 'notification': {'id': number}})
+        finally:
+            subscription.close()
+        self.assertEqual(subscription.queue.qsize(), 1)
+        self.assertEqual(await subscription.get(), {'type': 'unread_count'})
+
+    async def test_stream_pushes_counts_and_notifications(self):
+        response = await self.async_client.get(reverse('notifications:notification_stream'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        # The retry hint, then the current count; the stream is subscribed by now
+        chunks = [await anext(content), await anext(content)]
+        self.assertEqual(get_broker().subscriber_count(self.user.pk), 1)
+        get_broker().publish(self.user.pk, {'type': 'notification', 'unread_delta': 1, 'notification': {}})
+        publish_unread_changed(self.user.pk)
+        chunks += [chunk async for chunk in content]
+        self.assertEqual(
+            [event_type for event_type, _ in parse_events(chunks)],
+            ['unread_count', 'notification', 'unread_count'],
+        )
+        self.assertEqual(get_broker().subscriber_count(), 0)
+
+    def test_wsgi_requests_fall_back_to_polling(self):
+        response = self.client.get(reverse('notifications:notification_stream'))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(get_broker().published, [])
+
+
+class DispatcherSettingsTests(TestCase):
+    @override_settings(NOTIFICATIONS_DISPATCHER={
+        'BACKEND': 'notifications.dispatch.ImmediateDispatcher',
+        'OPTIONS': {'batch_size': 100, 'batch_wait': 0.05},
+    })
+    def test_immediate_dispatcher_ignores_batching_options(self):
+        self.assertIsInstance(get_dispatcher(), ImmediateDispatcher)
+
+
+class MarkAsUnreadActionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.client.force_login(self.admin)
+
+    def create(self, is_read, count=1, group_key=message_group(1)):
+        return Notification.objects.create(
+            user=self.user, notification_type='new_message', title='New Message', message='alice sent you a message',
+            group_key=group_key, count=count, is_read=is_read,
+        )
+
+    def mark_as_unread(self, *notifications):
+        return self.client.post(reverse('admin:notifications_notification_changelist'), {
+            'action': 'mark_as_unread', '_selected_action': [notification.pk for notification in notifications],
+        })
+
+    def test_read_row_merges_into_the_unread_sibling(self):
+        read = self.create(is_read=True, count=2)
+        unread = self.create(is_read=False, count=3)
+        self.assertEqual(self.mark_as_unread(read).status_code, 302)
+        [merged] = Notification.objects.filter(user=self.user)
+        self.assertEqual((merged.pk, merged.is_read, merged.count), (unread.pk, False, 5))
+
+    def test_read_rows_of_one_group_merge_into_the_newest(self):
+        older = self.create(is_read=True, count=1)
+        newer = self.create(is_read=True, count=4)
+        self.mark_as_unread(older, newer)
+        [merged] = Notification.objects.filter(user=self.user)
+        self.assertEqual((merged.pk, merged.is_read, merged.count), (newer.pk, False, 5))
+
+    def test_ungrouped_rows_are_marked_unread(self):
+        first = self.create(is_read=True, group_key='')
+        second = self.create(is_read=True, group_key='')
+        self.mark_as_unread(first, second)
+        self.assertEqual(Notification.objects.filter(user=self.user, is_read=False).count(), 2)
+
+
+class SaveNotificationsTests(TestCase):
+    """Grouped notifications survive conflicts with rows other workers create"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.existing = Notification.objects.create(
+            user=self.user, notification_type='new_message', title='New Message', message='First',
+            group_key=message_group(1), count=2,
+        )
+
+    def message(self, text):
+        return Notification(
+            user=self.user, notification_type='new_message', title='New Message', message=text,
+            group_key=message_group(1),
+        )
+
+    def save(self, merge):
+        with mock.patch.object(dispatch, 'merge_grouped', side_effect=merge) as merge_grouped:
+            with self.captureOnCommitCallbacks(execute=True):
+                created = save_notifications([self.message('Second'), self.message('Third')])
+        return created, merge_grouped.call_count
+
+    def test_conflict_is_retried_and_merged(self):
+        merge_grouped = dispatch.merge_grouped
+        attempts = []
+
+        def missed_once(notifications):
+            # The first merge misses the row, as if it was created meanwhile
+            attempts.append(notifications)
+            return (notifications, set()) if len(attempts) == 1 else merge_grouped(notifications)
+
+        created, calls = self.save(missed_once)
+        self.assertEqual((created, calls), ([], 2))
+        [merged] = Notification.objects.filter(user=self.user)
+        self.assertEqual((merged.pk, merged.count, merged.message), (self.existing.pk, 4, 'Third'))
+
+    def test_lasting_conflicts_save_the_batch_ungrouped(self):
+        with self.assertLogs('notifications.dispatch', 'WARNING'):
+            created, calls = self.save(lambda notifications: (notifications, set()))
+        self.assertEqual(calls, dispatch.SAVE_ATTEMPTS)
+        [notification] = created
+        self.assertEqual((notification.group_key, notification.count, notification.message), ('', 2, 'Third'))
+        self.assertEqual(Notification.objects.filter(user=self.user, is_read=False).count(), 2)
+
+
+@override_settings(NOTIFICATIONS_PER_PAGE=2)
+class NotificationListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.client.force_login(self.user)
+        for number in range(3):
+            Notification.objects.create(
+                user=self.user, notification_type='system', title=f'Notice {number}', message='Hello',
+            )
+
+    def test_pages_link_to_each_other(self):
+        response = self.client.get(reverse('notifications:notification_list'), {'filter': 'unread'})
+        self.assertContains(response, 'Notice 2')
+        self.assertNotContains(response, 'Notice 0')
+        next_query = response.context['page_obj'].next_querystring()
+        self.assertContains(response, f'href="?{next_query}"'.replace('&', '&amp;'))
+        response = self.client.get(f'{reverse("notifications:notification_list")}?{next_query}')
+        self.assertContains(response, 'Notice 0')
+        self.assertContains(response, 'Previous')
+        self.assertNotContains(response, 'Next <i')
+
+
+class NotificationsProcessorTests(TestCase):
+    """The bell's count and list are lazy and served from the cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+
+    def context(self, user=None):
+        request = RequestFactory().get('/')
+        request.user = user or self.user
+        return notifications_processor(request)
+
+    def create_notification(self):
+        return Notification.objects.create(
+            user=self.user, notification_type='system', title='Hello', message='Welcome',
+        )
+
+    def test_untouched_values_run_no_queries(self):
+        with self.assertNumQueries(0):
+            self.context()
+
+    def test_values_are_cached_until_notifications_change(self):
+        notification = self.create_notification()
+        with self.assertNumQueries(2):
+            context = self.context()
+            self.assertEqual(context['unread_notifications_count'], 1)
+            self.assertEqual(list(context['recent_notifications']), [notification])
+        with self.assertNumQueries(0):
+            context = self.context()
+            self.assertEqual(context['unread_notifications_count'], 1)
+            self.assertEqual(len(context['recent_notifications']), 1)
+        # New notifications bump the cached count in place
+        self.create_notification()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.context()['unread_notifications_count'], 2)
+        notification.mark_as_read()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.context()['unread_notifications_count'], 1)
+
+    def test_anonymous_users_have_no_notifications(self):
+        with self.assertNumQueries(0):
+            context = self.context(AnonymousUser())
+            self.assertEqual(context['unread_notifications_count'], 0)
+            self.assertEqual(list(context['recent_notifications']), [])
+
+
+@override_settings(ASYNC_VIEWS=True)
+class AsyncNotificationViewTests(TestCase):
+    """The ASGI polling endpoints answer as the sync ones do"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.async_client.force_login(self.user)
+        self.notification = Notification.objects.create(
+            user=self.user, notification_type='system', title='Hello', message='Welcome',
+        )
+
+    async def test_unread_count_revalidates(self):
+        url = reverse('notifications:get_unread_count')
+        self.assertEqual(resolve(url).func.__name__, 'get_unread_count_async')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.json(), {'count': 1})
+        self.assertEqual((await self.async_client.get(url, headers={'if-none-match': response['ETag']})).status_code, 304)
+        await Notification.objects.acreate(user=self.user, notification_type='system', title='Again', message='Hi')
+        response = await self.async_client.get(url, headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.json(), {'count': 2})
+
+    async def test_recent_notifications(self):
+        url = reverse('notifications:get_recent_notifications')
+        self.assertEqual(resolve(url).func.__name__, 'get_recent_notifications_async')
+        [notification] = (await self.async_client.get(url)).json()['notifications']
+        self.assertEqual((notification['id'], notification['title']), (self.notification.pk, 'Hello'))
+
+    async def test_anonymous_users_are_sent_to_log_in(self):
+        await sync_to_async(self.async_client.logout)()
+        self.assertEqual((await self.async_client.get(reverse('notifications:get_unread_count'))).status_code, 302)
@@ -1,4 +1,5 @@
 from django.urls import path
+from skillswap.asyncviews import native
 from . import views
 
 app_name = 'notifications'
@@ -10,6 +11,7 @@ urlpatterns = [
     path('<int:pk>/delete/', views.delete_notification, name='delete_notification'),
     
     # AJAX endpoints
-    path('api/unread-count/', views.get_unread_count, name='get_unread_count'),
-    path('api/recent/', views.get_recent_notifications, name='get_recent_notifications'),
+    path('api/unread-count/', native(views.get_unread_count, views.get_unread_count_async), name='get_unread_count'),
+    path('api/recent/', native(views.get_recent_notifications, views.get_recent_notifications_async), name='get_recent_notifications'),
+    path('api/stream/', views.notification_stream, name='notification_stream'),
 ]
@@ -1,12 +1,32 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition
+from .cache import (
+    aget_cached_recent_notifications, aget_cached_unread_count, aget_notifications_version,
+    get_cached_recent_notifications, get_cached_unread_count, get_notifications_version,
+    invalidate_notifications,
+)
 from .models import Notification
+from .stream import get_broker, publish_unread_changed, serialize_notification
+from monitoring.metrics import query_budget
+from skills.pagination import CursorPaginator
+from skillswap.asyncviews import async_etag, async_login_required
+
+# Newest first; ties on the id, ascending like SQLite's index entries
+NOTIFICATION_ORDERING = ('-created_at', 'id')
 
 
 @login_required
+@query_budget(5)
 def notification_list(request):
-    """List all notifications for the user"""
+    """List the user's notifications, a page at a time"""
     notifications = Notification.objects.filter(user=request.user)
     
     # Filter by read/unread
@@ -16,9 +36,17 @@ def notification_list(request):
     elif filter_type == 'read':
         notifications = notifications.filter(is_read=True)
     
+    # Keyset pagination over the (user, -created_at) index
+    paginator = CursorPaginator(
+        notifications, NOTIFICATION_ORDERING, per_page=getattr(settings, 'NOTIFICATIONS_PER_PAGE', 20),
+        key=f'notifications:{filter_type}',
+    )
+    page_obj = paginator.page(request.GET.get('cursor'), params=request.GET)
+    
     context = {
-        'notifications': notifications,
-        'unread_count': Notification.objects.filter(user=request.user, is_read=False).count(),
+        'notifications': page_obj,
+        'page_obj': page_obj,
+        'unread_count': get_cached_unread_count(request.user.pk),
         'filter_type': filter_type,
     }
     
@@ -40,6 +68,8 @@ def mark_as_read(request, pk):
 def mark_all_as_read(request):
     """Mark all notifications as read"""
     Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    invalidate_notifications(request.user.pk)
+    publish_unread_changed(request.user.pk)
     return redirect('notifications:notification_list')
 
 
@@ -51,26 +81,104 @@ def delete_notification(request, pk):
     return redirect('notifications:notification_list')
 
 
+def notifications_etag(request, *args, **kwargs):
+    """ETag for the polling endpoints, answered from the cache alone"""
+    return f'"{request.user.pk}-{get_notifications_version(request.user.pk)}"'
+
+
 @login_required
+@condition(etag_func=notifications_etag)
+@query_budget(3)
 def get_unread_count(request):
     """AJAX endpoint to get unread notification count"""
-    count = Notification.objects.filter(user=request.user, is_read=False).count()
+    count = get_cached_unread_count(request.user.pk)
     return JsonResponse({'count': count})
 
 
 @login_required
+@condition(etag_func=notifications_etag)
+@query_budget(3)
 def get_recent_notifications(request):
     """AJAX endpoint to get recent notifications"""
-    notifications = Notification.objects.filter(user=request.user)[:5]
+    notifications = get_cached_recent_notifications(request.user.pk)
     
-    data = [{
-        'id': n.id,
-        'title': n.title,
-        'message': n.message,
-        'link': n.link,
-        'is_read': n.is_read,
-        'created_at': n.created_at.strftime('%Y-%m-%d %H:%M'),
-        'type': n.notification_type,
-    } for n in notifications]
+    data = [serialize_notification(n) for n in notifications]
     
     return JsonResponse({'notifications': data})
+
+
+async def anotifications_etag(request, *args, **kwargs):
+    return f'"{request.user.pk}-{await aget_notifications_version(request.user.pk)}"'
+
+
+@async_login_required
+@async_etag(anotifications_etag)
+@query_budget(3)
+async def get_unread_count_async(request):
+    """get_unread_count for ASGI"""
+    count = await aget_cached_unread_count(request.user.pk)
+    return JsonResponse({'count': count})
+
+
+@async_login_required
+@async_etag(anotifications_etag)
+@query_budget(3)
+async def get_recent_notifications_async(request):
+    """get_recent_notifications for ASGI"""
+    notifications = await aget_cached_recent_notifications(request.user.pk)
+    
+    data = [serialize_notification(n) for n in notifications]
+    
+    return JsonResponse({'notifications': data})
+
+
+def _sse(event_type, data):
+    return f'event: {event_type}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of new notifications and unread-count changes.
+    Serve it through skillswap.asgi. Under WSGI Django would buffer the
+    whole stream and hold a worker for its lifetime, so those requests get
+    204, which closes the browser's EventSource and the navbar falls back
+    to polling get_unread_count.
+
+    Streams end after NOTIFICATIONS_STREAM_LIFETIME seconds and the browser
+    reconnects, so a client that vanished without the server noticing
+    cannot hold a subscription forever.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user_id = await sync_to_async(lambda: request.user.pk if request.user.is_authenticated else None)()
+    if user_id is None:
+        return HttpResponse(status=401)
+
+    keepalive = getattr(settings, 'NOTIFICATIONS_STREAM_KEEPALIVE', 25)
+    lifetime = getattr(settings, 'NOTIFICATIONS_STREAM_LIFETIME', 300)
+    unread_count = sync_to_async(get_cached_unread_count)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + lifetime
+        subscription = get_broker().subscribe(user_id)
+        try:
+            yield 'retry: 5000\n\n'
+            yield _sse('unread_count', {'unread_count': await unread_count(user_id)})
+            while loop.time() < deadline:
+                timeout = min(keepalive, deadline - loop.time())
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if event['type'] == 'unread_count':
+                    event = {**event, 'unread_count': await unread_count(user_id)}
+                yield _sse(event['type'], event)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
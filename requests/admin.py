@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import SkillRequest, RequestMessage
+from .transitions import bulk_transition
 
 
 @admin.register(SkillRequest)
@@ -10,6 +11,7 @@ class SkillRequestAdmin(admin.ModelAdmin):
     search_fields = ['sender__username', 'receiver__username', 'skill__title']
     date_hierarchy = 'created_at'
     readonly_fields = ['created_at', 'updated_at', 'accepted_at', 'completed_at']
+    actions = ['accept_requests', 'reject_requests', 'complete_requests', 'cancel_requests']
     
     fieldsets = (
         ('Request Information', {
@@ -22,6 +24,29 @@ class SkillRequestAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at', 'accepted_at', 'completed_at')
         }),
     )
+    
+    def _transition(self, request, queryset, action):
+        selected = queryset.count()
+        moved = bulk_transition(action, queryset)
+        skipped = selected - len(moved)
+        verb = SkillRequest.TRANSITIONS[action]['to']
+        self.message_user(request, f'{len(moved)} request(s) {verb}, {skipped} skipped (status did not allow it).')
+    
+    @admin.action(description='Accept selected pending requests')
+    def accept_requests(self, request, queryset):
+        self._transition(request, queryset, 'accept')
+    
+    @admin.action(description='Reject selected pending requests')
+    def reject_requests(self, request, queryset):
+        self._transition(request, queryset, 'reject')
+    
+    @admin.action(description='Complete selected accepted requests')
+    def complete_requests(self, request, queryset):
+        self._transition(request, queryset, 'complete')
+    
+    @admin.action(description='Cancel selected open requests')
+    def cancel_requests(self, request, queryset):
+        self._transition(request, queryset, 'cancel')
 
 
 @admin.register(RequestMessage)
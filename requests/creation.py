@@ -0,0 +1,38 @@
+"""
+Race-free creation of skill requests.
+
+A sender may have one open request per skill. Rather than checking for one
+and then inserting, which lets two concurrent submits both pass the check,
+open_request() inserts straight away and lets the req_one_open_per_sender_skill
+constraint decide: the losing insert fails with an IntegrityError inside its
+own savepoint and the request that won is returned instead.
+"""
+from django.db import IntegrityError, transaction
+from .models import SkillRequest
+
+
+def get_open_request(sender, skill):
+    """The sender's open request for ``skill``, if any"""
+    return SkillRequest.objects.filter(
+        sender=sender, skill=skill, status__in=SkillRequest.OPEN_STATUSES
+    ).first()
+
+
+def open_request(sender, skill, **fields):
+    """
+    Create a pending request from ``sender`` for ``skill``, or return the one
+    already open. Returns (request, created).
+    """
+    try:
+        # The savepoint keeps an enclosing transaction usable after a
+        # conflict, and discards the notification queued by post_save
+        with transaction.atomic():
+            return SkillRequest.objects.create(
+                sender=sender, receiver_id=skill.user_id, skill=skill, **fields
+            ), True
+    except IntegrityError:
+        existing = get_open_request(sender, skill)
+        if existing is None:
+            # Not a duplicate (or the winner was closed meanwhile)
+            raise
+        return existing, False
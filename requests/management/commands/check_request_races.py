@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+from notifications.dispatch import get_dispatcher
+from notifications.models import Notification
+from requests.models import SkillRequest
+from skills.models import Category, Skill
+
+
+class Command(BaseCommand):
+    help = (
+        'Submit the same skill request from many threads at once, in a throwaway '
+        'test database, and check that exactly one is created and none fails'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent submits per round')
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        test_settings = settings.DATABASES['default'].setdefault('TEST', {})
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # The default in-memory test database cannot take writes from
+            # several threads, so use a file (removed again on teardown)
+            scratch = os.path.join(tempfile.gettempdir(), f'skillswap_races_{os.getpid()}.sqlite3')
+            test_settings['NAME'] = connection.settings_dict['TEST']['NAME'] = scratch
+
+        setup_test_environment(debug=False)
+        databases = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            failures = self.run_rounds(options['workers'], options['rounds'])
+        finally:
+            teardown_databases(databases, verbosity=0)
+            teardown_test_environment()
+
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f'{len(failures)} problem(s) in {options["rounds"]} round(s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["rounds"]} round(s) of {options["workers"]} concurrent submits: one request each, no errors'
+        ))
+
+    def run_rounds(self, workers, rounds):
+        User = get_user_model()
+        owner = User.objects.create_user('race_owner', 'owner@example.com', 'race-password')
+        sender = User.objects.create_user('race_sender', 'sender@example.com', 'race-password')
+        category = Category.objects.create(name='Race checks')
+        skill = Skill.objects.create(
+            user=owner, category=category, title='Concurrency', description='Race check skill',
+        )
+        url = reverse('requests:request_create', args=[skill.pk])
+
+        # Log every client in up front so the rounds only race the submit
+        clients = []
+        for _ in range(workers):
+            client = Client(raise_request_exception=False)
+            client.force_login(sender)
+            clients.append(client)
+
+        failures = []
+        for round_number in range(1, rounds + 1):
+            notified = Notification.objects.filter(user=owner).count()
+            statuses = self.submit_all(clients, url)
+            get_dispatcher().flush()
+
+            errors = [status for status in statuses if status != 302]
+            if errors:
+                failures.append(f'Round {round_number}: responses {statuses}')
+            open_requests = SkillRequest.objects.filter(
+                sender=sender, skill=skill, status__in=SkillRequest.OPEN_STATUSES
+            ).count()
+            if open_requests != 1:
+                failures.append(f'Round {round_number}: {open_requests} open requests')
+            new_notifications = Notification.objects.filter(user=owner).count() - notified
+            if new_notifications != 1:
+                failures.append(f'Round {round_number}: {new_notifications} notifications sent')
+
+            # Close the request so the next round races for a new one; the
+            # finished requests pile up, which the constraint must allow
+            SkillRequest.objects.filter(sender=sender, skill=skill, status='pending').update(status='cancelled')
+        return failures
+
+    def submit_all(self, clients, url):
+        """POST the form from every client at the same moment; returns the status codes"""
+        barrier = threading.Barrier(len(clients))
+        statuses = [None] * len(clients)
+
+        def submit(index, client):
+            try:
+                barrier.wait()
+                statuses[index] = client.post(url, {'message': 'Race check'}).status_code
+            except Exception as error:
+                statuses[index] = repr(error)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=submit, args=(index, client))
+            for index, client in enumerate(clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses
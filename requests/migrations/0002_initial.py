@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('requests', '0001_initial'),
+        ('skills', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skillrequest',
+            name='receiver',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='received_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='skillrequest',
+            name='sender',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sent_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='skillrequest',
+            name='skill',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requests', to='skills.skill'),
+        ),
+        migrations.AddField(
+            model_name='requestmessage',
+            name='request',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='requests.skillrequest'),
+        ),
+        migrations.AddField(
+            model_name='requestmessage',
+            name='sender',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='skillrequest',
+            index=models.Index(fields=['sender', 'status', '-created_at'], name='req_sender_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillrequest',
+            index=models.Index(fields=['receiver', 'status', '-created_at'], name='req_receiver_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillrequest',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'accepted'])), fields=['sender', 'skill'], name='req_open_sender_skill_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='skillrequest',
+            unique_together={('sender', 'skill', 'status')},
+        ),
+        migrations.AddIndex(
+            model_name='requestmessage',
+            index=models.Index(fields=['request', 'created_at'], name='reqmsg_request_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requests', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='requestmessage',
+            name='reqmsg_request_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='requestmessage',
+            index=models.Index(fields=['request', 'id'], name='reqmsg_request_id_idx'),
+        ),
+    ]
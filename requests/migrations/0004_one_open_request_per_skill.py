@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+def cancel_duplicate_open_requests(apps, schema_editor):
+    # The old constraint allowed a pending and an accepted request for the
+    # same sender and skill; keep the most advanced one open
+    SkillRequest = apps.get_model('requests', 'SkillRequest')
+    open_requests = SkillRequest.objects.filter(status__in=['pending', 'accepted'])
+    seen = set()
+    duplicates = []
+    for pk, sender_id, skill_id in open_requests.order_by('status', '-created_at').values_list('pk', 'sender_id', 'skill_id'):
+        if (sender_id, skill_id) in seen:
+            duplicates.append(pk)
+        seen.add((sender_id, skill_id))
+    SkillRequest.objects.filter(pk__in=duplicates).update(status='cancelled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requests', '0003_requestmessage_thread_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='skillrequest',
+            name='req_open_sender_skill_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='skillrequest',
+            unique_together=set(),
+        ),
+        migrations.RunPython(cancel_duplicate_open_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='skillrequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('pending', 'accepted'))), fields=('sender', 'skill'), name='req_one_open_per_sender_skill'),
+        ),
+    ]
@@ -2,6 +2,10 @@ from django.db import models
 from django.conf import settings
 from skills.models import Skill
 
+# Statuses of a request that is still open; a sender may have only one open
+# request per skill, but any number of finished ones
+OPEN_STATUSES = ('pending', 'accepted')
+
 
 class SkillRequest(models.Model):
     """Skill exchange requests"""
@@ -14,6 +18,17 @@ class SkillRequest(models.Model):
         ('cancelled', 'Cancelled'),
     ]
     
+    OPEN_STATUSES = OPEN_STATUSES
+    
+    # Status changes each action may make: the statuses it applies to, the
+    # new status, who may perform it and the timestamp it records
+    TRANSITIONS = {
+        'accept': {'from': ('pending',), 'to': 'accepted', 'by': 'receiver', 'timestamp': 'accepted_at'},
+        'reject': {'from': ('pending',), 'to': 'rejected', 'by': 'receiver', 'timestamp': None},
+        'complete': {'from': ('accepted',), 'to': 'completed', 'by': 'either', 'timestamp': 'completed_at'},
+        'cancel': {'from': ('pending', 'accepted'), 'to': 'cancelled', 'by': 'sender', 'timestamp': None},
+    }
+    
     sender = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE, 
@@ -37,26 +52,39 @@ class SkillRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
-        unique_together = ['sender', 'skill', 'status']
+        constraints = [
+            # Enforced by the database so concurrent creates cannot both
+            # insert; its partial unique index also serves the duplicate lookup
+            models.UniqueConstraint(
+                fields=['sender', 'skill'],
+                condition=models.Q(status__in=OPEN_STATUSES),
+                name='req_one_open_per_sender_skill',
+            ),
+        ]
+        indexes = [
+            # Sent/received lists filtered by status (dashboard, request list, stats)
+            models.Index(fields=['sender', 'status', '-created_at'], name='req_sender_status_idx'),
+            models.Index(fields=['receiver', 'status', '-created_at'], name='req_receiver_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.username} -> {self.receiver.username}: {self.skill.title}"
     
     def can_accept(self):
         """Check if request can be accepted"""
-        return self.status == 'pending'
+        return self.status in self.TRANSITIONS['accept']['from']
     
     def can_reject(self):
         """Check if request can be rejected"""
-        return self.status == 'pending'
+        return self.status in self.TRANSITIONS['reject']['from']
     
     def can_complete(self):
         """Check if request can be completed"""
-        return self.status == 'accepted'
+        return self.status in self.TRANSITIONS['complete']['from']
     
     def can_cancel(self):
         """Check if request can be cancelled"""
-        return self.status in ['pending', 'accepted']
+        return self.status in self.TRANSITIONS['cancel']['from']
 
 
 class RequestMessage(models.Model):
@@ -70,6 +98,10 @@ class RequestMessage(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Thread windows and polling page by message id
+            models.Index(fields=['request', 'id'], name='reqmsg_request_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.username}: {self.message[:50]}"
@@ -0,0 +1,205 @@
+import threading
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from notifications.models import Notification
+from skills.models import Skill
+from users.models import User
+from .creation import open_request
+from .models import RequestMessage, SkillRequest
+from .threads import latest_messages, mark_read
+from .transitions import bulk_transition
+
+
+@override_settings(REQUEST_THREAD_WINDOW=3, REQUEST_THREAD_FETCH_LIMIT=2)
+class MessageThreadTests(TestCase):
+    """Threads load in windows and only unread, displayed messages are marked read"""
+
+    def setUp(self):
+        cache.clear()
+        self.learner = User.objects.create_user('learner', 'learner@example.com', 'password')
+        self.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        skill = Skill.objects.create(user=self.teacher, title='Guitar', description='Chords and scales')
+        self.request = SkillRequest.objects.create(
+            sender=self.learner, receiver=self.teacher, skill=skill, message='Teach me'
+        )
+        self.ids = [
+            RequestMessage.objects.create(request=self.request, sender=self.learner, message=f'Message {number}').pk
+            for number in range(5)
+        ]
+
+    def unread(self):
+        return list(RequestMessage.objects.filter(is_read=False).order_by('id').values_list('pk', flat=True))
+
+    def poll(self, user, **params):
+        self.client.force_login(user)
+        return self.client.get(reverse('requests:request_messages', args=[self.request.pk]), params)
+
+    def test_windows_page_back_through_the_thread(self):
+        window, has_older = latest_messages(self.request.pk)
+        self.assertEqual([message.pk for message in window], self.ids[2:])
+        self.assertTrue(has_older)
+        window, has_older = latest_messages(self.request.pk, before=self.ids[2])
+        self.assertEqual([message.pk for message in window], self.ids[:2])
+        self.assertFalse(has_older)
+
+    def test_only_the_other_partys_displayed_messages_are_marked_read(self):
+        window, _ = latest_messages(self.request.pk, before=self.ids[3])
+        # The sender's own messages stay unread for them
+        self.assertEqual(mark_read(self.request.pk, self.learner, window), 0)
+        self.assertEqual(mark_read(self.request.pk, self.teacher, window), 3)
+        self.assertEqual(self.unread(), self.ids[3:])
+
+    def test_read_windows_skip_the_update(self):
+        window, _ = latest_messages(self.request.pk)
+        mark_read(self.request.pk, self.teacher, window)
+        window, _ = latest_messages(self.request.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(mark_read(self.request.pk, self.teacher, window), 0)
+        self.assertEqual(len(queries), 0)
+
+    def test_polling_returns_and_reads_newer_messages(self):
+        data = self.poll(self.teacher, after=self.ids[1]).json()
+        self.assertEqual([message['id'] for message in data['messages']], self.ids[2:4])
+        self.assertTrue(data['has_more'])
+        # Everything up to the newest message shown is read
+        self.assertEqual(self.unread(), self.ids[4:])
+        data = self.poll(self.teacher, after=self.ids[3]).json()
+        self.assertEqual([message['id'] for message in data['messages']], self.ids[4:])
+        self.assertFalse(data['has_more'])
+
+    def test_older_windows_are_not_marked_read(self):
+        data = self.poll(self.teacher, before=self.ids[2]).json()
+        self.assertEqual([message['id'] for message in data['messages']], self.ids[:2])
+        self.assertEqual(len(self.unread()), 5)
+
+    def test_outsiders_cannot_read_the_thread(self):
+        outsider = User.objects.create_user('outsider', 'outsider@example.com', 'password')
+        self.assertEqual(self.poll(outsider).status_code, 404)
+
+
+@override_settings(NOTIFICATIONS_DISPATCHER={'BACKEND': 'notifications.dispatch.ImmediateDispatcher'})
+class BulkTransitionTests(TestCase):
+    """Bulk actions follow the state machine and notify in one batch"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.skill = Skill.objects.create(user=self.teacher, title='Guitar', description='Chords and scales')
+        self.learners = [
+            User.objects.create_user(f'learner{number}', f'learner{number}@example.com', 'password')
+            for number in range(4)
+        ]
+        self.requests = [
+            SkillRequest.objects.create(sender=learner, receiver=self.teacher, skill=self.skill, message='Teach me')
+            for learner in self.learners
+        ]
+        SkillRequest.objects.filter(pk=self.requests[3].pk).update(status='cancelled')
+
+    def statuses(self):
+        return [request.status for request in SkillRequest.objects.order_by('pk')]
+
+    def test_only_allowed_requests_move(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = bulk_transition('accept', SkillRequest.objects.all(), user=self.teacher)
+        self.assertEqual(sorted(moved), [request.pk for request in self.requests[:3]])
+        self.assertEqual(self.statuses(), ['accepted', 'accepted', 'accepted', 'cancelled'])
+        self.assertFalse(SkillRequest.objects.filter(status='accepted', accepted_at=None).exists())
+        # Only the sender may cancel
+        self.assertEqual(bulk_transition('cancel', SkillRequest.objects.all(), user=self.teacher), [])
+        self.assertEqual(bulk_transition('cancel', SkillRequest.objects.all(), user=self.learners[0]), [self.requests[0].pk])
+
+    def test_notifications_are_written_in_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                bulk_transition('reject', SkillRequest.objects.all(), user=self.teacher)
+        inserts = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "notifications_notification"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            sorted(Notification.objects.filter(notification_type='request_rejected').values_list('user__username', flat=True)),
+            ['learner0', 'learner1', 'learner2'],
+        )
+
+    def test_bulk_view_moves_the_selected_requests(self):
+        self.client.force_login(self.teacher)
+        response = self.client.post(reverse('requests:request_bulk_action'), {
+            'action': 'reject', 'request_ids': [self.requests[0].pk, self.requests[3].pk, 'x'],
+        })
+        self.assertRedirects(response, reverse('requests:request_list'), fetch_redirect_response=False)
+        self.assertEqual(self.statuses(), ['rejected', 'pending', 'pending', 'cancelled'])
+
+    def test_admin_action_reports_skipped_requests(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:requests_skillrequest_changelist'), {
+            'action': 'complete_requests', '_selected_action': [request.pk for request in self.requests],
+        }, follow=True)
+        self.assertContains(response, '0 request(s) completed, 4 skipped')
+
+
+@override_settings(NOTIFICATIONS_DISPATCHER={'BACKEND': 'notifications.dispatch.ImmediateDispatcher'})
+class OpenRequestRaceTests(TransactionTestCase):
+    """Concurrent submits of the same request create exactly one"""
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.learner = User.objects.create_user('learner', 'learner@example.com', 'password')
+        self.skill = Skill.objects.create(user=self.teacher, title='Guitar', description='Chords and scales')
+
+    def open_requests(self):
+        return SkillRequest.objects.filter(sender=self.learner, skill=self.skill, status__in=SkillRequest.OPEN_STATUSES)
+
+    def submit_concurrently(self, workers=6):
+        barrier = threading.Barrier(workers)
+        results, errors = [], []
+
+        def submit():
+            try:
+                barrier.wait()
+                results.append(open_request(self.learner, self.skill, message='Teach me'))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_parallel_creates_make_one_request(self):
+        results, errors = self.submit_concurrently()
+        self.assertEqual(errors, [])
+        [request] = self.open_requests()
+        self.assertEqual({result.pk for result, _ in results}, {request.pk})
+        self.assertEqual([created for _, created in results].count(True), 1)
+        self.assertEqual(Notification.objects.filter(user=self.teacher).count(), 1)
+
+    def test_existing_open_request_is_returned(self):
+        first, created = open_request(self.learner, self.skill, message='Teach me')
+        self.assertTrue(created)
+        self.assertEqual(open_request(self.learner, self.skill, message='Again'), (first, False))
+        self.assertEqual(Notification.objects.filter(user=self.teacher).count(), 1)
+
+    def test_closed_requests_do_not_block_a_new_one(self):
+        first, _ = open_request(self.learner, self.skill, message='Teach me')
+        SkillRequest.objects.filter(pk=first.pk).update(status='completed')
+        second, created = open_request(self.learner, self.skill, message='Teach me more')
+        self.assertTrue(created)
+        self.assertNotEqual(second.pk, first.pk)
+        # The constraint only covers open requests
+        SkillRequest.objects.filter(pk=second.pk).update(status='cancelled')
+        self.assertEqual(SkillRequest.objects.filter(sender=self.learner, skill=self.skill).count(), 2)
+
+    def test_constraint_rejects_a_second_open_request(self):
+        open_request(self.learner, self.skill, message='Teach me')
+        with self.assertRaises(IntegrityError):
+            SkillRequest.objects.create(
+                sender=self.learner, receiver=self.teacher, skill=self.skill, message='Again', status='accepted'
+            )
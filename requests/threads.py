@@ -0,0 +1,67 @@
+"""
+Windowed loading of request message threads.
+
+request_detail renders only the newest window of a thread and links to
+older windows by message id; the messages endpoint returns messages after
+(or before) a given id so the page can poll for new ones. Message ids grow
+with time, so they double as the thread cursor.
+"""
+from django.conf import settings
+from .models import RequestMessage
+
+
+def get_thread_window():
+    return getattr(settings, 'REQUEST_THREAD_WINDOW', 30)
+
+
+def get_fetch_limit():
+    return getattr(settings, 'REQUEST_THREAD_FETCH_LIMIT', 100)
+
+
+def _thread(request_id):
+    return RequestMessage.objects.filter(request_id=request_id).select_related('sender')
+
+
+def latest_messages(request_id, before=None, limit=None):
+    """
+    The newest ``limit`` messages (older than message ``before`` if given),
+    oldest first, and whether there are older ones.
+    """
+    limit = limit or get_thread_window()
+    messages = _thread(request_id)
+    if before:
+        messages = messages.filter(id__lt=before)
+    window = list(messages.order_by('-id')[:limit + 1])
+    has_older = len(window) > limit
+    window = window[:limit]
+    window.reverse()
+    return window, has_older
+
+
+def messages_after(request_id, after, limit=None):
+    """Messages newer than message ``after``, oldest first, and whether more are waiting"""
+    limit = limit or get_fetch_limit()
+    batch = list(_thread(request_id).filter(id__gt=after).order_by('id')[:limit + 1])
+    return batch[:limit], len(batch) > limit
+
+
+def mark_read(request_id, user, displayed):
+    """
+    Mark the other party's messages read up to the newest one displayed.
+    Skips the UPDATE entirely when none of the displayed messages is unread.
+    """
+    if not any(not message.is_read and message.sender_id != user.pk for message in displayed):
+        return 0
+    return RequestMessage.objects.filter(
+        request_id=request_id, is_read=False, id__lte=displayed[-1].id
+    ).exclude(sender=user).update(is_read=True)
+
+
+def serialize_message(message, user):
+    return {
+        'id': message.id,
+        'sender': message.sender.username,
+        'message': message.message,
+        'created_at': message.created_at.isoformat(),
+        'is_mine': message.sender_id == user.pk,
+    }
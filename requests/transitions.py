@@ -0,0 +1,68 @@
+"""
+Bulk status transitions for skill requests.
+
+bulk_transition() moves many requests in one transaction with conditional
+UPDATEs (``WHERE status IN (<allowed statuses>)``), so a request changed by
+someone else in the meantime is skipped rather than overwritten. QuerySet
+updates bypass post_save, so the side effects of the signal handlers are
+made here once per batch: status notifications are queued as one group
+(one bulk INSERT) and the affected users' dashboard stats are invalidated.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from dashboard.stats import invalidate_user_stats
+from notifications import dispatch
+from .models import SkillRequest
+
+# Statuses the other party is notified about, as in requests.signals
+NOTIFIED_STATUSES = ('accepted', 'rejected')
+
+CHUNK_SIZE = 500
+
+
+def allowed_for(user, action):
+    """Requests ``user`` may move with ``action``"""
+    party = SkillRequest.TRANSITIONS[action]['by']
+    if party == 'either':
+        return Q(sender=user) | Q(receiver=user)
+    return Q(**{party: user})
+
+
+def bulk_transition(action, queryset, user=None):
+    """
+    Apply ``action`` to every request in ``queryset`` whose status allows it
+    (and, with ``user``, that the user may move). Returns the ids moved.
+    """
+    transition = SkillRequest.TRANSITIONS[action]
+    if user is not None:
+        queryset = queryset.filter(allowed_for(user, action))
+    now = timezone.now()
+    changes = {'status': transition['to'], 'updated_at': now}
+    if transition['timestamp']:
+        changes[transition['timestamp']] = now
+
+    moved = []
+    with transaction.atomic():
+        candidates = list(
+            queryset.filter(status__in=transition['from'])
+            .select_for_update()
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        for start in range(0, len(candidates), CHUNK_SIZE):
+            chunk = candidates[start:start + CHUNK_SIZE]
+            SkillRequest.objects.filter(pk__in=chunk, status__in=transition['from']).update(**changes)
+            # updated_at is unique to this call, so it tells our rows from ones moved concurrently
+            moved.extend(SkillRequest.objects.filter(
+                pk__in=chunk, status=transition['to'], updated_at=now
+            ).values_list('pk', 'sender_id', 'receiver_id'))
+
+        if transition['to'] in NOTIFIED_STATUSES:
+            dispatch.enqueue(*[
+                dispatch.request_status_changed(SkillRequest(pk=pk, status=transition['to']))
+                for pk, _, _ in moved
+            ])
+        user_ids = {user_id for _, sender_id, receiver_id in moved for user_id in (sender_id, receiver_id)}
+        transaction.on_commit(lambda: invalidate_user_stats(*user_ids))
+    return [pk for pk, _, _ in moved]
@@ -6,7 +6,9 @@ app_name = 'requests'
 urlpatterns = [
     path('', views.request_list, name='request_list'),
     path('create/<int:skill_id>/', views.request_create, name='request_create'),
+    path('bulk/', views.request_bulk_action, name='request_bulk_action'),
     path('<int:pk>/', views.request_detail, name='request_detail'),
+    path('<int:pk>/messages/', views.request_messages, name='request_messages'),
     path('<int:pk>/accept/', views.request_accept, name='request_accept'),
     path('<int:pk>/reject/', views.request_reject, name='request_reject'),
     path('<int:pk>/complete/', views.request_complete, name='request_complete'),
@@ -3,9 +3,24 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 from .models import SkillRequest, RequestMessage
+from .creation import get_open_request, open_request
 from .forms import SkillRequestForm, RequestMessageForm
+from .threads import latest_messages, mark_read, messages_after, serialize_message
+from .transitions import allowed_for, bulk_transition
 from skills.models import Skill
+from monitoring.metrics import query_budget
+
+
+def _message_id(value):
+    """A message id from the query string, or None"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
 
 
 @login_required
@@ -39,13 +54,8 @@ def request_create(request, skill_id):
         messages.error(request, "You cannot request your own skill!")
         return redirect('skills:skill_detail', pk=skill_id)
     
-    # Check if request already exists
-    existing_request = SkillRequest.objects.filter(
-        sender=request.user,
-        skill=skill,
-        status__in=['pending', 'accepted']
-    ).first()
-    
+    # An open request already exists: show it instead of the form
+    existing_request = get_open_request(request.user, skill)
     if existing_request:
         messages.warning(request, "You already have a pending or accepted request for this skill!")
         return redirect('requests:request_detail', pk=existing_request.pk)
@@ -53,12 +63,13 @@ def request_create(request, skill_id):
     if request.method == 'POST':
         form = SkillRequestForm(request.POST)
         if form.is_valid():
-            skill_request = form.save(commit=False)
-            skill_request.sender = request.user
-            skill_request.receiver = skill.user
-            skill_request.skill = skill
-            skill_request.save()
-            messages.success(request, 'Request sent successfully!')
+            # A concurrent submit may have won since the check above; the
+            # insert is decided by the database and returns that request
+            skill_request, created = open_request(request.user, skill, **form.cleaned_data)
+            if created:
+                messages.success(request, 'Request sent successfully!')
+            else:
+                messages.warning(request, "You already have a pending or accepted request for this skill!")
             return redirect('requests:request_detail', pk=skill_request.pk)
     else:
         form = SkillRequestForm()
@@ -97,16 +108,20 @@ def request_detail(request, pk):
     else:
         message_form = RequestMessageForm()
     
-    # Mark messages as read
-    RequestMessage.objects.filter(
-        request=skill_request
-    ).exclude(sender=request.user).update(is_read=True)
+    # Newest window of the thread, or an older one when paging back
+    request_messages, has_older = latest_messages(
+        skill_request.pk, before=_message_id(request.GET.get('before'))
+    )
     
-    request_messages = skill_request.messages.all().select_related('sender')
+    # Mark messages as read, only up to the newest one shown
+    mark_read(skill_request.pk, request.user, request_messages)
     
     context = {
         'skill_request': skill_request,
         'messages': request_messages,
+        'has_older_messages': has_older,
+        'oldest_message_id': request_messages[0].id if request_messages else None,
+        'latest_message_id': request_messages[-1].id if request_messages else 0,
         'message_form': message_form,
         'is_sender': request.user == skill_request.sender,
         'is_receiver': request.user == skill_request.receiver,
@@ -115,6 +130,30 @@ def request_detail(request, pk):
     return render(request, 'requests/request_detail.html', context)
 
 
+@login_required
+@query_budget(5)
+def request_messages(request, pk):
+    """
+    Thread messages as JSON. ``?after=<id>`` returns newer messages (for
+    polling) and marks them read; ``?before=<id>`` returns an older window.
+    """
+    skill_request = get_object_or_404(
+        SkillRequest.objects.filter(Q(sender=request.user) | Q(receiver=request.user)).only('pk'),
+        pk=pk
+    )
+    before = _message_id(request.GET.get('before'))
+    if before:
+        batch, has_more = latest_messages(skill_request.pk, before=before)
+    else:
+        batch, has_more = messages_after(skill_request.pk, _message_id(request.GET.get('after')) or 0)
+        mark_read(skill_request.pk, request.user, batch)
+    
+    return JsonResponse({
+        'messages': [serialize_message(message, request.user) for message in batch],
+        'has_more': has_more,
+    })
+
+
 @login_required
 def request_accept(request, pk):
     """Accept a skill request"""
@@ -181,3 +220,27 @@ def request_cancel(request, pk):
         messages.error(request, 'This request cannot be cancelled!')
     
     return redirect('requests:request_list')
+
+
+@login_required
+@require_POST
+def request_bulk_action(request):
+    """Accept, reject, complete or cancel many requests at once"""
+    action = request.POST.get('action')
+    if action not in SkillRequest.TRANSITIONS:
+        messages.error(request, 'Unknown action!')
+        return redirect('requests:request_list')
+    
+    requests_to_move = SkillRequest.objects.filter(allowed_for(request.user, action))
+    if not request.POST.get('select_all'):
+        ids = [value for value in request.POST.getlist('request_ids') if value.isdigit()]
+        requests_to_move = requests_to_move.filter(pk__in=ids)
+    
+    moved = bulk_transition(action, requests_to_move, user=request.user)
+    verb = SkillRequest.TRANSITIONS[action]['to']
+    if moved:
+        messages.success(request, f'{len(moved)} request{"s" if len(moved) != 1 else ""} {verb}!')
+    else:
+        messages.warning(request, f'No requests could be {verb}.')
+    
+    return redirect('requests:request_list')
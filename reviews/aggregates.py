@@ -0,0 +1,65 @@
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+RATING_FIELDS = ('rating', 'communication_rating', 'knowledge_rating', 'patience_rating')
+
+
+def get_rating_values(review):
+    """Snapshot of the rating fields and targets that feed the aggregates"""
+    values = {field: getattr(review, field) for field in RATING_FIELDS}
+    values['skill_id'] = review.skill_id
+    values['reviewed_user_id'] = review.reviewed_user_id
+    return values
+
+
+def _apply(model, pk, values, sign):
+    """Add (sign=1) or remove (sign=-1) one review from a row's aggregates"""
+    rating_sum = F('rating_sum') + sign * values['rating']
+    rating_count = F('rating_count') + sign
+    model.objects.filter(pk=pk).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        communication_rating_sum=F('communication_rating_sum') + sign * values['communication_rating'],
+        knowledge_rating_sum=F('knowledge_rating_sum') + sign * values['knowledge_rating'],
+        patience_rating_sum=F('patience_rating_sum') + sign * values['patience_rating'],
+        # The right-hand side sees the pre-update row, so recompute from the same expressions
+        rating_average=Case(
+            When(rating_count__gt=-sign, then=Cast(rating_sum, FloatField()) / Cast(rating_count, FloatField())),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def apply_review(values, sign):
+    """Apply a review snapshot to both the skill and the reviewed user"""
+    from skills.models import Skill
+    from users.models import User
+
+    if values['skill_id']:
+        _apply(Skill, values['skill_id'], values, sign)
+    if values['reviewed_user_id']:
+        _apply(User, values['reviewed_user_id'], values, sign)
+
+
+def rebuild_rating_aggregates(model, related_field):
+    """Recompute every row's aggregates from the reviews table in one UPDATE"""
+    from .models import Review
+
+    reviews = Review.objects.filter(**{related_field: OuterRef('pk')}).order_by().values(related_field)
+
+    def total(expression):
+        return Coalesce(Subquery(reviews.annotate(value=expression).values('value')), Value(0))
+
+    return model.objects.update(
+        rating_sum=total(Sum('rating')),
+        rating_count=total(Count('pk')),
+        rating_average=Coalesce(
+            Subquery(reviews.annotate(value=Avg('rating')).values('value')),
+            Value(0.0),
+            output_field=FloatField(),
+        ),
+        communication_rating_sum=total(Sum('communication_rating')),
+        knowledge_rating_sum=total(Sum('knowledge_rating')),
+        patience_rating_sum=total(Sum('patience_rating')),
+    )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.aggregates import rebuild_rating_aggregates
+from skills.models import Skill
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored rating aggregates on skills and users from the reviews table'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            skills = rebuild_rating_aggregates(Skill, 'skill')
+            users = rebuild_rating_aggregates(User, 'reviewed_user')
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt rating aggregates for {skills} skills and {users} users.'
+        ))
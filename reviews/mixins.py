@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class RatingAggregateMixin(models.Model):
+    """Denormalized review totals, maintained by reviews.aggregates"""
+
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_average = models.FloatField(default=0, db_index=True, editable=False)
+    communication_rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    knowledge_rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    patience_rating_sum = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def _average_of(self, total):
+        if self.rating_count:
+            return round(total / self.rating_count, 1)
+        return 0
+
+    def get_average_rating(self):
+        """Average star rating from the stored aggregates"""
+        return round(self.rating_average, 1)
+
+    def get_total_reviews(self):
+        """Total number of reviews"""
+        return self.rating_count
+
+    def get_average_communication_rating(self):
+        """Average communication rating"""
+        return self._average_of(self.communication_rating_sum)
+
+    def get_average_knowledge_rating(self):
+        """Average knowledge rating"""
+        return self._average_of(self.knowledge_rating_sum)
+
+    def get_average_patience_rating(self):
+        """Average patience rating"""
+        return self._average_of(self.patience_rating_sum)
@@ -53,6 +53,10 @@ class Review(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['reviewer', 'request']
+        indexes = [
+            models.Index(fields=['reviewed_user', '-created_at'], name='review_user_created_idx'),
+            models.Index(fields=['skill', '-created_at'], name='review_skill_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.reviewer.username} -> {self.reviewed_user.username}: {self.rating}★"
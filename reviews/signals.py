@@ -1,17 +1,42 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from .aggregates import apply_review, get_rating_values
 from .models import Review
-from notifications.models import Notification
+from notifications import dispatch
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    """Keep the stored ratings so an edit can be reversed out of the aggregates"""
+    instance._previous_rating_values = None
+    if instance.pk:
+        previous = Review.objects.filter(pk=instance.pk).first()
+        if previous is not None:
+            instance._previous_rating_values = get_rating_values(previous)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_aggregates(sender, instance, created, **kwargs):
+    """Fold the saved review into the skill and user rating aggregates"""
+    previous = getattr(instance, '_previous_rating_values', None)
+    current = get_rating_values(instance)
+    if previous == current:
+        return
+    with transaction.atomic():
+        if previous is not None:
+            apply_review(previous, -1)
+        apply_review(current, 1)
+
+
+@receiver(post_delete, sender=Review)
+def remove_rating_aggregates(sender, instance, **kwargs):
+    """Take a deleted review out of the skill and user rating aggregates"""
+    apply_review(get_rating_values(instance), -1)
 
 
 @receiver(post_save, sender=Review)
 def create_review_notification(sender, instance, created, **kwargs):
-    """Create notification when a review is created"""
+    """Queue a notification when a review is created"""
     if created:
-        Notification.objects.create(
-            user=instance.reviewed_user,
-            notification_type='new_review',
-            title='New Review Received',
-            message=f'{instance.reviewer.username} left you a {instance.rating}-star review',
-            link=f'/users/profile/{instance.reviewed_user.username}/'
-        )
+        dispatch.enqueue(dispatch.review_created(instance))
@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from skills.models import Skill
+from users.models import User
+from .models import Review
+
+
+class RatingAggregateTests(TestCase):
+    """Skill and user rating aggregates follow review saves and deletes"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.skill = Skill.objects.create(user=self.owner, title='Guitar', description='Chords and scales')
+
+    def review(self, rating, knowledge=5):
+        self.reviewers = getattr(self, 'reviewers', 0) + 1
+        reviewer = User.objects.create_user(f'learner{self.reviewers}', f'learner{self.reviewers}@example.com', 'password')
+        return Review.objects.create(
+            reviewer=reviewer, reviewed_user=self.owner, skill=self.skill, rating=rating, comment='Thanks',
+            communication_rating=4, knowledge_rating=knowledge, patience_rating=3,
+        )
+
+    def assertAggregates(self, average, count):
+        for obj in (Skill.objects.get(pk=self.skill.pk), User.objects.get(pk=self.owner.pk)):
+            self.assertEqual((obj.get_average_rating(), obj.get_total_reviews()), (average, count))
+
+    def test_create(self):
+        self.review(5)
+        self.review(2, knowledge=3)
+        self.assertAggregates(3.5, 2)
+        skill = Skill.objects.get(pk=self.skill.pk)
+        self.assertEqual(skill.get_average_knowledge_rating(), 4.0)
+        self.assertEqual(skill.get_average_communication_rating(), 4.0)
+
+    def test_edit_replaces_the_old_rating(self):
+        review = self.review(5)
+        self.review(3)
+        review.rating = 1
+        review.save()
+        self.assertAggregates(2.0, 2)
+
+    def test_delete(self):
+        review = self.review(5)
+        self.review(3)
+        review.delete()
+        self.assertAggregates(3.0, 1)
+        Review.objects.get().delete()
+        self.assertAggregates(0, 0)
+
+    def test_rebuild_repairs_drift(self):
+        self.review(4)
+        self.review(2)
+        Skill.objects.filter(pk=self.skill.pk).update(rating_sum=0, rating_count=9, rating_average=0)
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+        self.assertAggregates(3.0, 2)
@@ -5,6 +5,7 @@ from .models import Review
 from .forms import ReviewForm
 from requests.models import SkillRequest
 from users.models import User
+from skillswap.routers import replica_reads
 
 
 @login_required
@@ -49,6 +50,7 @@ def create_review(request, request_id):
 
 
 @login_required
+@replica_reads
 def user_reviews(request, username):
     """View all reviews for a user"""
     user = get_object_or_404(User, username=username)
@@ -65,6 +67,7 @@ def user_reviews(request, username):
 
 
 @login_required
+@replica_reads
 def skill_reviews(request, skill_id):
     """View all reviews for a skill"""
     from skills.models import Skill
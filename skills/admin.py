@@ -5,8 +5,9 @@ from .models import Category, Skill
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """Category admin"""
-    list_display = ['name', 'get_skill_count', 'created_at']
+    list_display = ['name', 'active_skill_count', 'created_at']
     search_fields = ['name', 'description']
+    readonly_fields = ['active_skill_count']
     prepopulated_fields = {'icon': ('name',)}
 
 
@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class SkillsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'skills'
+    
+    def ready(self):
+        import skills.signals
+        post_migrate.connect(skills.signals.setup_search_index, sender=self)
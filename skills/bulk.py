@@ -0,0 +1,426 @@
+"""
+Bulk import and export of users, their skills and the skill catalogue.
+
+Imports read CSV or JSON Lines a row at a time and validate each row with
+the rules of the forms the site already uses (UserUpdateForm, UserSkillForm
+and SkillForm). Valid rows are inserted in chunks with bulk_create, one
+transaction per chunk, and rows that fail are reported with their line
+number and skipped. bulk_create sends no signals, so the work the signals
+would have done row by row (search indexing, category counts, the importing
+users' swap matches, recommendations, dashboard stats and the catalogue
+cache) runs once in a batched pass after the last chunk.
+
+Imported users sign in through a password reset. Until then they share a
+random password that is hashed once per import, so no row pays for
+password hashing (and, unlike an unusable password, it does not shut them
+out of the reset form).
+
+Exports stream a queryset with .iterator(), so memory use stays flat
+however large the table is.
+"""
+import csv
+import json
+from itertools import islice
+
+from django import forms
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils.crypto import get_random_string
+
+from dashboard import recommendations
+from dashboard.stats import invalidate_user_stats
+from reviews.models import Review
+from users.forms import UserSkillForm, UserUpdateForm
+from users.matching import update_user_matches
+from users.models import User, UserSkill
+from .caching import bump_catalogue_version
+from .counts import rebuild_category_counts
+from .forms import SkillForm
+from .models import Category, Skill
+from .search import get_search_backend
+from .vocabulary import normalize_skill_name
+
+FORMATS = ('csv', 'jsonl')
+
+IMPORT_CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
+
+
+def guess_format(path, default='csv'):
+    """The format named by a file extension"""
+    for fmt in FORMATS:
+        if path.lower().endswith(f'.{fmt}'):
+            return fmt
+    return default
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row) pairs; a row that cannot be parsed comes back as None"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f'Unknown format {fmt!r}; expected one of {", ".join(FORMATS)}')
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# Import forms: the site's forms, minus the per-row queries. Uniqueness is
+# checked once per chunk by the importer instead of once per row.
+
+class UserImportForm(UserUpdateForm):
+    """UserUpdateForm without the profile image"""
+
+    class Meta(UserUpdateForm.Meta):
+        fields = ['username', 'email', 'first_name', 'last_name', 'bio', 'location', 'phone', 'date_of_birth']
+
+    def validate_unique(self):
+        pass
+
+
+class UserSkillImportForm(UserSkillForm):
+    """UserSkillForm; the owner is named by a username column"""
+
+    def validate_unique(self):
+        pass
+
+
+class SkillImportForm(SkillForm):
+    """SkillForm with the category given by name"""
+    category = forms.CharField()
+
+    def __init__(self, *args, categories=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.categories = categories or {}
+
+    def clean_category(self):
+        name = self.cleaned_data['category'].strip()
+        try:
+            return self.categories[name.lower()]
+        except KeyError:
+            raise ValidationError(f'Unknown category "{name}".')
+
+    def _get_validation_exclusions(self):
+        # clean_category() has found the category; skip the per-row existence query
+        return super()._get_validation_exclusions() | {'category'}
+
+
+class ImportReport:
+    """Running totals of an import; ``errors`` holds (line number, message) pairs"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+    def add_form_errors(self, line, form):
+        for field, messages in form.errors.items():
+            for message in messages:
+                self.add_error(line, message if field == '__all__' else f'{field}: {message}')
+
+
+class Importer:
+    """
+    Validates and builds the model instances of one kind of row. prepare()
+    looks up everything a chunk refers to in a few queries, build() turns a
+    valid form into an unsaved instance and finish() runs the deferred side
+    effects for everything created.
+    """
+    model = None
+    form_class = None
+
+    def __init__(self):
+        self.created_ids = []
+        # The web forms always post every choice; a file may leave them out
+        self.defaults = {
+            name: self.model._meta.get_field(name).get_default()
+            for name in self.form_class._meta.fields
+            if self.model._meta.get_field(name).has_default()
+        }
+
+    def prepare(self, rows):
+        return {}
+
+    def with_defaults(self, row):
+        return {**self.defaults, **{key: value for key, value in row.items() if value not in ('', None)}}
+
+    def get_form(self, row, context):
+        return self.form_class(self.with_defaults(row))
+
+    def build(self, form, context):
+        return form.save(commit=False)
+
+    def created(self, instances):
+        self.created_ids.extend(instance.pk for instance in instances)
+
+    def finish(self):
+        pass
+
+
+def _usernames(rows):
+    return {str(row.get('username', '')).strip() for _, row in rows if row}
+
+
+def _user_ids(rows):
+    return dict(User.objects.filter(username__in=_usernames(rows)).values_list('username', 'id'))
+
+
+class UserImporter(Importer):
+    """Columns: username, email, first_name, last_name, bio, location, phone, date_of_birth"""
+    model = User
+    form_class = UserImportForm
+
+    def __init__(self):
+        super().__init__()
+        self.password = make_password(get_random_string(32))
+
+    def prepare(self, rows):
+        return {'taken': set(_user_ids(rows)), 'seen': set()}
+
+    def build(self, form, context):
+        user = form.save(commit=False)
+        if user.username in context['taken'] or user.username in context['seen']:
+            raise ValidationError(f'username: User "{user.username}" already exists.')
+        context['seen'].add(user.username)
+        user.password = self.password
+        # save() is bypassed, so fill in what it maintains
+        user.update_profile_completion()
+        return user
+
+
+class UserSkillImporter(Importer):
+    """Columns: username, skill_name, skill_type, proficiency_level"""
+    model = UserSkill
+    form_class = UserSkillImportForm
+
+    def __init__(self):
+        super().__init__()
+        self.user_ids = set()
+        self.wanting_user_ids = set()
+
+    def prepare(self, rows):
+        user_ids = _user_ids(rows)
+        existing = set(
+            UserSkill.objects.filter(user_id__in=user_ids.values())
+            .values_list('user_id', 'skill_name', 'skill_type')
+        )
+        return {'user_ids': user_ids, 'existing': existing}
+
+    def get_form(self, row, context):
+        form = super().get_form(row, context)
+        form.username = str(row.get('username', '')).strip()
+        return form
+
+    def build(self, form, context):
+        user_id = context['user_ids'].get(form.username)
+        if user_id is None:
+            raise ValidationError(f'username: No user "{form.username}".')
+        user_skill = form.save(commit=False)
+        key = (user_id, user_skill.skill_name, user_skill.skill_type)
+        if key in context['existing']:
+            raise ValidationError(f'{form.username} already lists {user_skill.skill_name} ({user_skill.skill_type}).')
+        context['existing'].add(key)
+        user_skill.user_id = user_id
+        user_skill.normalized_name = normalize_skill_name(user_skill.skill_name)
+        return user_skill
+
+    def created(self, instances):
+        super().created(instances)
+        for user_skill in instances:
+            self.user_ids.add(user_skill.user_id)
+            if user_skill.skill_type == 'want':
+                self.wanting_user_ids.add(user_skill.user_id)
+
+    def finish(self):
+        # Only the importing users' neighbourhoods, a chunk of users at a time
+        for user_ids in _chunks(sorted(self.user_ids), IMPORT_CHUNK_SIZE):
+            update_user_matches(*user_ids)
+        recommendations.invalidate_user_recommendations(*self.wanting_user_ids)
+
+
+class SkillImporter(Importer):
+    """Columns: username, title, description, category (by name), level, duration, location_preference"""
+    model = Skill
+    form_class = SkillImportForm
+
+    def __init__(self):
+        super().__init__()
+        self.categories = {category.name.lower(): category for category in Category.objects.all()}
+        self.owner_ids = set()
+
+    def prepare(self, rows):
+        return {'user_ids': _user_ids(rows)}
+
+    def get_form(self, row, context):
+        form = self.form_class(self.with_defaults(row), categories=self.categories)
+        form.username = str(row.get('username', '')).strip()
+        return form
+
+    def build(self, form, context):
+        user_id = context['user_ids'].get(form.username)
+        if user_id is None:
+            raise ValidationError(f'username: No user "{form.username}".')
+        skill = form.save(commit=False)
+        skill.user_id = user_id
+        return skill
+
+    def created(self, instances):
+        super().created(instances)
+        self.owner_ids.update(skill.user_id for skill in instances)
+
+    def finish(self):
+        if not self.created_ids:
+            return
+        backend = get_search_backend()
+        for skill_ids in _chunks(self.created_ids, IMPORT_CHUNK_SIZE):
+            backend.index_skills(skill_ids)
+            recommendations.refresh_skills(*skill_ids)
+        rebuild_category_counts()
+        bump_catalogue_version()
+        invalidate_user_stats(*self.owner_ids)
+
+
+IMPORTERS = {
+    'users': UserImporter,
+    'user_skills': UserSkillImporter,
+    'skills': SkillImporter,
+}
+
+
+def _insert(importer, pending, report):
+    """Insert a chunk's instances in one statement, or row by row if one of them conflicts"""
+    try:
+        with transaction.atomic():
+            return importer.model.objects.bulk_create([instance for _, instance in pending])
+    except IntegrityError:
+        # Most likely a row written by someone else since prepare()
+        created = []
+        for line, instance in pending:
+            try:
+                with transaction.atomic():
+                    created.extend(importer.model.objects.bulk_create([instance]))
+            except IntegrityError as error:
+                report.add_error(line, f'Not saved: {error}')
+        return created
+
+
+def import_rows(kind, rows, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Import (line number, row) pairs, as produced by read_rows(), as ``kind``
+    ('users', 'user_skills' or 'skills'). ``progress(report)`` is called
+    after every chunk. Returns the ImportReport.
+    """
+    importer = IMPORTERS[kind]()
+    report = ImportReport(kind)
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            context = importer.prepare(chunk)
+            pending = []
+            for line, row in chunk:
+                report.rows += 1
+                if row is None:
+                    report.add_error(line, 'Not a valid row.')
+                    continue
+                form = importer.get_form(row, context)
+                if not form.is_valid():
+                    report.add_form_errors(line, form)
+                    continue
+                try:
+                    pending.append((line, importer.build(form, context)))
+                except ValidationError as error:
+                    for message in error.messages:
+                        report.add_error(line, message)
+            created = _insert(importer, pending, report) if pending else []
+            importer.created(created)
+            report.created += len(created)
+            if progress is not None:
+                progress(report)
+    finally:
+        # Whatever was committed gets its side effects, even if a chunk failed
+        importer.finish()
+    return report
+
+
+# Exports: (column, lookup) pairs per kind. The skill, user and user skill
+# columns are the ones the importers read, so an export can be imported
+# elsewhere.
+
+EXPORT_COLUMNS = {
+    'users': [
+        ('username', 'username'), ('email', 'email'), ('first_name', 'first_name'),
+        ('last_name', 'last_name'), ('bio', 'bio'), ('location', 'location'), ('phone', 'phone'),
+        ('date_of_birth', 'date_of_birth'), ('date_joined', 'date_joined'),
+        ('rating_average', 'rating_average'), ('rating_count', 'rating_count'),
+    ],
+    'user_skills': [
+        ('username', 'user__username'), ('skill_name', 'skill_name'),
+        ('skill_type', 'skill_type'), ('proficiency_level', 'proficiency_level'),
+    ],
+    'skills': [
+        ('id', 'id'), ('username', 'user__username'), ('title', 'title'),
+        ('description', 'description'), ('category', 'category__name'), ('level', 'level'),
+        ('duration', 'duration'), ('location_preference', 'location_preference'),
+        ('is_active', 'is_active'), ('views_count', 'views_count'),
+        ('rating_average', 'rating_average'), ('rating_count', 'rating_count'),
+        ('created_at', 'created_at'),
+    ],
+    'reviews': [
+        ('id', 'id'), ('reviewer', 'reviewer__username'), ('reviewed_user', 'reviewed_user__username'),
+        ('skill_id', 'skill_id'), ('rating', 'rating'),
+        ('communication_rating', 'communication_rating'), ('knowledge_rating', 'knowledge_rating'),
+        ('patience_rating', 'patience_rating'), ('comment', 'comment'), ('created_at', 'created_at'),
+    ],
+}
+
+EXPORT_MODELS = {
+    'users': User,
+    'user_skills': UserSkill,
+    'skills': Skill,
+    'reviews': Review,
+}
+
+
+def export_queryset(kind):
+    columns = EXPORT_COLUMNS[kind]
+    return EXPORT_MODELS[kind].objects.order_by('pk').values_list(*(lookup for _, lookup in columns))
+
+
+def export_rows(kind, stream, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write every ``kind`` row ('users', 'user_skills', 'skills' or 'reviews') to ``stream``; returns the count"""
+    names = [name for name, _ in EXPORT_COLUMNS[kind]]
+    rows = export_queryset(kind).iterator(chunk_size=chunk_size)
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(names)
+        for row in rows:
+            writer.writerow(['' if value is None else value for value in row])
+            count += 1
+    elif fmt == 'jsonl':
+        encoder = DjangoJSONEncoder(separators=(',', ':'), ensure_ascii=False)
+        for row in rows:
+            stream.write(encoder.encode(dict(zip(names, row))) + '\n')
+            count += 1
+    else:
+        raise ValueError(f'Unknown format {fmt!r}; expected one of {", ".join(FORMATS)}')
+    return count
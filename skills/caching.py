@@ -0,0 +1,139 @@
+"""
+Caching for the public catalogue pages.
+
+Cached pages and fragments are keyed on a catalogue version that
+skills.signals bumps whenever a skill, category or review changes (and
+when a skill owner's name or avatar changes), so a change is visible on
+the next request rather than after a timeout. The timeouts only bound how
+long live view counts may lag and how long unused entries are kept.
+
+Anonymous GET requests get whole responses from the page cache. Logged-in
+users still run the view, but skill cards and category tiles are rendered
+from the fragment cache ({% cachefragment %} in skills.templatetags).
+Every lookup is counted in the monitoring registry as cache_hits_total /
+cache_misses_total, labelled with the page or fragment name.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from monitoring.metrics import registry
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+
+
+def get_cache_settings():
+    return {
+        'PAGE_TIMEOUT': 300,
+        'FRAGMENT_TIMEOUT': 3600,
+        **getattr(settings, 'CATALOGUE_CACHE', {}),
+    }
+
+
+def get_catalogue_version():
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        # Start from the clock so an evicted version never repeats an old one
+        cache.add(CATALOGUE_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATALOGUE_VERSION_KEY, 0)
+    return version
+
+
+async def aget_catalogue_version():
+    version = await cache.aget(CATALOGUE_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOGUE_VERSION_KEY, int(time.time() * 1000), None)
+        version = await cache.aget(CATALOGUE_VERSION_KEY, 0)
+    return version
+
+
+def bump_catalogue_version():
+    """Invalidate every cached catalogue page and fragment"""
+    try:
+        cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOGUE_VERSION_KEY, int(time.time() * 1000), None)
+
+
+def record_lookup(name, hit):
+    registry.observe(name, **{'cache_hits_total' if hit else 'cache_misses_total': 1})
+
+
+def _cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        # A pending flash message is specific to this visitor
+        and 'messages' not in request.COOKIES
+    )
+
+
+def _page_key(name, request, version):
+    path = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()
+    return f'page:{name}:{version}:{path}'
+
+
+def _cached_response(cached):
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def _storable(response):
+    # Responses that set cookies (CSRF, messages) belong to one visitor
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def cache_anonymous_page(name, on_hit=None):
+    """
+    Serve the view's responses to anonymous visitors from the cache, keyed on
+    the full path and the catalogue version. ``on_hit(request, *args,
+    **kwargs)`` runs for cached responses too, for side effects such as
+    counting a view. Coroutine views get a coroutine wrapper.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # Loading request.user reads the session and user tables
+                if not await sync_to_async(_cacheable)(request):
+                    return await view(request, *args, **kwargs)
+                key = _page_key(name, request, await aget_catalogue_version())
+                cached = await cache.aget(key)
+                record_lookup(f'page:{name}', cached is not None)
+                if cached is not None:
+                    if on_hit is not None:
+                        await sync_to_async(on_hit)(request, *args, **kwargs)
+                    return _cached_response(cached)
+
+                response = await view(request, *args, **kwargs)
+                if _storable(response):
+                    await cache.aset(key, (response.content, response['Content-Type']), get_cache_settings()['PAGE_TIMEOUT'])
+                    response['X-Cache'] = 'MISS'
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable(request):
+                return view(request, *args, **kwargs)
+            key = _page_key(name, request, get_catalogue_version())
+            cached = cache.get(key)
+            record_lookup(f'page:{name}', cached is not None)
+            if cached is not None:
+                if on_hit is not None:
+                    on_hit(request, *args, **kwargs)
+                return _cached_response(cached)
+
+            response = view(request, *args, **kwargs)
+            if _storable(response):
+                cache.set(key, (response.content, response['Content-Type']), get_cache_settings()['PAGE_TIMEOUT'])
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,219 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+class LocalViewBuffer:
+    """Pending view increments held in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)
+
+    def add(self, skill_id, count=1):
+        with self._lock:
+            self._pending[skill_id] += count
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = dict(self._pending), defaultdict(int)
+        return pending
+
+
+class CacheViewBuffer:
+    """
+    Pending view increments kept in a shared cache so every worker sees the
+    same deltas. Counters use atomic incr/decr; the registry of dirty skill
+    ids is guarded by a short-lived add() lock. Every add() checks that its
+    skill is registered, so a registration that timed out on the lock (or
+    raced with a drain) is made by the next view of that skill.
+    """
+
+    prefix = 'skill-views'
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def _key(self, skill_id):
+        return f'{self.prefix}:pending:{skill_id}'
+
+    def _registry_key(self):
+        return f'{self.prefix}:dirty'
+
+    def _update_registry(self, update):
+        lock = f'{self.prefix}:lock'
+        for _ in range(50):
+            if self.cache.add(lock, 1, timeout=5):
+                try:
+                    registry = set(self.cache.get(self._registry_key(), ()))
+                    result = update(registry)
+                    self.cache.set(self._registry_key(), list(registry), timeout=None)
+                    return result
+                finally:
+                    self.cache.delete(lock)
+            time.sleep(0.01)
+        raise TimeoutError(f'{lock} is held by another worker')
+
+    def _register(self, skill_id):
+        try:
+            self._update_registry(lambda registry: registry.add(skill_id))
+        except TimeoutError:
+            logger.warning('Skill %s has pending views but could not be registered yet', skill_id)
+
+    def add(self, skill_id, count=1):
+        key = self._key(skill_id)
+        try:
+            self.cache.incr(key, count)
+        except ValueError:
+            if not self.cache.add(key, count, timeout=None):
+                self.cache.incr(key, count)
+        if skill_id not in self.cache.get(self._registry_key(), ()):
+            self._register(skill_id)
+
+    def snapshot(self):
+        skill_ids = self.cache.get(self._registry_key(), ())
+        values = self.cache.get_many([self._key(skill_id) for skill_id in skill_ids])
+        return {
+            skill_id: values[self._key(skill_id)]
+            for skill_id in skill_ids
+            if values.get(self._key(skill_id))
+        }
+
+    def drain(self):
+        def take(registry):
+            skill_ids = list(registry)
+            registry.clear()
+            return skill_ids
+
+        try:
+            skill_ids = self._update_registry(take)
+        except TimeoutError:
+            # Everything stays pending for the next flush
+            return {}
+        values = self.cache.get_many([self._key(skill_id) for skill_id in skill_ids])
+        drained = {}
+        for skill_id in skill_ids:
+            key = self._key(skill_id)
+            count = values.get(key)
+            if not count:
+                continue
+            drained[skill_id] = count
+            remaining = self.cache.decr(key, count)
+            if remaining > 0:
+                # Views recorded since the snapshot stay pending for the next flush
+                self._register(skill_id)
+            else:
+                self.cache.delete(key)
+        return drained
+
+
+class ViewCounter:
+    """
+    Buffers skill views and writes them in batches, one
+    ``UPDATE ... SET views_count = views_count + n`` per distinct delta,
+    once FLUSH_THRESHOLD views are pending or FLUSH_INTERVAL seconds pass.
+    """
+
+    def __init__(self, buffer, flush_interval=30, flush_threshold=100):
+        self.buffer = buffer
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._lock = threading.Lock()
+        self._recorded = 0
+        self._last_flush = time.monotonic()
+
+    def record(self, skill_id, count=1):
+        """Buffer a view and flush if a threshold was crossed"""
+        self.buffer.add(skill_id, count)
+        with self._lock:
+            self._recorded += count
+            due = (
+                self._recorded >= self.flush_threshold or
+                time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            if due:
+                self._recorded = 0
+                self._last_flush = time.monotonic()
+        if due:
+            self.flush()
+
+    def pending(self, skill_ids=None):
+        """Views recorded but not yet written, by skill id"""
+        pending = self.buffer.snapshot()
+        if skill_ids is None:
+            return pending
+        return {skill_id: pending[skill_id] for skill_id in skill_ids if skill_id in pending}
+
+    def flush(self):
+        """
+        Write every pending delta to the database; returns the number of
+        skills updated. Deltas whose UPDATE fails go back into the buffer.
+        """
+        from .models import Skill
+
+        by_delta = defaultdict(list)
+        for skill_id, count in self.buffer.drain().items():
+            by_delta[count].append(skill_id)
+        written = []
+        try:
+            for count, skill_ids in by_delta.items():
+                Skill.objects.filter(pk__in=skill_ids).update(views_count=F('views_count') + count)
+                written.append(count)
+        except Exception:
+            for count, skill_ids in by_delta.items():
+                if count not in written:
+                    for skill_id in skill_ids:
+                        self.buffer.add(skill_id, count)
+            raise
+        return sum(len(skill_ids) for skill_ids in by_delta.values())
+
+    def annotate_live_views(self, queryset):
+        """Annotate ``live_views_count``: the stored count plus any pending views"""
+        whens = [When(pk=skill_id, then=Value(count)) for skill_id, count in self.pending().items()]
+        live = F('views_count')
+        if whens:
+            live = live + Case(*whens, default=Value(0), output_field=IntegerField())
+        return queryset.annotate(live_views_count=live)
+
+
+BUFFERS = {
+    'local': LocalViewBuffer,
+    'cache': CacheViewBuffer,
+}
+
+_view_counter = None
+
+
+def get_view_counter():
+    """Return the process-wide view counter configured by SKILL_VIEW_COUNTER"""
+    global _view_counter
+    if _view_counter is None:
+        options = getattr(settings, 'SKILL_VIEW_COUNTER', {})
+        buffer = BUFFERS[options.get('BACKEND', 'local')]()
+        _view_counter = ViewCounter(
+            buffer,
+            flush_interval=options.get('FLUSH_INTERVAL', 30),
+            flush_threshold=options.get('FLUSH_THRESHOLD', 100),
+        )
+        atexit.register(_flush_at_exit, _view_counter)
+    return _view_counter
+
+
+def _flush_at_exit(counter):
+    try:
+        counter.flush()
+    except Exception:
+        # The database may already be gone at interpreter shutdown
+        pass
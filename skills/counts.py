@@ -0,0 +1,41 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def counted_category(skill):
+    """The category whose active_skill_count includes ``skill``, if any"""
+    return skill.category_id if skill.is_active else None
+
+
+def apply_skill(category_id, sign):
+    """Add (sign=1) or remove (sign=-1) one active skill from a category's count"""
+    from .models import Category
+
+    if category_id:
+        Category.objects.filter(pk=category_id).update(active_skill_count=F('active_skill_count') + sign)
+
+
+def _active_skill_counts():
+    from .models import Skill
+
+    return Coalesce(
+        Subquery(
+            Skill.objects.filter(category=OuterRef('pk'), is_active=True)
+            .order_by().values('category').annotate(total=Count('pk')).values('total')
+        ),
+        Value(0),
+    )
+
+
+def rebuild_category_counts():
+    """
+    Recompute every category's active_skill_count from the skills table in one
+    UPDATE. Returns (categories, drifted): how many rows were rewritten and
+    how many of them held a wrong count.
+    """
+    from .models import Category
+
+    drifted = Category.objects.annotate(actual=_active_skill_counts()).exclude(
+        active_skill_count=F('actual')
+    ).count()
+    return Category.objects.update(active_skill_count=_active_skill_counts()), drifted
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from skills.bulk import EXPORT_CHUNK_SIZE, EXPORT_COLUMNS, FORMATS, export_rows, guess_format
+
+
+class Command(BaseCommand):
+    help = 'Stream users, user skills, skills or reviews to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORT_COLUMNS))
+        parser.add_argument('--output', '-o', help='File to write; standard output if omitted')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension, else csv')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['output']
+        fmt = options['format'] or guess_format(path or '')
+        if not path:
+            export_rows(options['kind'], self.stdout, fmt, options['chunk_size'])
+            return
+
+        try:
+            with open(path, 'w', newline='', encoding='utf-8') as stream:
+                count = export_rows(options['kind'], stream, fmt, options['chunk_size'])
+        except OSError as error:
+            raise CommandError(f'Cannot write {path}: {error}')
+        self.stdout.write(self.style.SUCCESS(f'Exported {count} {options["kind"]} rows to {path}.'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from skills.counters import get_view_counter
+
+
+class Command(BaseCommand):
+    help = 'Write buffered skill view counts to the database'
+
+    def handle(self, *args, **options):
+        updated = get_view_counter().flush()
+        self.stdout.write(self.style.SUCCESS(f'Flushed view counts for {updated} skills.'))
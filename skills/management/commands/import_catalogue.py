@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from skills.bulk import FORMATS, IMPORT_CHUNK_SIZE, IMPORTERS, guess_format, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Import users, user skills or skills from a CSV or JSON Lines file in '
+        'chunked bulk inserts, reporting the rows that fail validation'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORTERS))
+        parser.add_argument('path', help='File to read, or - for standard input')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension, else csv')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+
+        def progress(report):
+            self.stdout.write(f'{report.kind}: {report.rows} rows read, {report.created} created, {len(report.errors)} rejected')
+
+        if path == '-':
+            report = import_rows(options['kind'], read_rows(sys.stdin, fmt), options['chunk_size'], progress)
+        else:
+            try:
+                # utf-8-sig drops the byte order mark spreadsheet exports start with
+                with open(path, newline='', encoding='utf-8-sig') as stream:
+                    report = import_rows(options['kind'], read_rows(stream, fmt), options['chunk_size'], progress)
+            except OSError as error:
+                raise CommandError(f'Cannot read {path}: {error}')
+
+        for line, message in report.errors:
+            self.stderr.write(f'Line {line}: {message}')
+        if report.errors:
+            raise CommandError(
+                f'Imported {report.created} of {report.rows} {report.kind} rows; {len(report.errors)} error(s) above.'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Imported {report.created} {report.kind} rows.'))
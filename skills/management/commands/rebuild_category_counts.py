@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from skills.counts import rebuild_category_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored active skill count of every category from the skills table'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            categories, drifted = rebuild_category_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt active skill counts for {categories} categories ({drifted} had drifted).'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from skills.models import Skill
+from skills.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Create the skill search index if needed and re-index every skill'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.setup()
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {Skill.objects.count()} skills with {backend.__class__.__name__}.'
+        ))
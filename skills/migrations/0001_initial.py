@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('icon', models.CharField(default='fa-folder', help_text='FontAwesome icon class', max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating_sum', models.PositiveIntegerField(default=0, editable=False)),
+                ('rating_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('rating_average', models.FloatField(db_index=True, default=0, editable=False)),
+                ('communication_rating_sum', models.PositiveIntegerField(default=0, editable=False)),
+                ('knowledge_rating_sum', models.PositiveIntegerField(default=0, editable=False)),
+                ('patience_rating_sum', models.PositiveIntegerField(default=0, editable=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(help_text="Describe what you'll teach")),
+                ('level', models.CharField(choices=[('beginner', 'Beginner'), ('intermediate', 'Intermediate'), ('advanced', 'Advanced'), ('expert', 'Expert')], default='intermediate', max_length=20)),
+                ('duration', models.CharField(blank=True, help_text="e.g., '2 hours', '1 week'", max_length=100)),
+                ('location_preference', models.CharField(choices=[('online', 'Online'), ('in_person', 'In Person'), ('both', 'Both')], default='both', max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('views_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='skills', to='skills.category')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_active_skill_counts(apps, schema_editor):
+    # skills.counts.rebuild_category_counts() against the historical models
+    Category = apps.get_model('skills', 'Category')
+    Skill = apps.get_model('skills', 'Skill')
+    active = (
+        Skill.objects.filter(category=OuterRef('pk'), is_active=True)
+        .order_by().values('category').annotate(total=Count('pk')).values('total')
+    )
+    Category.objects.update(active_skill_count=Coalesce(Subquery(active), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('skills', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='active_skill_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_active_skill_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['-active_skill_count'], name='category_skill_count_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.urls import reverse
+from reviews.mixins import RatingAggregateMixin
 
 
 class Category(models.Model):
@@ -9,23 +10,28 @@ class Category(models.Model):
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, default='fa-folder', help_text="FontAwesome icon class")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by skills.counts; rebuild with manage.py rebuild_category_counts
+    active_skill_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['name']
         verbose_name_plural = 'Categories'
+        indexes = [
+            models.Index(fields=['-active_skill_count'], name='category_skill_count_idx'),
+        ]
     
     def __str__(self):
         return self.name
     
     def get_skill_count(self):
-        """Get number of skills in this category"""
-        return self.skills.count()
+        """Get number of active skills in this category"""
+        return self.active_skill_count
     
     def get_absolute_url(self):
         return reverse('skills:category_detail', kwargs={'pk': self.pk})
 
 
-class Skill(models.Model):
+class Skill(RatingAggregateMixin, models.Model):
     """Skills that can be taught or learned"""
     
     SKILL_LEVEL_CHOICES = [
@@ -61,6 +67,28 @@ class Skill(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # Every listing reads active skills only, so the indexes are partial on
+        # is_active rather than leading with it: SQLite cannot seek on the bare
+        # boolean test Django emits for filter(is_active=True)
+        indexes = [
+            # Category pages and the category filter of the skill list
+            models.Index(
+                fields=['category', '-created_at'], condition=models.Q(is_active=True),
+                name='skill_active_cat_new_idx',
+            ),
+            # Default, "most popular" and "top rated" sorts
+            models.Index(
+                fields=['-created_at'], condition=models.Q(is_active=True), name='skill_active_new_idx',
+            ),
+            models.Index(
+                fields=['-views_count', '-created_at'], condition=models.Q(is_active=True),
+                name='skill_active_views_idx',
+            ),
+            models.Index(
+                fields=['-rating_average', '-created_at'], condition=models.Q(is_active=True),
+                name='skill_active_rating_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -68,19 +96,8 @@ class Skill(models.Model):
     def get_absolute_url(self):
         return reverse('skills:skill_detail', kwargs={'pk': self.pk})
     
-    def get_average_rating(self):
-        """Calculate average rating from reviews"""
-        reviews = self.reviews.all()
-        if reviews.exists():
-            total = sum(review.rating for review in reviews)
-            return round(total / reviews.count(), 1)
-        return 0
-    
-    def get_total_reviews(self):
-        """Get total number of reviews"""
-        return self.reviews.count()
-    
     def increment_views(self):
-        """Increment view count"""
+        """Record a view; the stored counter is updated in batches by skills.counters"""
+        from .counters import get_view_counter
+        get_view_counter().record(self.pk)
         self.views_count += 1
-        self.save(update_fields=['views_count'])
@@ -0,0 +1,210 @@
+"""
+Keyset (cursor) pagination for skill listings.
+
+A page is fetched with a WHERE on the sort key of the last row already shown
+instead of an OFFSET, so with an index on the sort key every page costs one
+index range scan, however deep it is. The position travels in a signed,
+opaque ``cursor`` parameter. Listing totals come from count_cached() rather
+than a COUNT(*) per request.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import QueryDict
+
+CURSOR_SALT = 'skills.pagination.cursor'
+
+
+class CursorPage:
+    """One page of results with opaque tokens for its neighbours"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, params=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.params = params if params is not None else QueryDict()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _querystring(self, cursor):
+        params = self.params.copy()
+        params['cursor'] = cursor
+        return params.urlencode()
+
+    def next_querystring(self):
+        """Current query string with the cursor moved to the next page"""
+        return self._querystring(self.next_cursor)
+
+    def previous_querystring(self):
+        return self._querystring(self.previous_cursor)
+
+
+class CursorPaginator:
+    """
+    Paginate ``queryset`` on ``ordering`` (field names, '-' for descending).
+    The last field must be unique (normally the primary key) so positions are
+    unambiguous. Rows may be model instances or .values() dicts that include
+    the ordering fields. With ``keyset=False`` the cursor carries an offset instead,
+    for orderings on computed values such as search rank that cannot be
+    compared in a WHERE clause.
+    """
+
+    def __init__(self, queryset, ordering, per_page=12, key='', keyset=True):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+        self.per_page = per_page
+        self.key = key
+        self.keyset = keyset
+
+    def _encode(self, payload):
+        return signing.dumps({'k': self.key, **payload}, salt=CURSOR_SALT, compress=True)
+
+    def _decode(self, cursor):
+        """The cursor payload, or None for a missing, tampered or foreign cursor"""
+        if not cursor:
+            return None
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(payload, dict) or payload.get('k') != self.key:
+            return None
+        return payload
+
+    def _values(self, obj):
+        values = []
+        for name, _ in self.fields:
+            if isinstance(obj, dict):
+                value = obj[name]
+            else:
+                value = obj.pk if name in ('pk', 'id') else getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    def _parse(self, values):
+        """Cursor values back as Python values; raises ValueError if they do not fit the ordering"""
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise ValueError('Cursor does not match the ordering')
+        model = self.queryset.model
+        parsed = []
+        for (name, _), value in zip(self.fields, values):
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            parsed.append(field.to_python(value))
+        return parsed
+
+    def _beyond(self, values, backwards):
+        """
+        Rows after ``values`` in the (possibly reversed) sort order, as
+        a < va OR (a = va AND (b < vb OR ...)), behind an inclusive bound on
+        the leading column so the database can seek on the index.
+        """
+        condition = None
+        for (name, descending), value in reversed(list(zip(self.fields, values))):
+            lookup = 'lt' if descending != backwards else 'gt'
+            strict = Q(**{f'{name}__{lookup}': value})
+            condition = strict if condition is None else strict | (Q(**{name: value}) & condition)
+        name, descending = self.fields[0]
+        bound = 'lte' if descending != backwards else 'gte'
+        return Q(**{f'{name}__{bound}': values[0]}) & condition
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+
+    def page(self, cursor=None, params=None):
+        query, finish = self._plan(cursor, params)
+        return finish(list(query))
+
+    def _plan(self, cursor, params):
+        """The query for a page, and a function turning its rows into the CursorPage"""
+        payload = self._decode(cursor)
+        if not self.keyset:
+            return self._offset_plan(payload, params)
+
+        values = None
+        if payload:
+            try:
+                values = self._parse(payload.get('v'))
+            except (ValidationError, ValueError, TypeError):
+                values = None
+        backwards = values is not None and bool(payload.get('p'))
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._beyond(values, backwards))
+        queryset = queryset.order_by(*(self._reversed_ordering() if backwards else self.ordering))
+
+        def finish(rows):
+            more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            if backwards:
+                rows.reverse()
+
+            next_cursor = previous_cursor = None
+            if rows:
+                # Paging forwards from a cursor there is always a page behind us,
+                # and paging backwards there is always one ahead
+                has_next = backwards or more
+                has_previous = more if backwards else values is not None
+                if has_next:
+                    next_cursor = self._encode({'v': self._values(rows[-1])})
+                if has_previous:
+                    previous_cursor = self._encode({'v': self._values(rows[0]), 'p': 1})
+            return CursorPage(rows, next_cursor, previous_cursor, params)
+        return queryset[:self.per_page + 1], finish
+
+    def _offset_plan(self, payload, params):
+        offset = payload.get('o', 0) if payload else 0
+        offset = offset if isinstance(offset, int) and offset > 0 else 0
+
+        def finish(rows):
+            more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            next_cursor = self._encode({'o': offset + self.per_page}) if more else None
+            previous_cursor = self._encode({'o': max(offset - self.per_page, 0)}) if offset else None
+            return CursorPage(rows, next_cursor, previous_cursor, params)
+        return self.queryset.order_by(*self.ordering)[offset:offset + self.per_page + 1], finish
+
+
+def _count_key(queryset, version):
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode(), usedforsecurity=False).hexdigest()
+    return f'skills:count:{version}:{digest}'
+
+
+def _count_timeout(timeout):
+    return getattr(settings, 'SKILL_LIST_COUNT_CACHE_TIMEOUT', 300) if timeout is None else timeout
+
+
+def count_cached(queryset, timeout=None):
+    """
+    Row count of ``queryset``, cached under a hash of its SQL and the
+    catalogue version, so a skill change resets it; ``timeout`` only
+    expires counts that are no longer asked for.
+    """
+    from .caching import get_catalogue_version
+
+    queryset = queryset.order_by()
+    key = _count_key(queryset, get_catalogue_version())
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, _count_timeout(timeout))
+    return count
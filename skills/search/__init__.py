@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .base import BaseSearchBackend, SimpleSearchBackend, tokenize
+
+DEFAULT_BACKENDS = {
+    'sqlite': 'skills.search.sqlite.SQLiteSearchBackend',
+    'postgresql': 'skills.search.postgres.PostgresSearchBackend',
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the configured search backend, picked by database vendor unless SKILL_SEARCH_BACKEND is set"""
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'SKILL_SEARCH_BACKEND', None) or DEFAULT_BACKENDS.get(connection.vendor)
+        backend_class = import_string(path) if path else SimpleSearchBackend
+        _backend = backend_class(connection)
+    return _backend
+
+
+def search_skills(queryset, query):
+    """Filter a Skill queryset by a free-text query, annotated with ``search_rank``"""
+    return get_search_backend().search(queryset, query)
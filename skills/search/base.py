@@ -0,0 +1,61 @@
+import re
+
+from django.db.models import Q, Value, FloatField
+
+MAX_QUERY_TERMS = 8
+
+
+def tokenize(query):
+    """Split a user query into lowercase word tokens safe to embed in a match expression"""
+    return re.findall(r'\w+', query.lower())[:MAX_QUERY_TERMS]
+
+
+class BaseSearchBackend:
+    """Interface every skill search backend implements"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def setup(self):
+        """Create the index structures if they do not exist yet"""
+
+    def rebuild(self):
+        """Re-index every skill from scratch"""
+
+    def index_skill(self, skill_id):
+        """Add or refresh a single skill in the index"""
+
+    def index_skills(self, skill_ids):
+        """Add or refresh several skills at once"""
+        for skill_id in skill_ids:
+            self.index_skill(skill_id)
+
+    def index_user_skills(self, user_id):
+        """Refresh every skill owned by a user (their username is indexed)"""
+
+    def remove_skill(self, skill_id):
+        """Drop a skill from the index"""
+
+    def search(self, queryset, query):
+        """
+        Restrict a Skill queryset to matches for ``query`` and annotate each
+        row with ``search_rank`` (higher is more relevant). Each word is
+        treated as a prefix so partial input from the AJAX search matches.
+        """
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Unindexed LIKE fallback for databases without a full-text engine"""
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            queryset = queryset.filter(
+                Q(title__icontains=term) |
+                Q(description__icontains=term) |
+                Q(user__username__icontains=term)
+            )
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
@@ -0,0 +1,77 @@
+from django.conf import settings
+
+from skills.models import Skill
+from users.models import User
+from .base import BaseSearchBackend, tokenize
+
+INDEX_TABLE = 'skills_skill_search'
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted tsvector side table with a GIN index"""
+
+    @property
+    def config(self):
+        return getattr(settings, 'SKILL_SEARCH_CONFIG', 'simple')
+
+    def _upsert_sql(self, where=''):
+        return (
+            f'INSERT INTO {INDEX_TABLE} (skill_id, document) '
+            f"SELECT s.id, "
+            f"setweight(to_tsvector(%s, s.title), 'A') || "
+            f"setweight(to_tsvector(%s, u.username), 'B') || "
+            f"setweight(to_tsvector(%s, s.description), 'C') "
+            f'FROM {Skill._meta.db_table} s JOIN {User._meta.db_table} u ON u.id = s.user_id {where} '
+            f'ON CONFLICT (skill_id) DO UPDATE SET document = EXCLUDED.document'
+        )
+
+    def setup(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {INDEX_TABLE} ('
+                f'skill_id bigint PRIMARY KEY REFERENCES {Skill._meta.db_table} (id) ON DELETE CASCADE, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_document_idx ON {INDEX_TABLE} USING GIN (document)'
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {INDEX_TABLE}')
+            cursor.execute(self._upsert_sql(), [self.config] * 3)
+
+    def index_skill(self, skill_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(self._upsert_sql('WHERE s.id = %s'), [self.config] * 3 + [skill_id])
+
+    def index_skills(self, skill_ids):
+        skill_ids = list(skill_ids)
+        if not skill_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(self._upsert_sql('WHERE s.id = ANY(%s)'), [self.config] * 3 + [skill_ids])
+
+    def index_user_skills(self, user_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(self._upsert_sql('WHERE s.user_id = %s'), [self.config] * 3 + [user_id])
+
+    def remove_skill(self, skill_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE skill_id = %s', [skill_id])
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.extra(
+            tables=[INDEX_TABLE],
+            where=[
+                f'{INDEX_TABLE}.skill_id = {Skill._meta.db_table}.id',
+                f'{INDEX_TABLE}.document @@ to_tsquery(%s, %s)',
+            ],
+            params=[self.config, tsquery],
+            select={'search_rank': f'ts_rank({INDEX_TABLE}.document, to_tsquery(%s, %s))'},
+            select_params=[self.config, tsquery],
+        )
@@ -0,0 +1,81 @@
+from skills.models import Skill
+from users.models import User
+from .base import BaseSearchBackend, tokenize
+
+INDEX_TABLE = 'skills_skill_fts'
+
+# bm25() column weights for (title, description, username)
+COLUMN_WEIGHTS = '10.0, 1.0, 2.0'
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 virtual table keyed on the skill id, with prefix indexes for type-ahead"""
+
+    def _source_sql(self, where=''):
+        return (
+            f'SELECT s.id, s.title, s.description, u.username '
+            f'FROM {Skill._meta.db_table} s JOIN {User._meta.db_table} u ON u.id = s.user_id {where}'
+        )
+
+    def setup(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5('
+                f"title, description, username, prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE}')
+            cursor.execute(f'INSERT INTO {INDEX_TABLE} (rowid, title, description, username) {self._source_sql()}')
+
+    def index_skill(self, skill_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [skill_id])
+            cursor.execute(
+                f'INSERT INTO {INDEX_TABLE} (rowid, title, description, username) {self._source_sql("WHERE s.id = %s")}',
+                [skill_id],
+            )
+
+    def index_skills(self, skill_ids):
+        skill_ids = list(skill_ids)
+        if not skill_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(skill_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid IN ({placeholders})', skill_ids)
+            cursor.execute(
+                f'INSERT INTO {INDEX_TABLE} (rowid, title, description, username) '
+                f'{self._source_sql(f"WHERE s.id IN ({placeholders})")}',
+                skill_ids,
+            )
+
+    def index_user_skills(self, user_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {INDEX_TABLE} WHERE rowid IN '
+                f'(SELECT id FROM {Skill._meta.db_table} WHERE user_id = %s)',
+                [user_id],
+            )
+            cursor.execute(
+                f'INSERT INTO {INDEX_TABLE} (rowid, title, description, username) {self._source_sql("WHERE s.user_id = %s")}',
+                [user_id],
+            )
+
+    def remove_skill(self, skill_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {INDEX_TABLE} WHERE rowid = %s', [skill_id])
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # Join the FTS table so SQLite drives the query from the MATCH and
+        # looks skills up by primary key, instead of scanning the skills table
+        return queryset.extra(
+            tables=[INDEX_TABLE],
+            where=[f'{INDEX_TABLE}.rowid = {Skill._meta.db_table}.id', f'{INDEX_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'-bm25({INDEX_TABLE}, {COLUMN_WEIGHTS})'},
+        )
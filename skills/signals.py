@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .caching import bump_catalogue_version
+from .counts import apply_skill, counted_category
+from .models import Category, Skill
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Skill)
+def index_skill(sender, instance, **kwargs):
+    """Keep the search index in step with skill edits"""
+    get_search_backend().index_skill(instance.pk)
+
+
+@receiver(post_delete, sender=Skill)
+def unindex_skill(sender, instance, **kwargs):
+    """Drop deleted skills from the search index"""
+    get_search_backend().remove_skill(instance.pk)
+
+
+@receiver(pre_save, sender=Skill)
+def remember_counted_category(sender, instance, **kwargs):
+    """Keep the stored category and status so a change can be moved between category counts"""
+    instance._previous_counted_category = None
+    if instance.pk:
+        previous = Skill.objects.filter(pk=instance.pk).values('category_id', 'is_active').first()
+        if previous is not None and previous['is_active']:
+            instance._previous_counted_category = previous['category_id']
+
+
+@receiver(post_save, sender=Skill)
+def update_category_counts(sender, instance, **kwargs):
+    """Move the skill between category counts when its category or is_active changed"""
+    previous = getattr(instance, '_previous_counted_category', None)
+    current = counted_category(instance)
+    if previous == current:
+        return
+    with transaction.atomic():
+        apply_skill(previous, -1)
+        apply_skill(current, 1)
+
+
+@receiver(post_delete, sender=Skill)
+def remove_from_category_count(sender, instance, **kwargs):
+    """Take a deleted skill out of its category's count"""
+    apply_skill(counted_category(instance), -1)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_user_skills(sender, instance, created, update_fields=None, **kwargs):
+    """Usernames are searchable, so refresh a user's skills when theirs may have changed"""
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    get_search_backend().index_user_skills(instance.pk)
+    # Skill cards and pages show the owner's name
+    if Skill.objects.filter(user_id=instance.pk).exists():
+        transaction.on_commit(bump_catalogue_version)
+
+
+@receiver([post_save, post_delete], sender=Skill)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender='reviews.Review')
+def invalidate_catalogue_cache(sender, **kwargs):
+    """Cached catalogue pages and fragments are stale once the transaction commits"""
+    transaction.on_commit(bump_catalogue_version)
+
+
+def setup_search_index(sender, **kwargs):
+    """Create the search index tables after migrate"""
+    get_search_backend().setup()
@@ -0,0 +1,46 @@
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from skills.caching import get_cache_settings, get_catalogue_version, record_lookup
+
+register = template.Library()
+
+
+class CatalogueFragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        # One version lookup per template render, however many fragments it has
+        if self not in context.render_context:
+            context.render_context[self] = get_catalogue_version()
+        vary_on = [context.render_context[self], *(var.resolve(context) for var in self.vary_on)]
+        key = make_template_fragment_key(f'catalogue.{name}', vary_on)
+        value = cache.get(key)
+        record_lookup(f'fragment:{name}', value is not None)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, get_cache_settings()['FRAGMENT_TIMEOUT'])
+        return value
+
+
+@register.tag('cachefragment')
+def do_cachefragment(parser, token):
+    """
+    Cache a piece of a catalogue page until the catalogue changes:
+
+        {% cachefragment "skill_card" skill.pk skill.views_count %} ... {% endcachefragment %}
+
+    The remaining arguments are extra values the fragment varies on.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return CatalogueFragmentNode(
+        nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]]
+    )
@@ -0,0 +1,445 @@
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from dashboard import recommendations
+from dashboard.stats import get_user_stats
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse, QueryDict
+from django.db import OperationalError, connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from reviews.models import Review
+from users.models import SwapMatch, User, UserSkill
+from .bulk import import_rows
+from .caching import bump_catalogue_version, cache_anonymous_page
+from .counters import CacheViewBuffer, LocalViewBuffer, ViewCounter
+from .models import Category, Skill
+from .pagination import CURSOR_SALT, CursorPaginator, count_cached
+from .search import search_skills
+
+
+class ImportRefreshTests(TestCase):
+    """Imports refresh what the skipped signals would have"""
+
+    def setUp(self):
+        cache.clear()
+        Category.objects.create(name='Music')
+        self.owner = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.learner = User.objects.create_user('learner', 'learner@example.com', 'password')
+
+    def test_skill_import_reaches_recommendations_and_stats(self):
+        index = recommendations.get_skill_index()
+        self.assertEqual(get_user_stats(self.owner)['total_skills'], 0)
+        report = import_rows('skills', [(1, {
+            'username': 'teacher', 'title': 'Guitar', 'description': 'Chords and scales', 'category': 'Music',
+        })])
+        self.assertFalse(report.errors)
+        skill = Skill.objects.get(title='Guitar')
+        self.assertIn(skill.pk, index.rows)
+        self.assertEqual(index.version, recommendations._get_version(recommendations.CATALOGUE_VERSION_KEY))
+        self.assertEqual(get_user_stats(self.owner)['total_skills'], 1)
+
+    def test_user_skill_import_updates_only_the_importing_users(self):
+        UserSkill.objects.create(user=self.owner, skill_name='Guitar', skill_type='offer')
+        UserSkill.objects.create(user=self.owner, skill_name='Spanish', skill_type='want')
+        # Matches of users outside the import are left as they are
+        first = User.objects.create_user('first', 'first@example.com', 'password')
+        second = User.objects.create_user('second', 'second@example.com', 'password')
+        untouched = SwapMatch.objects.create(user=first, teaches=second, learns_from=second, score=1)
+        report = import_rows('user_skills', [
+            (1, {'username': 'learner', 'skill_name': 'Guitar', 'skill_type': 'want'}),
+            (2, {'username': 'learner', 'skill_name': 'Spanish', 'skill_type': 'offer'}),
+        ])
+        self.assertFalse(report.errors)
+        self.assertTrue(SwapMatch.objects.filter(pk=untouched.pk).exists())
+        self.assertTrue(SwapMatch.objects.filter(user=self.learner, teaches=self.owner, learns_from=self.owner).exists())
+        self.assertTrue(SwapMatch.objects.filter(user=self.owner, teaches=self.learner, learns_from=self.learner).exists())
+
+
+class CategoryCountTests(TestCase):
+    """active_skill_count follows skill creates, deletes, moves and is_active toggles"""
+
+    def setUp(self):
+        cache.clear()
+        self.music = Category.objects.create(name='Music')
+        self.languages = Category.objects.create(name='Languages')
+        self.owner = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+
+    def create(self, category, **kwargs):
+        return Skill.objects.create(user=self.owner, category=category, title='Lessons', description='Lessons', **kwargs)
+
+    def counts(self):
+        return [Category.objects.get(pk=category.pk).active_skill_count for category in (self.music, self.languages)]
+
+    def test_creates_and_deletes(self):
+        guitar = self.create(self.music)
+        self.create(self.music, is_active=False)
+        self.create(None)
+        self.assertEqual(self.counts(), [1, 0])
+        guitar.delete()
+        self.assertEqual(self.counts(), [0, 0])
+
+    def test_category_changes_and_toggles(self):
+        skill = self.create(self.music)
+        skill.category = self.languages
+        skill.save()
+        self.assertEqual(self.counts(), [0, 1])
+        skill.is_active = False
+        skill.save()
+        self.assertEqual(self.counts(), [0, 0])
+        # Reactivated into another category in the same save
+        skill.is_active = True
+        skill.category = self.music
+        skill.save()
+        self.assertEqual(self.counts(), [1, 0])
+        skill.title = 'Piano'
+        skill.save()
+        self.assertEqual(self.counts(), [1, 0])
+
+    def test_deleting_the_owner_removes_their_skills(self):
+        self.create(self.music)
+        self.create(self.languages)
+        self.owner.delete()
+        self.assertEqual(self.counts(), [0, 0])
+
+    def test_rebuild_reports_and_repairs_drift(self):
+        self.create(self.music)
+        self.create(self.music)
+        Category.objects.filter(pk=self.music.pk).update(active_skill_count=7)
+        Skill.objects.create(user=self.owner, category=self.languages, title='Spanish', description='Hola')
+        out = StringIO()
+        call_command('rebuild_category_counts', stdout=out)
+        self.assertIn('2 categories (1 had drifted)', out.getvalue())
+        self.assertEqual(self.counts(), [2, 1])
+
+
+class ViewBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_local_buffer_drains_once(self):
+        buffer = LocalViewBuffer()
+        buffer.add(1)
+        buffer.add(1, 2)
+        buffer.add(2)
+        self.assertEqual(buffer.snapshot(), {1: 3, 2: 1})
+        self.assertEqual(buffer.drain(), {1: 3, 2: 1})
+        self.assertEqual(buffer.drain(), {})
+
+    def test_cache_buffer_drains_once(self):
+        buffer = CacheViewBuffer()
+        buffer.add(1)
+        buffer.add(1, 2)
+        self.assertEqual(buffer.snapshot(), {1: 3})
+        self.assertEqual(buffer.drain(), {1: 3})
+        self.assertEqual(buffer.drain(), {})
+
+    @mock.patch('skills.counters.time.sleep')
+    def test_cache_buffer_registers_after_a_lock_timeout(self, sleep):
+        buffer = CacheViewBuffer()
+        cache.add(f'{buffer.prefix}:lock', 1)
+        with self.assertLogs('skills.counters', 'WARNING'):
+            buffer.add(42)
+        self.assertEqual(buffer.snapshot(), {})
+        cache.delete(f'{buffer.prefix}:lock')
+        for _ in range(10):
+            buffer.add(42)
+        self.assertEqual(buffer.drain(), {42: 11})
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.skill = Skill.objects.create(user=owner, title='Guitar', description='Chords and scales')
+
+    def views(self):
+        return Skill.objects.values_list('views_count', flat=True).get(pk=self.skill.pk)
+
+    def test_flushes_at_the_threshold(self):
+        counter = ViewCounter(LocalViewBuffer(), flush_interval=3600, flush_threshold=3)
+        counter.record(self.skill.pk)
+        counter.record(self.skill.pk)
+        self.assertEqual(self.views(), 0)
+        self.assertEqual(counter.pending(), {self.skill.pk: 2})
+        counter.record(self.skill.pk)
+        self.assertEqual(self.views(), 3)
+        self.assertEqual(counter.pending(), {})
+
+    def test_flushes_after_the_interval(self):
+        counter = ViewCounter(LocalViewBuffer(), flush_interval=0, flush_threshold=100)
+        counter.record(self.skill.pk)
+        self.assertEqual(self.views(), 1)
+
+    def test_failed_update_keeps_the_views_pending(self):
+        counter = ViewCounter(LocalViewBuffer(), flush_interval=3600, flush_threshold=100)
+        counter.record(self.skill.pk, 5)
+        with mock.patch('django.db.models.query.QuerySet.update', side_effect=OperationalError('locked')):
+            with self.assertRaises(OperationalError):
+                counter.flush()
+        self.assertEqual(counter.pending(), {self.skill.pk: 5})
+        self.assertEqual(counter.flush(), 1)
+        self.assertEqual(self.views(), 5)
+
+
+class CursorPaginatorTests(TestCase):
+    """Keyset pages cover every row once, in order, and ignore cursors they did not sign"""
+
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        # Ties on the leading sort key, broken by id
+        for number, views in enumerate([5, 3, 3, 3, 1, 1, 0]):
+            Skill.objects.create(user=owner, title=f'Skill {number}', description='Lessons', views_count=views)
+        self.ordering = ('-views_count', 'id')
+        self.expected = list(Skill.objects.order_by(*self.ordering).values_list('pk', flat=True))
+
+    def paginator(self, key='skills', **kwargs):
+        return CursorPaginator(Skill.objects.all(), self.ordering, per_page=3, key=key, **kwargs)
+
+    def ids(self, page):
+        return [skill.pk for skill in page]
+
+    def walk_forward(self, paginator):
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        return pages
+
+    def test_pages_cover_every_row_once_across_ties(self):
+        pages = self.walk_forward(self.paginator())
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([pk for page in pages for pk in self.ids(page)], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+    def test_previous_cursors_return_the_same_pages(self):
+        paginator = self.paginator()
+        pages = self.walk_forward(paginator)
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = paginator.page(page.previous_cursor)
+            self.assertEqual(self.ids(page), self.ids(expected))
+        self.assertFalse(page.has_previous())
+        self.assertEqual(self.ids(paginator.page(page.next_cursor)), self.ids(pages[1]))
+
+    def test_offset_pages_round_trip(self):
+        paginator = self.paginator(keyset=False)
+        pages = self.walk_forward(paginator)
+        self.assertEqual([pk for page in pages for pk in self.ids(page)], self.expected)
+        self.assertEqual(self.ids(paginator.page(pages[-1].previous_cursor)), self.ids(pages[1]))
+
+    def test_bad_cursors_restart_at_the_first_page(self):
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor
+        first_page = self.expected[:3]
+        for bad in [
+            cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B'),
+            self.paginator(key='category').page().next_cursor,
+            signing.dumps({'k': 'skills', 'v': [3, self.expected[2]]}, salt='another.salt'),
+            signing.dumps({'k': 'skills', 'v': ['many', 'views']}, salt=CURSOR_SALT),
+            signing.dumps({'k': 'skills', 'v': [3]}, salt=CURSOR_SALT),
+            'not a cursor',
+        ]:
+            page = paginator.page(bad)
+            self.assertEqual(self.ids(page), first_page)
+            self.assertFalse(page.has_previous())
+
+    def test_querystrings_keep_other_parameters(self):
+        params = QueryDict('sort=popular&cursor=old')
+        page = self.paginator().page(params=params)
+        self.assertEqual(QueryDict(page.next_querystring())['sort'], 'popular')
+        self.assertEqual(QueryDict(page.next_querystring())['cursor'], page.next_cursor)
+
+    def test_counts_are_cached_per_catalogue_version(self):
+        queryset = Skill.objects.filter(views_count__gt=0)
+        self.assertEqual(count_cached(queryset), 6)
+        with self.assertNumQueries(0):
+            self.assertEqual(count_cached(queryset.order_by('-views_count')), 6)
+        # Queryset updates send no signals, so bump the version as bulk writers do
+        Skill.objects.filter(views_count=0).update(views_count=2)
+        bump_catalogue_version()
+        self.assertEqual(count_cached(queryset), 7)
+
+
+class PopularSortTests(TestCase):
+    """The popular listing shows buffered views without churning the cached total"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.skill = Skill.objects.create(user=self.owner, title='Guitar', description='Chords and scales')
+        self.counter = ViewCounter(LocalViewBuffer(), flush_interval=3600, flush_threshold=100)
+        self.client.force_login(self.owner)
+
+    def get_popular(self):
+        with mock.patch('skills.views.get_view_counter', return_value=self.counter):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('skills:skill_list'), {'sort': 'popular'})
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def test_cards_include_pending_views(self):
+        self.counter.record(self.skill.pk, 7)
+        response, _ = self.get_popular()
+        self.assertContains(response, '<i class="fas fa-eye"></i> 7')
+        self.counter.record(self.skill.pk)
+        response, queries = self.get_popular()
+        self.assertContains(response, '<i class="fas fa-eye"></i> 8')
+        self.assertFalse([sql for sql in queries if 'COUNT(' in sql])
+
+
+class SkillSearchTests(TestCase):
+    """The search index follows skill and username edits"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('maestro', 'maestro@example.com', 'password')
+        self.skill = Skill.objects.create(user=self.owner, title='Guitar basics', description='Chords and strumming')
+
+    def search(self, query):
+        return list(search_skills(Skill.objects.all(), query).order_by('-search_rank'))
+
+    def test_matches_word_prefixes(self):
+        self.assertEqual(self.search('guit'), [self.skill])
+        self.assertEqual(self.search('strum chord'), [self.skill])
+        self.assertEqual(self.search('piano'), [])
+
+    def test_title_matches_rank_first(self):
+        described = Skill.objects.create(user=self.owner, title='Music theory', description='Useful for guitar players')
+        self.assertEqual(self.search('guitar'), [self.skill, described])
+
+    def test_edits_and_deletes_are_reindexed(self):
+        self.skill.title = 'Ukulele basics'
+        self.skill.save()
+        self.assertEqual(self.search('guitar'), [])
+        self.assertEqual(self.search('ukulele'), [self.skill])
+        self.skill.delete()
+        self.assertEqual(self.search('ukulele'), [])
+
+    def test_username_changes_are_reindexed(self):
+        self.assertEqual(self.search('maestro'), [self.skill])
+        self.owner.username = 'virtuoso'
+        self.owner.save()
+        self.assertEqual(self.search('maestro'), [])
+        self.assertEqual(self.search('virtuoso'), [self.skill])
+
+    def test_ajax_search(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('skills:skill_search_ajax'), {'q': 'gu'})
+        [result] = response.json()['results']
+        self.assertEqual((result['id'], result['user']), (self.skill.pk, 'maestro'))
+
+
+@override_settings(NOTIFICATIONS_DISPATCHER={'BACKEND': 'notifications.dispatch.ImmediateDispatcher'})
+class CatalogueCacheTests(TestCase):
+    """Catalogue changes evict cached pages and fragments on commit"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Music')
+        self.owner = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.skill = Skill.objects.create(
+            user=self.owner, category=self.category, title='Guitar', description='Chords and scales'
+        )
+
+    def get_list(self):
+        return self.client.get(reverse('skills:skill_list'))
+
+    def change(self, update):
+        with self.captureOnCommitCallbacks(execute=True):
+            update()
+
+    def test_anonymous_pages_are_cached_until_the_catalogue_changes(self):
+        self.assertEqual(self.get_list()['X-Cache'], 'MISS')
+        self.assertEqual(self.get_list()['X-Cache'], 'HIT')
+        learner = User.objects.create_user('learner', 'learner@example.com', 'password')
+
+        def rename_skill():
+            self.skill.title = 'Ukulele'
+            self.skill.save()
+
+        def rename_category():
+            self.category.name = 'Strings'
+            self.category.save()
+
+        def review():
+            Review.objects.create(
+                reviewer=learner, reviewed_user=self.owner, skill=self.skill, rating=5, comment='Great',
+                communication_rating=5, knowledge_rating=5, patience_rating=5,
+            )
+
+        for update, expected in [(rename_skill, 'Ukulele'), (rename_category, 'Strings'), (review, 'Ukulele')]:
+            self.change(update)
+            response = self.get_list()
+            self.assertEqual(response['X-Cache'], 'MISS')
+            self.assertContains(response, expected)
+            self.assertEqual(self.get_list()['X-Cache'], 'HIT')
+
+    def test_signed_in_cards_come_from_the_fragment_cache(self):
+        self.client.force_login(self.owner)
+        self.assertContains(self.get_list(), 'Guitar')
+        # Updates through the queryset send no signals, so the card stays cached
+        Skill.objects.filter(pk=self.skill.pk).update(title='Ukulele')
+        self.assertContains(self.get_list(), 'Guitar')
+        self.change(lambda: Skill.objects.get(pk=self.skill.pk).save())
+        self.assertContains(self.get_list(), 'Ukulele')
+
+    def test_responses_setting_cookies_are_not_stored(self):
+        calls = []
+
+        @cache_anonymous_page('cookie_test')
+        def view(request):
+            calls.append(request)
+            response = HttpResponse('Hello')
+            response.set_cookie('csrftoken', 'secret')
+            return response
+
+        factory = RequestFactory()
+        for _ in range(2):
+            request = factory.get('/cookies/')
+            request.user = AnonymousUser()
+            self.assertEqual(view(request).cookies['csrftoken'].value, 'secret')
+        self.assertEqual(len(calls), 2)
+
+    def test_visitors_with_pending_messages_skip_the_cache(self):
+        self.get_list()
+        self.client.cookies['messages'] = 'pending'
+        response = self.get_list()
+        self.assertNotIn('X-Cache', response)
+
+
+@override_settings(ASYNC_VIEWS=True)
+class AsyncSkillViewTests(TransactionTestCase):
+    """The ASGI skill list and search answer as the sync views do"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('teacher', 'teacher@example.com', 'password')
+        self.guitar = Skill.objects.create(user=self.owner, title='Guitar basics', description='Chords', views_count=3)
+        self.piano = Skill.objects.create(user=self.owner, title='Piano', description='Scales', views_count=9)
+        self.async_client.force_login(self.owner)
+
+    async def test_skill_list(self):
+        self.assertEqual(resolve(reverse('skills:skill_list')).func.__name__, 'skill_list_async')
+        response = await self.async_client.get(reverse('skills:skill_list'), {'sort': 'popular'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([skill.pk for skill in response.context['page_obj']], [self.piano.pk, self.guitar.pk])
+        self.assertEqual(response.context['total_skills'], 2)
+        response = await self.async_client.get(reverse('skills:skill_list'), {'query': 'guit'})
+        self.assertEqual([skill.pk for skill in response.context['page_obj']], [self.guitar.pk])
+
+    async def test_anonymous_list_is_cached(self):
+        await sync_to_async(self.async_client.logout)()
+        self.assertEqual((await self.async_client.get(reverse('skills:skill_list')))['X-Cache'], 'MISS')
+        self.assertEqual((await self.async_client.get(reverse('skills:skill_list')))['X-Cache'], 'HIT')
+
+    async def test_search_ajax(self):
+        self.assertEqual(resolve(reverse('skills:skill_search_ajax')).func.__name__, 'skill_search_ajax_async')
+        response = await self.async_client.get(reverse('skills:skill_search_ajax'), {'q': 'pia'})
+        [result] = response.json()['results']
+        self.assertEqual((result['id'], result['user'], result['category']), (self.piano.pk, 'teacher', 'Uncategorized'))
+        response = await self.async_client.get(reverse('skills:skill_search_ajax'), {'q': 'p'})
+        self.assertEqual(response.json(), {'results': []})
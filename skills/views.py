@@ -1,15 +1,34 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Avg
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from .models import Skill, Category
 from .forms import SkillForm, SkillSearchForm
+from .caching import cache_anonymous_page
+from .counters import get_view_counter
+from .pagination import CursorPaginator, count_cached
+from .search import search_skills
+from monitoring.metrics import query_budget
+from skillswap.asyncviews import async_login_required, read_off_thread
+from skillswap.routers import replica_reads
 
+SKILLS_PER_PAGE = 12
 
-def skill_list(request):
-    """List all skills with search and filter"""
+# Sort options of the skill list. Each ends in the primary key so cursors are
+# unique; it ascends because SQLite index entries carry the rowid ascending
+SKILL_SORTS = {
+    '-created_at': ('-created_at', 'id'),
+    'popular': ('-views_count', '-created_at', 'id'),
+    'rating': ('-rating_average', '-created_at', 'id'),
+    'relevance': ('-search_rank', '-created_at', 'id'),
+}
+
+
+def _filter_skills(request):
+    """The skill list's form, filtered queryset, sort and paginator for a request"""
     skills = Skill.objects.filter(is_active=True).select_related('user', 'category')
     form = SkillSearchForm(request.GET)
     
@@ -21,11 +40,7 @@ def skill_list(request):
         location = form.cleaned_data.get('location')
         
         if query:
-            skills = skills.filter(
-                Q(title__icontains=query) | 
-                Q(description__icontains=query) |
-                Q(user__username__icontains=query)
-            )
+            skills = search_skills(skills, query)
         
         if category:
             skills = skills.filter(category=category)
@@ -36,29 +51,74 @@ def skill_list(request):
         if location:
             skills = skills.filter(location_preference=location)
     
-    # Sorting
-    sort_by = request.GET.get('sort', '-created_at')
+    # Sorting (searches default to relevance)
+    searching = form.is_valid() and bool(form.cleaned_data.get('query'))
+    sort_by = request.GET.get('sort') or ('relevance' if searching else '-created_at')
+    if sort_by not in SKILL_SORTS or (sort_by == 'relevance' and not searching):
+        sort_by = '-created_at'
+    listed = skills
     if sort_by == 'popular':
-        skills = skills.order_by('-views_count')
-    elif sort_by == 'rating':
-        skills = skills.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
-    else:
-        skills = skills.order_by(sort_by)
+        # Keyset cursors need a sort key that holds still between pages, so
+        # rows are ordered by the stored counter (and its partial index) and
+        # only move once skills.counters flushes. The cards show
+        # live_views_count, which adds the views still buffered. ``skills``
+        # stays unannotated so the cached total's key doesn't change per view
+        listed = get_view_counter().annotate_live_views(skills)
     
-    # Pagination
-    paginator = Paginator(skills, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination; search rank is computed per query, so relevance
+    # pages by offset (result sets are bounded by the search terms)
+    paginator = CursorPaginator(
+        listed, SKILL_SORTS[sort_by], per_page=SKILLS_PER_PAGE,
+        key=sort_by, keyset=sort_by != 'relevance',
+    )
+    return form, skills, sort_by, paginator
+
+
+@cache_anonymous_page('skill_list')
+@query_budget(10)
+@replica_reads
+def skill_list(request):
+    """List all skills with search and filter"""
+    form, skills, sort_by, paginator = _filter_skills(request)
+    page_obj = paginator.page(request.GET.get('cursor'), params=request.GET)
     
     context = {
         'page_obj': page_obj,
         'form': form,
-        'total_skills': skills.count(),
+        'sort_by': sort_by,
+        'total_skills': count_cached(skills),
     }
     
     return render(request, 'skills/skill_list.html', context)
 
 
+@cache_anonymous_page('skill_list')
+@query_budget(10)
+@replica_reads
+async def skill_list_async(request):
+    """skill_list for ASGI, fetching the page and the total side by side on pool threads"""
+    # Validating the form loads the categories
+    form, skills, sort_by, paginator = await sync_to_async(_filter_skills)(request)
+    page_obj, total_skills = await asyncio.gather(
+        read_off_thread(paginator.page)(request.GET.get('cursor'), params=request.GET),
+        read_off_thread(count_cached)(skills),
+    )
+    
+    context = {
+        'page_obj': page_obj,
+        'form': form,
+        'sort_by': sort_by,
+        'total_skills': total_skills,
+    }
+    
+    return await sync_to_async(render)(request, 'skills/skill_list.html', context)
+
+
+def _count_cached_view(request, pk):
+    get_view_counter().record(pk)
+
+
+@cache_anonymous_page('skill_detail', on_hit=_count_cached_view)
 def skill_detail(request, pk):
     """Skill detail view"""
     skill = get_object_or_404(Skill.objects.select_related('user', 'category'), pk=pk)
@@ -126,6 +186,8 @@ def skill_delete(request, pk):
     return render(request, 'skills/skill_confirm_delete.html', {'skill': skill})
 
 
+@cache_anonymous_page('category_list')
+@replica_reads
 def category_list(request):
     """List all categories"""
     categories = Category.objects.all()
@@ -137,25 +199,45 @@ def category_list(request):
     return render(request, 'skills/category_list.html', context)
 
 
+@cache_anonymous_page('category_detail')
 def category_detail(request, pk):
     """Category detail with skills"""
     category = get_object_or_404(Category, pk=pk)
     skills = Skill.objects.filter(category=category, is_active=True).select_related('user')
     
-    # Pagination
-    paginator = Paginator(skills, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination over the (category, -created_at) partial index
+    paginator = CursorPaginator(skills, SKILL_SORTS['-created_at'], per_page=SKILLS_PER_PAGE, key='category')
+    page_obj = paginator.page(request.GET.get('cursor'), params=request.GET)
     
     context = {
         'category': category,
         'page_obj': page_obj,
+        'total_skills': count_cached(skills),
     }
     
     return render(request, 'skills/category_detail.html', context)
 
 
+def _search_matches(query):
+    """The ten best matches for the AJAX search"""
+    return search_skills(
+        Skill.objects.filter(is_active=True).select_related('category', 'user'),
+        query
+    ).order_by('-search_rank')[:10]
+
+
+def _search_result(skill):
+    return {
+        'id': skill.id,
+        'title': skill.title,
+        'category': skill.category.name if skill.category else 'Uncategorized',
+        'user': skill.user.username,
+        'url': skill.get_absolute_url(),
+    }
+
+
 @login_required
+@query_budget(4)
 def skill_search_ajax(request):
     """AJAX search for skills"""
     query = request.GET.get('q', '')
@@ -163,17 +245,20 @@ def skill_search_ajax(request):
     if len(query) < 2:
         return JsonResponse({'results': []})
     
-    skills = Skill.objects.filter(
-        Q(title__icontains=query) | Q(description__icontains=query),
-        is_active=True
-    )[:10]
+    results = [_search_result(skill) for skill in _search_matches(query)]
     
-    results = [{
-        'id': skill.id,
-        'title': skill.title,
-        'category': skill.category.name if skill.category else 'Uncategorized',
-        'user': skill.user.username,
-        'url': skill.get_absolute_url(),
-    } for skill in skills]
+    return JsonResponse({'results': results})
+
+
+@async_login_required
+@query_budget(4)
+async def skill_search_ajax_async(request):
+    """skill_search_ajax for ASGI"""
+    query = request.GET.get('q', '')
+    
+    if len(query) < 2:
+        return JsonResponse({'results': []})
+    
+    results = [_search_result(skill) async for skill in _search_matches(query)]
     
     return JsonResponse({'results': results})
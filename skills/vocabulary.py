@@ -0,0 +1,39 @@
+"""
+Skill vocabulary: turns free-text skill names and titles into comparable
+terms, so "Python for Beginners", "python" and "Pythons" meet on the same
+term and "Cooking Classes" matches "cooking".
+"""
+import re
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'the', 'for', 'of', 'to', 'in', 'on', 'with', 'my', 'your',
+    'basic', 'basics', 'beginner', 'beginners', 'intro', 'introduction', 'advanced',
+    'intermediate', 'expert', 'course', 'class', 'classes', 'lesson', 'lessons',
+    'learn', 'learning', 'how', 'masterclass', 'deep', 'dive', 'tutoring',
+})
+
+
+def stem(word):
+    """Very light English stemmer: folds plurals, enough for skill names"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def skill_terms(text):
+    """Normalised, de-duplicated terms of a skill name or title, in order"""
+    terms = []
+    for word in re.findall(r'[a-z0-9+#]+', text.lower()):
+        if word in STOPWORDS:
+            continue
+        term = stem(word)
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def normalize_skill_name(text):
+    """Canonical key for a skill name; falls back to the lowercased text if every word is a stopword"""
+    return ' '.join(skill_terms(text)) or ' '.join(text.lower().split())
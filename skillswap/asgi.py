@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillswap.settings')
+# Serve the hot read paths with their async views (see skillswap.asyncviews)
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,104 @@
+"""
+Support for the async implementations of the hot read views.
+
+Served over ASGI, a sync view runs in a worker thread behind sync_to_async;
+served over WSGI, an async view runs in an event loop started for it by
+async_to_sync. Each is the slower choice for the other server, so both
+versions are kept and the URLconfs pick one with native(): skillswap.asgi
+turns ASYNC_VIEWS on, skillswap.wsgi leaves it off.
+
+Django 4.2's login_required and condition decorators only wrap sync views,
+so the async views use the equivalents below.
+"""
+import importlib
+import sys
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+from django.urls import clear_url_caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+# URLconfs that route with native()
+NATIVE_URLCONFS = ('skills.urls', 'notifications.urls', 'dashboard.urls')
+
+
+def native(sync_view, async_view):
+    """The view to route to: ``async_view`` when ASYNC_VIEWS is on, else ``sync_view``"""
+    return async_view if getattr(settings, 'ASYNC_VIEWS', False) else sync_view
+
+
+@receiver(setting_changed)
+def reload_native_urlconfs(setting, **kwargs):
+    """native() picks the views on import, so tests overriding ASYNC_VIEWS re-import the URLconfs"""
+    if setting != 'ASYNC_VIEWS':
+        return
+    # The root URLconf's include()s hold on to the patterns they loaded
+    for name in (*NATIVE_URLCONFS, settings.ROOT_URLCONF):
+        if name in sys.modules:
+            importlib.reload(sys.modules[name])
+    clear_url_caches()
+
+
+def read_off_thread(func):
+    """
+    sync_to_async(func) on the executor pool instead of the request's own
+    thread, so several of these gathered together run side by side. Each
+    pool thread keeps its own connection; stale ones are closed around the
+    call as request_started/request_finished would. Only for read-only
+    calls: they run outside the request's transaction.
+    """
+    def call(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(call, thread_sensitive=False)
+
+
+async def aget_user(request):
+    """request.user, loaded from the session and user tables off the event loop"""
+    # AuthenticationMiddleware sets a lazy object; evaluating it once caches the user
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+def async_login_required(view):
+    """login_required for coroutine views"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def async_etag(etag_func):
+    """
+    condition(etag_func=...) for coroutine views: ``etag_func`` is a
+    coroutine function, and a GET or HEAD whose If-None-Match matches gets
+    a 304 without running the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+                if etag and not response.has_header('ETag'):
+                    response.headers['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
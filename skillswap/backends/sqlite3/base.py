@@ -0,0 +1,34 @@
+"""
+SQLite tuned for small multi-process deployments.
+
+Every new connection runs the PRAGMAs in OPTIONS['pragmas'] (WAL journal,
+busy timeout, synchronous=NORMAL by default from skillswap.database), so
+readers no longer block the writer and a writer waits for the lock instead
+of failing with "database is locked". With OPTIONS['transaction_mode'] set
+to 'IMMEDIATE', atomic blocks take the write lock when they begin: a
+transaction that reads and then writes can otherwise fail outright when
+another connection wrote in between, since SQLite cannot wait to upgrade
+a read lock.
+"""
+from django.db.backends.sqlite3 import base
+from .creation import DatabaseCreation
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
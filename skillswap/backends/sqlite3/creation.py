@@ -0,0 +1,37 @@
+import os
+
+from django.db.backends.sqlite3 import creation
+
+# Files SQLite keeps next to a database in WAL mode
+JOURNAL_SUFFIXES = ('-wal', '-shm')
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """
+    Test databases for WAL mode. Django only deletes the database file, so a
+    WAL left behind (by a connection still open in a background thread)
+    would be replayed into the next test database created under that name.
+    """
+
+    def _remove_journal(self, name):
+        for suffix in JOURNAL_SUFFIXES:
+            if os.path.exists(name + suffix):
+                os.remove(name + suffix)
+
+    def _create_test_db(self, verbosity, autoclobber, keepdb=False):
+        name = super()._create_test_db(verbosity, autoclobber, keepdb=keepdb)
+        if not keepdb and not self.is_in_memory_db(name):
+            self._remove_journal(name)
+        return name
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        # Clones copy the database file alone; move the WAL's pages into it first
+        if not self.is_in_memory_db(self.connection.settings_dict['NAME']):
+            with self.connection.cursor() as cursor:
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        super()._clone_test_db(suffix, verbosity, keepdb=keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        super()._destroy_test_db(test_database_name, verbosity)
+        if test_database_name and not self.is_in_memory_db(test_database_name):
+            self._remove_journal(test_database_name)
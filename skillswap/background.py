@@ -0,0 +1,126 @@
+"""
+In-process background work.
+
+Work is submitted once the surrounding transaction commits and handed to a
+worker chosen by a settings dict (``BACKEND`` and ``OPTIONS``):
+ImmediateWorker runs it in the calling thread, ThreadWorker queues it for a
+daemon thread that handles it in batches. notifications.dispatch and
+users.avatars subclass both with the work they do.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class ImmediateWorker:
+    """Handles each submission in the calling thread; useful for tests and management commands"""
+
+    def __init__(self, **options):
+        # Batching options are for ThreadWorker
+        pass
+
+    def handle(self, items):
+        raise NotImplementedError
+
+    def submit(self, item):
+        self.handle([item])
+
+    def flush(self):
+        pass
+
+
+class ThreadWorker:
+    """
+    In-process queue drained by a background thread. The thread waits up to
+    ``batch_wait`` seconds to collect items totalling ``batch_size`` (as
+    measured by item_size()), so a burst of submissions is handled at once.
+    An item is never split across batches.
+    """
+
+    thread_name = 'background-worker'
+
+    def __init__(self, batch_size=1, batch_wait=0.0):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def handle(self, items):
+        raise NotImplementedError
+
+    def item_size(self, item):
+        return 1
+
+    def submit(self, item):
+        self._queue.put(item)
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._worker.start()
+
+    def _next_batch(self):
+        items = [self._queue.get()]
+        size = self.item_size(items[0])
+        while size < self.batch_size:
+            try:
+                item = self._queue.get(timeout=self.batch_wait)
+            except queue.Empty:
+                break
+            items.append(item)
+            size += self.item_size(item)
+        return items
+
+    def _process(self, items):
+        close_old_connections()
+        try:
+            self.handle(items)
+        except Exception:
+            logger.exception('%s failed to handle %d queued items', self.thread_name, len(items))
+        finally:
+            for _ in items:
+                self._queue.task_done()
+            close_old_connections()
+
+    def _run(self):
+        while True:
+            self._process(self._next_batch())
+
+    def flush(self):
+        """Block until every queued item has been handled"""
+        self._queue.join()
+
+
+_workers = {}
+
+
+def get_worker(setting, default_backend):
+    """Return the worker configured by the ``setting`` dict, created once per process"""
+    if setting not in _workers:
+        config = getattr(settings, setting, {})
+        worker = import_string(config.get('BACKEND', default_backend))(**config.get('OPTIONS', {}))
+        atexit.register(worker.flush)
+        _workers[setting] = worker
+    return _workers[setting]
+
+
+@receiver(setting_changed)
+def reset_worker(setting, **kwargs):
+    _workers.pop(setting, None)
+
+
+def submit_on_commit(setting, default_backend, item):
+    """Hand ``item`` to the configured worker once the current transaction commits"""
+    transaction.on_commit(lambda: get_worker(setting, default_backend).submit(item))
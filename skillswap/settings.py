@@ -4,6 +4,7 @@ Django settings for skillswap project.
 
 from pathlib import Path
 from decouple import config
+from skillswap.database import database_config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -16,6 +17,10 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1').split(',')
 
+# Route the hot read paths to their async views (skillswap.asyncviews);
+# skillswap.asgi turns this on, WSGI servers keep the sync views
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -37,9 +42,13 @@ INSTALLED_APPS = [
     'reviews.apps.ReviewsConfig',
     'dashboard.apps.DashboardConfig',
     'notifications.apps.NotificationsConfig',
+    'monitoring.apps.MonitoringConfig',
+    'api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestMetricsMiddleware',
+    'skillswap.routers.PinPrimaryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,14 +79,29 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'skillswap.wsgi.application'
 
-# Database
+# Database: DATABASE_URL picks the engine (see skillswap/database.py). SQLite
+# runs in WAL mode with a busy timeout; on Postgres connections persist for
+# DATABASE_CONN_MAX_AGE seconds (set DATABASE_PGBOUNCER behind PgBouncer)
+DATABASE_OPTIONS = {
+    'base_dir': BASE_DIR,
+    'conn_max_age': config('DATABASE_CONN_MAX_AGE', default=60, cast=int),
+    'pgbouncer': config('DATABASE_PGBOUNCER', default=False, cast=bool),
+}
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(config('DATABASE_URL', default='sqlite:///db.sqlite3'), **DATABASE_OPTIONS),
 }
 
+# Optional read replica for the read-only listing views (@replica_reads);
+# clients stay on the primary for REPLICA_PIN_SECONDS after they write
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = {
+        **database_config(DATABASE_REPLICA_URL, **DATABASE_OPTIONS),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['skillswap.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -109,6 +133,12 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Profile image variants are rendered after commit by a background thread;
+# use users.avatars.ImmediateProcessor to render synchronously
+PROFILE_IMAGE_PROCESSOR = {
+    'BACKEND': config('PROFILE_IMAGE_PROCESSOR', default='users.avatars.ThreadProcessor'),
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -148,3 +178,134 @@ X_FRAME_OPTIONS = 'DENY'
 SECURE_CONTENT_TYPE_NOSNIFF = True
 CSRF_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_SECURE = not DEBUG
+
+# Skill search (picked from the database vendor when no backend is set)
+SKILL_SEARCH_BACKEND = config('SKILL_SEARCH_BACKEND', default='') or None
+SKILL_SEARCH_CONFIG = config('SKILL_SEARCH_CONFIG', default='simple')
+
+# Cache backend: 'locmem' (per process), 'file' (shared by the processes on
+# one host, in CACHE_LOCATION) or 'redis' (CACHE_LOCATION is a redis:// URL)
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': config(
+            'CACHE_LOCATION', default=str(BASE_DIR / '.cache') if CACHE_BACKEND == 'file' else ''
+        ),
+    }
+}
+if CACHE_BACKEND in ('locmem', 'file'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int)}
+
+# Catalogue pages (skill list/detail, categories): whole responses for
+# anonymous visitors and skill card / category tile fragments. Entries are
+# invalidated by skill, category and review changes; the timeouts bound how
+# long live view counts may lag
+CATALOGUE_CACHE = {
+    'PAGE_TIMEOUT': config('CATALOGUE_PAGE_CACHE_TIMEOUT', default=300, cast=int),
+    'FRAGMENT_TIMEOUT': config('CATALOGUE_FRAGMENT_CACHE_TIMEOUT', default=3600, cast=int),
+}
+
+# Totals shown next to paginated skill listings are cached for this many seconds
+SKILL_LIST_COUNT_CACHE_TIMEOUT = 300
+
+# Skill view counter: views are buffered ('local' per process, or 'cache' shared)
+# and written in batches once the threshold or interval (seconds) is reached
+SKILL_VIEW_COUNTER = {
+    'BACKEND': config('SKILL_VIEW_COUNTER_BACKEND', default='local'),
+    'FLUSH_INTERVAL': config('SKILL_VIEW_COUNTER_FLUSH_INTERVAL', default=30, cast=int),
+    'FLUSH_THRESHOLD': config('SKILL_VIEW_COUNTER_FLUSH_THRESHOLD', default=100, cast=int),
+}
+
+# Request message threads: messages rendered per window, and the most
+# returned by one poll of the messages endpoint
+REQUEST_THREAD_WINDOW = 30
+REQUEST_THREAD_FETCH_LIMIT = 100
+
+# Notifications: per-user cache lifetime, pub/sub broker for the SSE stream
+# (the in-process broker suits a single ASGI process) and stream timings
+NOTIFICATIONS_CACHE_TIMEOUT = 300
+NOTIFICATIONS_BROKER = config('NOTIFICATIONS_BROKER', default='notifications.stream.LocalBroker')
+NOTIFICATIONS_STREAM_KEEPALIVE = 25
+NOTIFICATIONS_STREAM_LIFETIME = 300
+
+# Notification fan-out: events are queued on commit and written in batches by
+# a background thread; use notifications.dispatch.ImmediateDispatcher to
+# deliver synchronously (tests, management commands)
+NOTIFICATIONS_DISPATCHER = {
+    'BACKEND': config('NOTIFICATIONS_DISPATCHER', default='notifications.dispatch.ThreadDispatcher'),
+    'OPTIONS': {
+        'batch_size': 100,
+        'batch_wait': 0.05,
+    },
+}
+
+# Notification list page size, and retention: `manage.py purge_notifications`
+# (run it daily) moves read notifications older than DAYS to the ARCHIVE
+# ('table', 'jsonl' at ARCHIVE_PATH, or 'none'), deleting BATCH_SIZE rows per
+# transaction and sleeping PAUSE seconds between batches
+NOTIFICATIONS_PER_PAGE = 20
+NOTIFICATIONS_RETENTION = {
+    'DAYS': config('NOTIFICATIONS_RETENTION_DAYS', default=90, cast=int),
+    'BATCH_SIZE': 500,
+    'PAUSE': 0.05,
+    'ARCHIVE': config('NOTIFICATIONS_ARCHIVE', default='table'),
+    'ARCHIVE_PATH': config('NOTIFICATIONS_ARCHIVE_PATH', default=str(BASE_DIR / 'archive' / 'notifications.jsonl.gz')),
+}
+
+# Dashboard recommendations: per-user results are cached for CACHE_TIMEOUT
+# seconds and the in-process skill index is rebuilt at least every
+# INDEX_MAX_AGE seconds (view counts are only picked up on rebuild)
+RECOMMENDATIONS = {
+    'LIMIT': 6,
+    'CACHE_TIMEOUT': config('RECOMMENDATIONS_CACHE_TIMEOUT', default=3600, cast=int),
+    'INDEX_MAX_AGE': config('RECOMMENDATIONS_INDEX_MAX_AGE', default=900, cast=int),
+    'RECENCY_HALF_LIFE_DAYS': 60,
+    'WEIGHTS': {'match': 1.0, 'rating': 0.4, 'popularity': 0.2, 'recency': 0.2},
+}
+
+# Skill-swap matching: how many two-way partners and three-way cycles are
+# kept per user, and how a cycle's score is discounted against a direct swap
+SWAP_MATCHING = {
+    'MAX_PARTNERS': 50,
+    'MAX_CYCLES': 20,
+    'CYCLE_WEIGHT': 0.5,
+}
+
+# Request instrumentation (query counts, duplicate queries, DB/template time).
+# Off by default; SAMPLE_RATE keeps the overhead bounded in production and
+# ENFORCE_QUERY_BUDGETS turns @query_budget overruns into exceptions for tests.
+# /monitoring/metrics/ is open to staff and to scrapers that send
+# "Authorization: Bearer <METRICS_TOKEN>" (no token: staff only)
+MONITORING = {
+    'ENABLED': config('MONITORING_ENABLED', default=False, cast=bool),
+    'SAMPLE_RATE': config('MONITORING_SAMPLE_RATE', default=0.1, cast=float),
+    'SERVER_TIMING': True,
+    'LOG_REQUESTS': True,
+    'ENFORCE_QUERY_BUDGETS': config('MONITORING_ENFORCE_QUERY_BUDGETS', default=False, cast=bool),
+    'METRICS_TOKEN': config('MONITORING_METRICS_TOKEN', default=''),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # One JSON line per sampled request from monitoring.middleware
+        'monitoring.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
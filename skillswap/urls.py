@@ -16,6 +16,8 @@ urlpatterns = [
     path('reviews/', include('reviews.urls')),
     path('dashboard/', include('dashboard.urls')),
     path('notifications/', include('notifications.urls')),
+    path('monitoring/', include('monitoring.urls')),
+    path('api/', include('api.urls')),
 ]
 
 # Serve media files in development
@@ -1,18 +1,19 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, UserSkill
+from .models import SwapMatch, User, UserSkill
 
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     """Custom User admin"""
-    list_display = ['username', 'email', 'first_name', 'last_name', 'location', 'is_staff', 'date_joined']
-    list_filter = ['is_staff', 'is_superuser', 'is_active', 'date_joined']
+    list_display = ['username', 'email', 'first_name', 'last_name', 'location', 'profile_completion', 'is_staff', 'date_joined']
+    list_filter = ['is_staff', 'is_superuser', 'is_active', 'profile_completed', 'date_joined']
     search_fields = ['username', 'email', 'first_name', 'last_name']
+    readonly_fields = ['profile_image_hash', 'profile_completion', 'profile_completed']
     
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Additional Info', {
-            'fields': ('bio', 'profile_image', 'location', 'phone', 'date_of_birth', 'profile_completed')
+            'fields': ('bio', 'profile_image', 'profile_image_hash', 'location', 'phone', 'date_of_birth', 'profile_completion', 'profile_completed')
         }),
     )
     
@@ -30,3 +31,12 @@ class UserSkillAdmin(admin.ModelAdmin):
     list_filter = ['skill_type', 'proficiency_level', 'created_at']
     search_fields = ['user__username', 'skill_name']
     date_hierarchy = 'created_at'
+
+
+@admin.register(SwapMatch)
+class SwapMatchAdmin(admin.ModelAdmin):
+    """Swap match admin (rows are maintained by users.matching)"""
+    list_display = ['user', 'teaches', 'learns_from', 'is_cycle', 'score', 'updated_at']
+    list_filter = ['is_cycle']
+    search_fields = ['user__username', 'teaches__username', 'learns_from__username']
+    raw_id_fields = ['user', 'teaches', 'learns_from']
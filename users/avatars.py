@@ -0,0 +1,169 @@
+"""
+Profile image variants.
+
+Uploads are kept as they are; square avatars are rendered from them off the
+request path. User.save() schedules processing only when profile_image
+points at a different file, and the processor skips the work when the file's
+content hash already has its variants. Each variant is named after that hash
+(``avatars/ab/<hash>-128.webp``), so its URL never changes meaning and can be
+served with a far-future cache lifetime. Until a user's variants exist
+(``profile_image_hash`` is empty) the original upload is shown.
+"""
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from skills.caching import bump_catalogue_version
+from skillswap.background import ImmediateWorker, ThreadWorker, get_worker, submit_on_commit
+
+logger = logging.getLogger(__name__)
+
+AVATAR_SIZES = (32, 64, 128, 300)
+
+# Extension -> (PIL format, save options)
+AVATAR_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+HASH_LENGTH = 32
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def variant_name(digest, size, extension):
+    """Storage name of one variant; the same content always maps to the same name"""
+    return f'avatars/{digest[:2]}/{digest}-{size}.{extension}'
+
+
+def variant_names(digest):
+    return {
+        (size, extension): variant_name(digest, size, extension)
+        for size in AVATAR_SIZES for extension in AVATAR_FORMATS
+    }
+
+
+def render_variants(data, names):
+    """Encode the image in ``data`` as each (size, extension) in ``names``; returns name -> bytes"""
+    image = Image.open(io.BytesIO(data))
+    # JPEG sources decode straight at a reduced scale close to the largest size
+    largest = max(size for size, _ in names)
+    image.draft('RGB', (largest * 2, largest * 2))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+    square = ImageOps.fit(image, (largest, largest), Image.LANCZOS)
+
+    opaque = square
+    if square.mode == 'RGBA':
+        opaque = Image.new('RGB', square.size, 'white')
+        opaque.paste(square, mask=square.getchannel('A'))
+
+    rendered = {}
+    for (size, extension), name in names.items():
+        fmt, options = AVATAR_FORMATS[extension]
+        source = square if fmt == 'WEBP' else opaque
+        variant = source if size == largest else source.resize((size, size), Image.LANCZOS)
+        output = io.BytesIO()
+        variant.save(output, fmt, **options)
+        rendered[name] = output.getvalue()
+    return rendered
+
+
+def process_profile_image(user_id, force=False):
+    """
+    Write the missing variants of a user's profile image and record its
+    content hash. Returns the hash, or None if the image could not be read.
+    """
+    from .models import User
+
+    user = User.objects.filter(pk=user_id).only('profile_image', 'profile_image_hash').first()
+    if user is None or not user.profile_image:
+        return None
+    source_name = user.profile_image.name
+    try:
+        with user.profile_image.open('rb') as source:
+            data = source.read()
+    except OSError as error:
+        logger.warning('Profile image %s of user %s cannot be read: %s', source_name, user_id, error)
+        return None
+
+    digest = content_hash(data)
+    names = variant_names(digest)
+    if not force:
+        names = {key: name for key, name in names.items() if not default_storage.exists(name)}
+    if names:
+        try:
+            rendered = render_variants(data, names)
+        except (OSError, Image.DecompressionBombError) as error:
+            logger.warning('Profile image %s of user %s is not a usable image: %s', source_name, user_id, error)
+            return None
+        for name, content in rendered.items():
+            if force and default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(content))
+
+    # Only if the user has not uploaded another image in the meantime
+    updated = User.objects.filter(pk=user_id, profile_image=source_name).update(profile_image_hash=digest)
+    if updated and digest != user.profile_image_hash:
+        # Cached catalogue pages show the old avatar
+        bump_catalogue_version()
+    return digest
+
+
+def avatar_urls(user, size):
+    """
+    URLs of the variants to show ``user``'s avatar at ``size`` CSS pixels:
+    {'webp': (1x, 2x), 'jpg': (1x, 2x)}, or None if there are none yet.
+    """
+    digest = user.profile_image_hash
+    if not digest:
+        return None
+    one_x = next((s for s in AVATAR_SIZES if s >= size), AVATAR_SIZES[-1])
+    two_x = next((s for s in AVATAR_SIZES if s >= size * 2), AVATAR_SIZES[-1])
+    return {
+        extension: (
+            default_storage.url(variant_name(digest, one_x, extension)),
+            default_storage.url(variant_name(digest, two_x, extension)),
+        )
+        for extension in AVATAR_FORMATS
+    }
+
+
+class ImmediateProcessor(ImmediateWorker):
+    """Processes on commit in the calling thread"""
+
+    def handle(self, user_ids):
+        for user_id in user_ids:
+            process_profile_image(user_id)
+
+
+class ThreadProcessor(ThreadWorker):
+    """Processes from a background thread, one user at a time"""
+
+    thread_name = 'profile-images'
+
+    def handle(self, user_ids):
+        for user_id in user_ids:
+            try:
+                process_profile_image(user_id)
+            except Exception:
+                logger.exception('Failed to process the profile image of user %s', user_id)
+
+
+DEFAULT_PROCESSOR = 'users.avatars.ThreadProcessor'
+
+
+def get_processor():
+    """Return the processor configured by PROFILE_IMAGE_PROCESSOR"""
+    return get_worker('PROFILE_IMAGE_PROCESSOR', DEFAULT_PROCESSOR)
+
+
+def schedule_processing(user_id):
+    """Process the user's profile image once the current transaction commits"""
+    submit_on_commit('PROFILE_IMAGE_PROCESSOR', DEFAULT_PROCESSOR, user_id)
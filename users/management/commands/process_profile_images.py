@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from users.avatars import process_profile_image
+from users.models import DEFAULT_PROFILE_IMAGE, User
+
+
+class Command(BaseCommand):
+    help = 'Render the avatar variants of users whose uploaded profile image has none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Check every user, not only those without variants'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Re-render variants that already exist (after changing sizes or quality)'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(profile_image__in=('', DEFAULT_PROFILE_IMAGE))
+        if not (options['all'] or options['force']):
+            users = users.filter(profile_image_hash='')
+        processed = failed = 0
+        for user_id in users.values_list('pk', flat=True).iterator(chunk_size=2000):
+            if process_profile_image(user_id, force=options['force']):
+                processed += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} profile images; {failed} could not be read.'
+        ))
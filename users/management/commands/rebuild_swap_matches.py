@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from skills.vocabulary import normalize_skill_name
+from users.matching import rebuild_all_matches
+from users.models import SwapMatch, UserSkill
+
+
+class Command(BaseCommand):
+    help = 'Re-normalise user skill names and recompute every skill-swap match'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        stale = []
+        for user_skill in UserSkill.objects.only('pk', 'skill_name', 'normalized_name').iterator(chunk_size=batch_size):
+            normalized = normalize_skill_name(user_skill.skill_name)
+            if user_skill.normalized_name != normalized:
+                user_skill.normalized_name = normalized
+                stale.append(user_skill)
+        UserSkill.objects.bulk_update(stale, ['normalized_name'], batch_size=batch_size)
+
+        total = rebuild_all_matches(batch_size=batch_size)
+        cycles = SwapMatch.objects.filter(is_cycle=True).count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Normalised {len(stale)} skill names; stored {total} matches '
+            f'({total - cycles} two-way, {cycles} three-way).'
+        ))
@@ -0,0 +1,184 @@
+"""
+Skill-swap matching.
+
+Offers and wants are indexed on UserSkill.normalized_name as sparse
+user x skill matrices. Their product ``teach[i, j]`` counts the skills user
+i can teach user j, so two-way swaps are the pairs where both ``teach[i, j]``
+and ``teach[j, i]`` are set, and three-way cycles i -> j -> k -> i are read
+off the block of ``teach`` between the users i can teach and the users who
+can teach i.
+
+``rebuild_all_matches`` scores the whole graph in one pass. When users'
+skills change, ``update_user_matches`` rebuilds the graph for those users'
+neighbourhood only and replaces the SwapMatch rows that involve them.
+"""
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import SwapMatch, UserSkill
+
+
+def get_matching_settings():
+    return {
+        'MAX_PARTNERS': 50,
+        'MAX_CYCLES': 20,
+        'CYCLE_WEIGHT': 0.5,
+        **getattr(settings, 'SWAP_MATCHING', {}),
+    }
+
+
+class SkillGraph:
+    """Offer and want indexes for a set of users as sparse matrices"""
+
+    def __init__(self, rows):
+        """``rows`` are (user_id, normalized_name, skill_type) tuples"""
+        rows = [row for row in rows if row[1]]
+        self.user_ids = np.array(sorted({row[0] for row in rows}), dtype=np.int64)
+        self.terms = sorted({row[1] for row in rows})
+        self.position = {user_id: i for i, user_id in enumerate(self.user_ids.tolist())}
+        term_position = {term: i for i, term in enumerate(self.terms)}
+        shape = (len(self.user_ids), len(self.terms))
+        self.offers = self._matrix(rows, 'offer', term_position, shape)
+        self.wants = self._matrix(rows, 'want', term_position, shape)
+
+        teach = (self.offers @ self.wants.T).tocsr()
+        teach.setdiag(0)
+        teach.eliminate_zeros()
+        teach.sort_indices()
+        self.teach = teach
+        self.learn = teach.T.tocsr()
+        self.learn.sort_indices()
+
+    def _matrix(self, rows, skill_type, term_position, shape):
+        cells = {(self.position[user_id], term_position[term]) for user_id, term, kind in rows if kind == skill_type}
+        users = np.fromiter((cell[0] for cell in cells), dtype=np.int64, count=len(cells))
+        terms = np.fromiter((cell[1] for cell in cells), dtype=np.int64, count=len(cells))
+        return sparse.csr_matrix((np.ones(len(cells)), (users, terms)), shape=shape)
+
+    @staticmethod
+    def _row(matrix, i):
+        start, end = matrix.indptr[i], matrix.indptr[i + 1]
+        return matrix.indices[start:end], matrix.data[start:end]
+
+    def skills_taught(self, i, j):
+        """Normalised names of the skills user i can teach user j"""
+        offered, _ = self._row(self.offers, i)
+        wanted, _ = self._row(self.wants, j)
+        return [self.terms[t] for t in np.intersect1d(offered, wanted, assume_unique=True)]
+
+    def partners(self, i, limit):
+        """Two-way swaps for user i as (j, score), best first"""
+        out_users, out_counts = self._row(self.teach, i)
+        in_users, in_counts = self._row(self.learn, i)
+        common, out_at, in_at = np.intersect1d(out_users, in_users, assume_unique=True, return_indices=True)
+        if not len(common):
+            return []
+        scores = out_counts[out_at] + in_counts[in_at]
+        best = np.argsort(-scores, kind='stable')[:limit]
+        return list(zip(common[best].tolist(), scores[best].tolist()))
+
+    def cycles(self, i, limit, weight):
+        """Three-way cycles i -> j -> k -> i as (j, k, score), best first"""
+        out_users, out_counts = self._row(self.teach, i)
+        in_users, in_counts = self._row(self.learn, i)
+        if not len(out_users) or not len(in_users):
+            return []
+        # block[a, b] = skills out_users[a] can teach in_users[b]
+        block = self.teach[out_users][:, in_users].tocoo()
+        distinct = out_users[block.row] != in_users[block.col]
+        a, b, middle = block.row[distinct], block.col[distinct], block.data[distinct]
+        if not len(a):
+            return []
+        scores = (out_counts[a] + middle + in_counts[b]) * weight
+        best = np.argsort(-scores, kind='stable')[:limit]
+        return list(zip(out_users[a[best]].tolist(), in_users[b[best]].tolist(), scores[best].tolist()))
+
+    def matches(self, positions, options=None):
+        """
+        SwapMatch rows for every swap and cycle that involves one of
+        ``positions``, including the rows of the other participants.
+        """
+        options = options or get_matching_settings()
+        found = {}
+        taught = {}
+
+        def skills(teacher, learner):
+            if (teacher, learner) not in taught:
+                taught[teacher, learner] = ','.join(self.skills_taught(teacher, learner))[:255]
+            return taught[teacher, learner]
+
+        def add(owner, teaches, learns_from, score, is_cycle):
+            key = (owner, teaches, learns_from)
+            if key in found and found[key].score >= score:
+                return
+            found[key] = SwapMatch(
+                user_id=int(self.user_ids[owner]),
+                teaches_id=int(self.user_ids[teaches]),
+                learns_from_id=int(self.user_ids[learns_from]),
+                skills_given=skills(owner, teaches),
+                skills_received=skills(learns_from, owner),
+                score=score,
+                is_cycle=is_cycle,
+            )
+
+        for i in positions:
+            for j, score in self.partners(i, options['MAX_PARTNERS']):
+                add(i, j, j, score, False)
+                add(j, i, i, score, False)
+            for j, k, score in self.cycles(i, options['MAX_CYCLES'], options['CYCLE_WEIGHT']):
+                add(i, j, k, score, True)
+                add(j, k, i, score, True)
+                add(k, i, j, score, True)
+        return list(found.values())
+
+
+def _skill_rows(queryset):
+    return queryset.order_by().values_list('user_id', 'normalized_name', 'skill_type').iterator(chunk_size=5000)
+
+
+def rebuild_all_matches(batch_size=1000):
+    """Recompute every SwapMatch from scratch; returns the number of rows written"""
+    graph = SkillGraph(_skill_rows(UserSkill.objects.all()))
+    matches = graph.matches(range(len(graph.user_ids)))
+    with transaction.atomic():
+        SwapMatch.objects.all().delete()
+        SwapMatch.objects.bulk_create(matches, batch_size=batch_size)
+    return len(matches)
+
+
+def update_user_matches(*user_ids):
+    """Replace the matches involving these users after their offers or wants changed"""
+    own = UserSkill.objects.filter(user_id__in=user_ids)
+    offered = own.filter(skill_type='offer').values('normalized_name')
+    wanted = own.filter(skill_type='want').values('normalized_name')
+    neighbours = UserSkill.objects.filter(
+        Q(skill_type='want', normalized_name__in=offered) |
+        Q(skill_type='offer', normalized_name__in=wanted)
+    ).values('user_id')
+    graph = SkillGraph(_skill_rows(
+        UserSkill.objects.filter(Q(user_id__in=user_ids) | Q(user_id__in=neighbours))
+    ))
+    positions = [graph.position[user_id] for user_id in user_ids if user_id in graph.position]
+    matches = graph.matches(positions) if positions else []
+    with transaction.atomic():
+        SwapMatch.objects.filter(
+            Q(user_id__in=user_ids) | Q(teaches_id__in=user_ids) | Q(learns_from_id__in=user_ids)
+        ).delete()
+        # A concurrent update for a neighbour may already have written a shared row
+        SwapMatch.objects.bulk_create(matches, ignore_conflicts=True)
+    return matches
+
+
+def get_swap_matches(user, limit=5):
+    """The user's best swaps and cycles, with the other participants loaded"""
+    return list(
+        SwapMatch.objects.filter(user=user).select_related('teaches', 'learns_from')[:limit]
+    )
+
+
+def get_swap_match(user, partner):
+    """The two-way swap between two users, if there is one"""
+    return SwapMatch.objects.filter(user=user, teaches=partner, learns_from=partner).first()
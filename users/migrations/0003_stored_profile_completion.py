@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:34
+
+from django.db import migrations, models
+from django.db.models import Case, Q, Value, When
+
+
+def fill_profile_completion(apps, schema_editor):
+    # User.get_profile_completion() as one UPDATE: 25 points for each of
+    # bio, location, phone and a profile image other than the default
+    User = apps.get_model('users', 'User')
+    filled = [~Q(bio=''), ~Q(location=''), ~Q(phone=''), ~Q(profile_image='profile_images/default.jpg')]
+    points = sum(Case(When(condition, then=Value(25)), default=Value(0)) for condition in filled)
+    User.objects.update(profile_completion=points)
+    User.objects.update(profile_completed=Case(When(profile_completion=100, then=Value(True)), default=Value(False)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_profile_image_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_completion',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_profile_completion, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['profile_completion'], name='user_completion_idx'),
+        ),
+    ]
@@ -1,22 +1,30 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from PIL import Image
+from reviews.mixins import RatingAggregateMixin
+from skills.vocabulary import normalize_skill_name
+from .avatars import schedule_processing
 
+DEFAULT_PROFILE_IMAGE = 'profile_images/default.jpg'
 
-class User(AbstractUser):
+
+class User(RatingAggregateMixin, AbstractUser):
     """Custom User model extending Django's AbstractUser"""
     
     bio = models.TextField(max_length=500, blank=True, help_text="Tell others about yourself")
     profile_image = models.ImageField(
         upload_to='profile_images/', 
-        default='profile_images/default.jpg',
+        default=DEFAULT_PROFILE_IMAGE,
         help_text="Upload your profile picture"
     )
+    # Content hash of profile_image once its avatar variants exist (users.avatars)
+    profile_image_hash = models.CharField(max_length=64, blank=True, editable=False)
     location = models.CharField(max_length=100, blank=True, help_text="Your city or region")
     phone = models.CharField(max_length=15, blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
     
-    # Profile completion tracking
+    # Profile completion tracking, kept up to date by save() from
+    # PROFILE_COMPLETION_FIELDS (see get_profile_completion)
+    profile_completion = models.PositiveSmallIntegerField(default=0, editable=False)
     profile_completed = models.BooleanField(default=False)
     
     # Timestamps
@@ -27,23 +35,77 @@ class User(AbstractUser):
         ordering = ['-date_joined']
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Incomplete-profile queries in the admin and analytics
+            models.Index(fields=['profile_completion'], name='user_completion_idx'),
+        ]
+    
+    # Fields that count towards profile completion
+    PROFILE_COMPLETION_FIELDS = ('bio', 'location', 'phone', 'profile_image')
+    
+    # Fields whose changes save() reacts to; profile_image also drives the
+    # avatar pipeline
+    TRACKED_FIELDS = PROFILE_COMPLETION_FIELDS
     
     def __str__(self):
         return self.username
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._reset_tracking()
+        return instance
+    
+    def _tracked_value(self, name):
+        value = getattr(self, name)
+        return value.name if name == 'profile_image' else value
+    
+    def _reset_tracking(self):
+        """Remember the tracked fields as they are in the database"""
+        deferred = self.get_deferred_fields()
+        self._saved_values = {
+            name: self._tracked_value(name)
+            for name in self.TRACKED_FIELDS if name not in deferred
+        }
+    
+    def get_dirty_fields(self):
+        """Tracked fields changed since the user was loaded or last saved"""
+        saved = getattr(self, '_saved_values', None)
+        if saved is None:
+            # Not saved yet: everything is new except a default profile image
+            dirty = set(self.TRACKED_FIELDS)
+            if self.profile_image.name == DEFAULT_PROFILE_IMAGE:
+                dirty.discard('profile_image')
+            return dirty
+        # A field deferred at load time has no saved value; once it has been
+        # loaded or assigned it may differ from the database
+        return {
+            name for name in self.TRACKED_FIELDS
+            if (self._tracked_value(name) != saved[name] if name in saved else name in self.__dict__)
+        }
+    
     def save(self, *args, **kwargs):
+        dirty = self.get_dirty_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            dirty &= set(update_fields)
+        changed = set()
+        
+        image_changed = 'profile_image' in dirty
+        if image_changed:
+            # Show the new upload as it is until its variants are ready
+            self.profile_image_hash = ''
+            changed.add('profile_image_hash')
+        if dirty & set(self.PROFILE_COMPLETION_FIELDS) and self.update_profile_completion():
+            changed.update(('profile_completion', 'profile_completed'))
+        
+        if update_fields is not None and changed:
+            kwargs['update_fields'] = {*update_fields, *changed}
         super().save(*args, **kwargs)
+        self._reset_tracking()
         
-        # Resize profile image
-        if self.profile_image:
-            try:
-                img = Image.open(self.profile_image.path)
-                if img.height > 300 or img.width > 300:
-                    output_size = (300, 300)
-                    img.thumbnail(output_size)
-                    img.save(self.profile_image.path)
-            except:
-                pass
+        if image_changed and self.profile_image and self.profile_image.name != DEFAULT_PROFILE_IMAGE:
+            schedule_processing(self.pk)
     
     def get_profile_completion(self):
         """Calculate profile completion percentage"""
@@ -51,12 +113,21 @@ class User(AbstractUser):
             self.bio,
             self.location,
             self.phone,
-            self.profile_image.name != 'profile_images/default.jpg',
+            self.profile_image.name != DEFAULT_PROFILE_IMAGE,
         ]
         completed = sum(1 for field in fields if field)
         total = len(fields)
         return int((completed / total) * 100)
     
+    def update_profile_completion(self):
+        """Recalculate the stored completion; returns whether it changed"""
+        completion = self.get_profile_completion()
+        if completion == self.profile_completion:
+            return False
+        self.profile_completion = completion
+        self.profile_completed = completion == 100
+        return True
+    
     def get_skills_offered(self):
         """Get skills this user can teach"""
         return self.skills_offered.all()
@@ -64,18 +135,6 @@ class User(AbstractUser):
     def get_skills_wanted(self):
         """Get skills this user wants to learn"""
         return self.skills_wanted.all()
-    
-    def get_average_rating(self):
-        """Calculate average rating from reviews"""
-        reviews = self.received_reviews.all()
-        if reviews.exists():
-            total = sum(review.rating for review in reviews)
-            return round(total / reviews.count(), 1)
-        return 0
-    
-    def get_total_reviews(self):
-        """Get total number of reviews received"""
-        return self.received_reviews.count()
 
 
 class UserSkill(models.Model):
@@ -89,6 +148,8 @@ class UserSkill(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='user_skills')
     skill_name = models.CharField(max_length=100)
     skill_type = models.CharField(max_length=10, choices=SKILL_TYPE_CHOICES)
+    # Vocabulary key used to match offers against wants (see users.matching)
+    normalized_name = models.CharField(max_length=100, editable=False, default='')
     proficiency_level = models.CharField(
         max_length=20,
         choices=[
@@ -104,6 +165,49 @@ class UserSkill(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['user', 'skill_name', 'skill_type']
+        indexes = [
+            # Offer/want lookups of the swap matcher
+            models.Index(fields=['normalized_name', 'skill_type'], name='userskill_name_type_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.skill_name} ({self.get_skill_type_display()})"
+    
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_skill_name(self.skill_name)
+        super().save(*args, **kwargs)
+
+
+class SwapMatch(models.Model):
+    """
+    A skill exchange a user can take part in: they teach ``teaches`` and learn
+    from ``learns_from``. Both are the same person for a two-way swap and
+    different people for a three-way cycle. Maintained by users.matching.
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='swap_matches')
+    teaches = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    learns_from = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    skills_given = models.CharField(max_length=255, help_text="Skills the user teaches, comma separated")
+    skills_received = models.CharField(max_length=255, help_text="Skills the user learns, comma separated")
+    score = models.FloatField()
+    is_cycle = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-score']
+        unique_together = ['user', 'teaches', 'learns_from']
+        indexes = [
+            models.Index(fields=['user', '-score'], name='users_swapm_user_score_idx'),
+        ]
+    
+    def __str__(self):
+        if self.is_cycle:
+            return f"{self.user} teaches {self.teaches}, learns from {self.learns_from}"
+        return f"{self.user} swaps with {self.teaches}"
+    
+    def get_skills_given(self):
+        return self.skills_given.split(',') if self.skills_given else []
+    
+    def get_skills_received(self):
+        return self.skills_received.split(',') if self.skills_received else []
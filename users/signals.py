@@ -1,13 +1,12 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import User
+from .models import UserSkill
 
 
-@receiver(post_save, sender=User)
-def check_profile_completion(sender, instance, created, **kwargs):
-    """Check if user profile is complete"""
-    if not created:
-        completion = instance.get_profile_completion()
-        if completion == 100 and not instance.profile_completed:
-            instance.profile_completed = True
-            User.objects.filter(pk=instance.pk).update(profile_completed=True)
+@receiver([post_save, post_delete], sender=UserSkill)
+def update_swap_matches(sender, instance, **kwargs):
+    """Offers or wants changed; refresh the swaps this user takes part in"""
+    from .matching import update_user_matches
+    user_id = instance.user_id
+    transaction.on_commit(lambda: update_user_matches(user_id))
@@ -0,0 +1,15 @@
+from django import template
+from users.avatars import avatar_urls
+
+register = template.Library()
+
+
+@register.inclusion_tag('users/avatar.html')
+def avatar(user, size, css_class=''):
+    """A user's avatar at ``size`` CSS pixels, from its variants once they exist"""
+    return {
+        'user': user,
+        'size': size,
+        'css_class': css_class,
+        'urls': avatar_urls(user, size),
+    }
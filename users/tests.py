@@ -0,0 +1,144 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from .avatars import ImmediateProcessor, get_processor
+from .matching import get_swap_match, get_swap_matches, rebuild_all_matches
+from .models import SwapMatch, User, UserSkill
+
+
+class ProcessProfileImagesTests(TestCase):
+    def test_default_and_empty_images_are_skipped(self):
+        User.objects.create_user('default', 'default@example.com', 'password')
+        User.objects.create_user('empty', 'empty@example.com', 'password', profile_image='')
+        uploaded = User.objects.create_user(
+            'uploaded', 'uploaded@example.com', 'password', profile_image='profile_images/uploaded.jpg'
+        )
+        with mock.patch('users.management.commands.process_profile_images.process_profile_image') as process:
+            call_command('process_profile_images', stdout=StringIO())
+        process.assert_called_once_with(uploaded.pk, force=False)
+
+
+class ProcessorSettingsTests(TestCase):
+    @override_settings(PROFILE_IMAGE_PROCESSOR={'BACKEND': 'users.avatars.ImmediateProcessor'})
+    def test_immediate_processor_runs_on_commit(self):
+        self.assertIsInstance(get_processor(), ImmediateProcessor)
+        with mock.patch('users.avatars.process_profile_image') as process:
+            with self.captureOnCommitCallbacks(execute=True):
+                user = User.objects.create_user(
+                    'uploaded', 'uploaded@example.com', 'password', profile_image='profile_images/uploaded.jpg'
+                )
+        process.assert_called_once_with(user.pk)
+
+
+class SwapMatchingTests(TestCase):
+    """Swaps and three-way cycles follow offer and want edits"""
+
+    def setUp(self):
+        self.alice, self.bob, self.carol = (
+            User.objects.create_user(name, f'{name}@example.com', 'password') for name in ('alice', 'bob', 'carol')
+        )
+
+    def add(self, user, skill_name, skill_type):
+        with self.captureOnCommitCallbacks(execute=True):
+            return UserSkill.objects.create(user=user, skill_name=skill_name, skill_type=skill_type)
+
+    def rows(self):
+        return sorted(SwapMatch.objects.values_list('user__username', 'teaches__username', 'learns_from__username', 'is_cycle'))
+
+    def test_reciprocal_offers_and_wants_make_a_swap(self):
+        self.add(self.alice, 'Guitar', 'offer')
+        self.add(self.alice, 'Spanish', 'want')
+        self.add(self.bob, 'spanish', 'offer')
+        self.assertEqual(self.rows(), [])
+        self.add(self.bob, 'GUITAR ', 'want')
+        swap = get_swap_match(self.alice, self.bob)
+        self.assertEqual((swap.get_skills_given(), swap.get_skills_received()), (['guitar'], ['spanish']))
+        self.assertEqual(self.rows(), [('alice', 'bob', 'bob', False), ('bob', 'alice', 'alice', False)])
+
+    def test_three_way_cycles(self):
+        # alice teaches bob, bob teaches carol, carol teaches alice
+        for teacher, learner, skill_name in [
+            (self.alice, self.bob, 'Guitar'), (self.bob, self.carol, 'Cooking'), (self.carol, self.alice, 'Chess'),
+        ]:
+            self.add(teacher, skill_name, 'offer')
+            self.add(learner, skill_name, 'want')
+        self.assertEqual(self.rows(), [
+            ('alice', 'bob', 'carol', True), ('bob', 'carol', 'alice', True), ('carol', 'alice', 'bob', True),
+        ])
+        [cycle] = get_swap_matches(self.bob)
+        self.assertEqual((cycle.skills_given, cycle.skills_received), ('cooking', 'guitar'))
+
+    def test_removed_want_drops_the_swap(self):
+        self.add(self.alice, 'Guitar', 'offer')
+        self.add(self.bob, 'Spanish', 'offer')
+        want = self.add(self.bob, 'Guitar', 'want')
+        self.add(self.alice, 'Spanish', 'want')
+        self.assertEqual(SwapMatch.objects.count(), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            want.delete()
+        self.assertEqual(self.rows(), [])
+
+    def test_rebuild_matches_incremental_updates(self):
+        self.add(self.alice, 'Guitar', 'offer')
+        self.add(self.alice, 'Spanish', 'want')
+        self.add(self.bob, 'Spanish', 'offer')
+        self.add(self.bob, 'Guitar', 'want')
+        self.add(self.carol, 'Guitar', 'want')
+        incremental = self.rows()
+        self.assertEqual(rebuild_all_matches(), 2)
+        self.assertEqual(self.rows(), incremental)
+
+
+class ProfileCompletionTests(TestCase):
+    """The stored completion follows the fields it is computed from"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('learner', 'learner@example.com', 'password')
+
+    def stored(self):
+        return User.objects.values_list('profile_completion', 'profile_completed').get(pk=self.user.pk)
+
+    def test_new_users_start_incomplete(self):
+        self.assertEqual(self.stored(), (0, False))
+        bio_user = User.objects.create_user('writer', 'writer@example.com', 'password', bio='Hello')
+        self.assertEqual(bio_user.profile_completion, 25)
+
+    def test_contributing_fields_update_the_score(self):
+        self.user.bio = 'Guitarist'
+        self.user.location = 'Lisbon'
+        self.user.save()
+        self.assertEqual(self.stored(), (50, False))
+        self.user.phone = '555 0100'
+        self.user.profile_image = 'profile_images/me.jpg'
+        with mock.patch('users.models.schedule_processing') as schedule:
+            self.user.save()
+        schedule.assert_called_once_with(self.user.pk)
+        self.assertEqual(self.stored(), (100, True))
+        self.user.phone = ''
+        self.user.save()
+        self.assertEqual(self.stored(), (75, False))
+
+    def test_other_saves_leave_the_score_alone(self):
+        with mock.patch.object(User, 'get_profile_completion') as completion:
+            with CaptureQueriesContext(connection) as queries:
+                self.user.first_name = 'Lee'
+                self.user.save()
+        completion.assert_not_called()
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "users_user"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_update_fields_include_the_score(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.bio = 'Guitarist'
+        user.save(update_fields=['bio'])
+        self.assertEqual(self.stored(), (25, False))
+
+    def test_deferred_fields_are_tracked_once_assigned(self):
+        user = User.objects.only('username').get(pk=self.user.pk)
+        user.location = 'Lisbon'
+        user.save(update_fields=['location'])
+        self.assertEqual(self.stored(), (25, False))
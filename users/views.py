@@ -5,6 +5,7 @@ from django.contrib import messages
 from django.contrib.auth.views import PasswordResetView, PasswordResetConfirmView
 from django.urls import reverse_lazy
 from .forms import UserRegisterForm, UserLoginForm, UserUpdateForm, UserSkillForm
+from .matching import get_swap_match, get_swap_matches
 from .models import User, UserSkill
 
 
@@ -66,13 +67,16 @@ def profile(request, username=None):
     
     skills_offered = user.user_skills.filter(skill_type='offer')
     skills_wanted = user.user_skills.filter(skill_type='want')
+    is_own_profile = user == request.user
     
     context = {
         'profile_user': user,
         'skills_offered': skills_offered,
         'skills_wanted': skills_wanted,
-        'is_own_profile': user == request.user,
-        'profile_completion': user.get_profile_completion(),
+        'is_own_profile': is_own_profile,
+        'swap_matches': get_swap_matches(user) if is_own_profile else [],
+        'swap_match': None if is_own_profile else get_swap_match(request.user, user),
+        'profile_completion': user.profile_completion,
     }
     
     return render(request, 'users/profile.html', context)